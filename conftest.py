@@ -0,0 +1,50 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def fast_password_hashers(settings):
+    """
+    Hash passwords with MD5 in tests, the production hashers are deliberately slow.
+    """
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+@pytest.fixture(autouse=True)
+def reset_throttle_buckets():
+    from shopping_list.api.throttling import get_store
+
+    get_store().clear()
+
+
+@pytest.fixture(scope="module")
+def module_transaction(django_db_setup, django_db_blocker):
+    """
+    One transaction around a whole test module, rolled back at its end.
+
+    Module-scoped fixtures that depend on this create their shared rows
+    inside ``with module_transaction.unblock():``, each django_db test then
+    runs in its own savepoint on top of them. The database stays blocked
+    otherwise, so a test without the mark can't write rows the following
+    tests would see. Don't mix in transaction=True tests, their flush would
+    run inside this transaction.
+    """
+    from django.db import transaction
+
+    with django_db_blocker.unblock(), transaction.atomic():
+        with django_db_blocker.block():
+            yield django_db_blocker
+        transaction.set_rollback(True)
+
+
+@pytest.fixture
+def query_budget():
+    """
+    ``with query_budget(3): ...`` fails the test when the block runs more
+    than three queries, listing them with the stack of the first one over.
+    """
+    from core.querybudget import query_budget
+
+    def _query_budget(max_queries, using=None):
+        return query_budget(max_queries, using=using, mode="raise")
+
+    return _query_budget
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+if os.environ.get('DJANGO_PREWARM', '1') == '1':
+    from core.prewarm import prewarm
+
+    prewarm()
@@ -0,0 +1,91 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Runs in a fresh interpreter so nothing is imported yet, prints the phase
+# timings as JSON on the last stdout line.
+STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+configured = time.perf_counter()
+django.setup()
+ready = time.perf_counter()
+from django.core.handlers.wsgi import WSGIHandler
+WSGIHandler()
+handler = time.perf_counter()
+from core.prewarm import warm_url_resolver, warm_api
+resolver = warm_url_resolver()
+urls = time.perf_counter()
+warm_api(resolver)
+api = time.perf_counter()
+print(json.dumps({
+    "settings": configured - start,
+    "app registry": ready - configured,
+    "middleware": handler - ready,
+    "url resolver": urls - handler,
+    "api classes": api - urls,
+}))
+"""
+
+
+def parse_importtime(lines):
+    """
+    Return ``(per_package, per_module)`` self and cumulative import times in
+    seconds from ``python -X importtime`` output.
+    """
+    per_package = defaultdict(float)
+    per_module = {}
+    for line in lines:
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        module = name.strip()
+        per_package[module.split(".")[0]] += int(self_us) / 1e6
+        per_module[module] = int(cumulative_us) / 1e6
+    return per_package, per_module
+
+
+class Command(BaseCommand):
+    help = "Report import time per package, app loading and URL resolver warm-up in a fresh interpreter."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=15, help="Number of packages and modules to list.")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_PREWARM="0")
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT],
+            capture_output=True, text=True, env=env, cwd=os.getcwd(),
+        )
+        if process.returncode != 0:
+            # Killed children may not leave anything on stderr.
+            errors = process.stderr.strip().splitlines()
+            raise CommandError(errors[-1] if errors else f"Startup script exited with status {process.returncode}.")
+        output = process.stdout.strip().splitlines()
+        if not output:
+            raise CommandError("Startup script printed no timings.")
+
+        phases = json.loads(output[-1])
+        per_package, per_module = parse_importtime(process.stderr.splitlines())
+        top = options["top"]
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Startup phases"))
+        for phase, seconds in phases.items():
+            self.stdout.write(f"  {phase:<16}{seconds * 1000:9.1f} ms")
+        self.stdout.write(f"  {'total':<16}{sum(phases.values()) * 1000:9.1f} ms")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Import time by package (self)"))
+        for package, seconds in sorted(per_package.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f"  {package:<40}{seconds * 1000:9.1f} ms")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Slowest modules (cumulative)"))
+        for module, seconds in sorted(per_module.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f"  {module:<60}{seconds * 1000:9.1f} ms")
@@ -0,0 +1,199 @@
+import logging
+import re
+import secrets
+import struct
+import threading
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import get_random_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+ACCEPT_ENCODING_RE = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?")
+
+
+def accepted_encodings(header):
+    """
+    Codings from an Accept-Encoding header, without those refused with q=0.
+    """
+    accepted = set()
+    for part in header.split(","):
+        match = ACCEPT_ENCODING_RE.match(part)
+        if match and float(match.group(2) or 1) > 0:
+            accepted.add(match.group(1).lower())
+    return accepted
+
+
+class GzipCompressor:
+    """
+    gzip with a random length file name in the header, like Django's
+    GZipMiddleware, so pages carrying CSRF tokens do not compress to a length
+    an attacker can learn from (BREACH).
+    """
+    encoding = "gzip"
+    max_random_bytes = 100
+
+    def __init__(self):
+        # Raw deflate, the gzip header and trailer are written here.
+        self._compressor = zlib.compressobj(
+            getattr(settings, "COMPRESSION_GZIP_LEVEL", 6), zlib.DEFLATED, -zlib.MAX_WBITS
+        )
+        self._header = self.header()
+        self._crc = 0
+        self._size = 0
+
+    def header(self):
+        filename = get_random_string(1 + secrets.randbelow(self.max_random_bytes)).encode()
+        # Magic, deflate, FNAME flag, no mtime, no extra flags, unknown OS.
+        return b"\x1f\x8b\x08\x08\x00\x00\x00\x00\x00\xff" + filename + b"\x00"
+
+    def _process(self, data):
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        header, self._header = self._header, b""
+        return header + self._compressor.compress(data)
+
+    def compress(self, data):
+        return self._process(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def compress_all(self, data):
+        return self._process(data) + self.finish()
+
+    def finish(self):
+        header, self._header = self._header, b""
+        return header + self._compressor.flush(zlib.Z_FINISH) + struct.pack("<II", self._crc, self._size & 0xFFFFFFFF)
+
+
+class BrotliCompressor:
+    encoding = "br"
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=getattr(settings, "COMPRESSION_BROTLI_QUALITY", 5))
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def compress_all(self, data):
+        return self._compressor.process(data) + self.finish()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionStats:
+    """
+    Per-process totals of response bytes before and after compression.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.totals = {}
+
+    def record(self, encoding, original, compressed):
+        with self._lock:
+            responses, original_total, compressed_total = self.totals.get(encoding, (0, 0, 0))
+            self.totals[encoding] = (responses + 1, original_total + original, compressed_total + compressed)
+        logger.debug(
+            "Compressed response with %s: %d -> %d bytes (%.0f%%)",
+            encoding, original, compressed, 100 * compressed / original if original else 100,
+        )
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with Brotli (when the brotli package is installed) or
+    gzip, depending on what the client accepts.
+
+    Responses smaller than COMPRESSION_MIN_SIZE bytes, responses that already
+    have a Content-Encoding and responses that would not get smaller are sent
+    as they are. Streaming responses are compressed chunk by chunk. HTML is
+    always gzipped, Brotli has no header to pad against BREACH.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        if response.has_header("Content-Encoding"):
+            return response
+        if not response.streaming and len(response.content) < getattr(settings, "COMPRESSION_MIN_SIZE", 1024):
+            return response
+
+        compressor_class = self.get_compressor_class(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""), response.get("Content-Type", "")
+        )
+        if compressor_class is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.compress_async_stream(compressor_class(), response.streaming_content)
+            else:
+                response.streaming_content = self.compress_stream(compressor_class(), response.streaming_content)
+            del response.headers["Content-Length"]
+        else:
+            compressor = compressor_class()
+            compressed = compressor.compress_all(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            compression_stats.record(compressor.encoding, len(response.content), len(compressed))
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # The representation changed, a strong ETag would now be wrong.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = compressor_class.encoding
+        return response
+
+    @staticmethod
+    def get_compressor_class(accept_encoding, content_type=""):
+        accepted = accepted_encodings(accept_encoding)
+        html = content_type.split(";")[0].strip().lower() == "text/html"
+        if brotli is not None and "br" in accepted and not html:
+            return BrotliCompressor
+        if "gzip" in accepted:
+            return GzipCompressor
+        return None
+
+    @staticmethod
+    def compress_stream(compressor, chunks):
+        original = compressed = 0
+        for chunk in chunks:
+            original += len(chunk)
+            data = compressor.compress(chunk)
+            compressed += len(data)
+            if data:
+                yield data
+        data = compressor.finish()
+        compression_stats.record(compressor.encoding, original, compressed + len(data))
+        yield data
+
+    @staticmethod
+    async def compress_async_stream(compressor, chunks):
+        original = compressed = 0
+        async for chunk in chunks:
+            original += len(chunk)
+            data = compressor.compress(chunk)
+            compressed += len(data)
+            if data:
+                yield data
+        data = compressor.finish()
+        compression_stats.record(compressor.encoding, original, compressed + len(data))
+        yield data
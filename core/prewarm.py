@@ -0,0 +1,74 @@
+"""
+Work done once in the server's master process before it forks workers.
+
+Run from core/wsgi.py and core/asgi.py. With a preloading server (for
+example ``gunicorn --preload``) everything built here is shared between
+workers copy-on-write instead of being rebuilt on each worker's first
+request. Nothing here touches the database.
+"""
+
+import gc
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers
+from django.urls import get_resolver
+from django.utils import translation
+from rest_framework.settings import api_settings
+
+
+def warm_url_resolver():
+    resolver = get_resolver()
+    # Compiles every pattern and builds the reverse and namespace maps.
+    resolver.reverse_dict
+    resolver.namespace_dict
+    resolver.app_dict
+    return resolver
+
+
+def warm_api(resolver):
+    """
+    Import DRF's configured classes and build the serializer field maps and
+    permission instances of every API view in the URLconf.
+    """
+    for name in ("DEFAULT_RENDERER_CLASSES", "DEFAULT_PARSER_CLASSES", "DEFAULT_AUTHENTICATION_CLASSES",
+                 "DEFAULT_PERMISSION_CLASSES", "DEFAULT_THROTTLE_CLASSES", "DEFAULT_CONTENT_NEGOTIATION_CLASS"):
+        getattr(api_settings, name)
+
+    for view_class in _api_view_classes(resolver):
+        for permission_class in getattr(view_class, "permission_classes", ()):
+            permission_class()
+        serializer_class = getattr(view_class, "serializer_class", None)
+        if serializer_class is not None:
+            serializer_class().fields
+
+
+def _api_view_classes(resolver):
+    seen = set()
+    for pattern in _iter_patterns(resolver.url_patterns):
+        view_class = getattr(pattern.callback, "cls", None)
+        if view_class is not None and view_class not in seen:
+            seen.add(view_class)
+            yield view_class
+
+
+def _iter_patterns(patterns):
+    for pattern in patterns:
+        if hasattr(pattern, "url_patterns"):
+            yield from _iter_patterns(pattern.url_patterns)
+        else:
+            yield pattern
+
+
+def prewarm(freeze=True):
+    resolver = warm_url_resolver()
+    warm_api(resolver)
+    get_hashers()
+    if settings.USE_I18N:
+        translation.activate(settings.LANGUAGE_CODE)
+        translation.deactivate()
+
+    if freeze:
+        # Keep the warmed objects out of the collector's generations so the
+        # first collections in each worker do not touch (and copy) them.
+        gc.collect()
+        gc.freeze()
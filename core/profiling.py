@@ -0,0 +1,234 @@
+"""
+Sampled request profiling, off until switched on with
+`manage.py profile_requests on`.
+
+A profiled request leaves three files in PROFILING_DIR sharing one stem:
+
+- ``.prof``, cProfile stats for ``python -m pstats`` or snakeviz,
+- ``.folded``, sampled stacks in the collapsed format read by
+  flamegraph.pl and speedscope,
+- ``.sql``, every query with its duration in milliseconds.
+
+The switch is a JSON file in PROFILING_DIR, so it applies to all worker
+processes on the host without a restart. Only the newest
+PROFILING_MAX_PROFILES profiles are kept, within PROFILING_MAX_BYTES.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+
+from core.querybudget import wrap_databases
+
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE = "profiling.json"
+PROFILE_SUFFIXES = (".prof", ".folded", ".sql")
+
+
+def profiling_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def read_config():
+    try:
+        with open(profiling_dir() / CONFIG_FILE) as config_file:
+            return json.load(config_file)
+    except (OSError, ValueError):
+        return {"enabled": False}
+
+
+def write_config(config):
+    directory = profiling_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    # Replace atomically, running workers never read a partial file.
+    temporary = directory / f".{CONFIG_FILE}.{os.getpid()}"
+    temporary.write_text(json.dumps(config, indent=2))
+    os.replace(temporary, directory / CONFIG_FILE)
+
+
+class ProfilingSwitch:
+    """
+    The switch file as seen by one process, re-read when its mtime changes
+    and checked at most every PROFILING_CONFIG_CHECK_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self._config = {"enabled": False}
+        self._mtime = None
+        self._checked_at = None
+
+    def config(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < settings.PROFILING_CONFIG_CHECK_INTERVAL:
+            return self._config
+        self._checked_at = now
+        try:
+            mtime = os.stat(profiling_dir() / CONFIG_FILE).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self._mtime = mtime
+            self._config = read_config() if mtime is not None else {"enabled": False}
+        return self._config
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread from a background thread and counts
+    the collapsed stacks.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests matching the switch file:
+
+        {"enabled": true, "sample_rate": 0.05, "url_names": ["all-shopping-lists"],
+         "user_ids": [3], "min_duration_ms": 200}
+
+    Empty or missing filters match everything. Requests faster than
+    ``min_duration_ms`` are profiled but not written, so only slow ones land
+    on disk. The same goes for ``user_ids`` when the user isn't known before
+    the view: DRF authenticates token clients in the view and only then sets
+    the user on the request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.switch = ProfilingSwitch()
+
+    def __call__(self, request):
+        config = self.switch.config()
+        if not config.get("enabled") or not self.should_profile(request, config):
+            return self.get_response(request)
+        return self.profile(request, config)
+
+    def should_profile(self, request, config):
+        if random.random() >= config.get("sample_rate", 1.0):
+            return False
+        if config.get("url_names"):
+            try:
+                url_name = resolve(request.path_info).url_name
+            except Resolver404:
+                return False
+            if url_name not in config["url_names"]:
+                return False
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated and not self.user_matches(request, config):
+            return False
+        return True
+
+    def user_matches(self, request, config):
+        if not config.get("user_ids"):
+            return True
+        user = getattr(request, "user", None)
+        return user is not None and user.pk in config["user_ids"]
+
+    def profile(self, request, config):
+        queries = []
+
+        def record_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append(((time.perf_counter() - start) * 1000, sql))
+
+        profiler = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            with ExitStack() as stack:
+                wrap_databases(stack, record_query)
+                response = profiler.runcall(self.get_response, request)
+        finally:
+            sampler.stop()
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        if duration_ms >= config.get("min_duration_ms", 0) and self.user_matches(request, config):
+            try:
+                self.write(request, response, duration_ms, profiler, sampler, queries)
+            except OSError:
+                logger.exception("Could not write request profile.")
+        return response
+
+    def write(self, request, response, duration_ms, profiler, sampler, queries):
+        directory = profiling_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        url_name = getattr(request.resolver_match, "url_name", None) or "unresolved"
+        stem = directory / (
+            f"{timezone.now():%Y%m%dT%H%M%S%f}-{request.method}-{url_name}-{int(duration_ms)}ms-{uuid.uuid4().hex[:8]}"
+        )
+
+        profiler.dump_stats(f"{stem}.prof")
+        Path(f"{stem}.folded").write_text(sampler.collapsed())
+        Path(f"{stem}.sql").write_text(
+            f"-- {request.method} {request.get_full_path()} {response.status_code} in {duration_ms:.1f} ms, "
+            f"{len(queries)} queries\n"
+            + "".join(f"{query_ms:.2f}\t{sql}\n" for query_ms, sql in queries)
+        )
+        rotate_profiles()
+
+
+def rotate_profiles():
+    """
+    Delete the oldest profiles beyond PROFILING_MAX_PROFILES or
+    PROFILING_MAX_BYTES.
+    """
+    profiles = {}
+    for path in profiling_dir().iterdir():
+        if path.suffix in PROFILE_SUFFIXES:
+            profiles.setdefault(path.with_suffix(""), []).append(path)
+
+    # Stems start with a timestamp, newest first.
+    kept_bytes = 0
+    for index, stem in enumerate(sorted(profiles, key=lambda stem: stem.name, reverse=True)):
+        files = profiles[stem]
+        kept_bytes += sum(path.stat().st_size for path in files)
+        if index >= settings.PROFILING_MAX_PROFILES or kept_bytes > settings.PROFILING_MAX_BYTES:
+            for path in files:
+                path.unlink(missing_ok=True)
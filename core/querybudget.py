@@ -0,0 +1,134 @@
+"""
+Query budgets: a declared maximum number of SQL queries for a block of code
+or a view.
+
+    with query_budget(3):
+        ...
+
+    @query_budget(3)
+    def rebuild(): ...
+
+    @view_query_budgets(get=4, patch=6)
+    class ShoppingListDetail(generics.RetrieveUpdateDestroyAPIView): ...
+
+What happens on a violation depends on QUERY_BUDGET_MODE: "raise" raises
+QueryBudgetExceeded with every query and the stack of the first one over
+budget, "log" logs the same as a warning, "off" does not count at all.
+
+Queries on every configured database are counted unless ``using`` names
+some, including those run by shopping_list.sharding.fan_out in its worker
+threads. Transaction control statements are not counted, whether they are
+sent depends on the backend and on the test wrapping everything in a
+transaction.
+"""
+
+import functools
+import logging
+import traceback
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_CONTROL = ("BEGIN", "SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def wrap_databases(stack, wrapper, using=None):
+    """
+    Install ``wrapper`` as execute wrapper of the ``using`` aliases, all
+    databases when None, until ``stack`` is closed.
+    """
+    aliases = list(connections) if using is None else [using] if isinstance(using, str) else using
+    for alias in aliases:
+        stack.enter_context(connections[alias].execute_wrapper(wrapper))
+
+
+class query_budget:
+
+    def __init__(self, max_queries, using=None, name=None, mode=None):
+        self.max_queries = max_queries
+        self.using = using
+        self.name = name
+        self.mode = mode
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def inner(*args, **kwargs):
+            with query_budget(self.max_queries, self.using, self.name or func.__qualname__, self.mode):
+                return func(*args, **kwargs)
+        return inner
+
+    def __enter__(self):
+        self.queries = []
+        self.stack = None
+        if self.mode is None:
+            self.mode = getattr(settings, "QUERY_BUDGET_MODE", "off")
+        if self.mode != "off":
+            self._stack = ExitStack()
+            wrap_databases(self._stack, self._record, self.using)
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if self.mode == "off":
+            return
+        self._stack.close()
+        if exc_type is None and len(self.queries) > self.max_queries:
+            self.report()
+
+    def _record(self, execute, sql, params, many, context):
+        if sql.startswith(TRANSACTION_CONTROL):
+            return execute(sql, params, many, context)
+        self.queries.append(sql)
+        if len(self.queries) == self.max_queries + 1:
+            # Only the first query over budget pays for a stack trace.
+            self.stack = "".join(traceback.format_stack()[:-1])
+        return execute(sql, params, many, context)
+
+    def report(self):
+        message = (
+            f"{self.name or 'Block'} ran {len(self.queries)} queries, its budget is {self.max_queries}.\n"
+            + "\n".join(f"{number}. {sql}" for number, sql in enumerate(self.queries, 1))
+            + f"\n\nFirst query over budget was run from:\n{self.stack}"
+        )
+        if self.mode == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+def view_query_budgets(**budgets):
+    """
+    Class decorator giving a view a query budget per HTTP method, covering
+    the whole dispatch including authentication and permission checks.
+
+    Views reading every shard with fan_out give a pair instead,
+    ``(max_queries, per_extra_shard)``: the budget grows by
+    ``per_extra_shard`` for every shard in SHOPPING_LIST_SHARDS beyond the
+    first.
+    """
+    budgets = {method.upper(): max_queries for method, max_queries in budgets.items()}
+
+    def decorator(view_class):
+        dispatch = view_class.dispatch
+
+        @functools.wraps(dispatch)
+        def budgeted_dispatch(self, request, *args, **kwargs):
+            max_queries = budgets.get(request.method)
+            if max_queries is None:
+                return dispatch(self, request, *args, **kwargs)
+            max_queries, per_extra_shard = max_queries if isinstance(max_queries, tuple) else (max_queries, 0)
+            max_queries += per_extra_shard * (len(getattr(settings, "SHOPPING_LIST_SHARDS", [None])) - 1)
+            with query_budget(max_queries, name=f"{view_class.__name__} {request.method}"):
+                return dispatch(self, request, *args, **kwargs)
+
+        view_class.dispatch = budgeted_dispatch
+        view_class.query_budgets = budgets
+        return view_class
+
+    return decorator
@@ -0,0 +1,14 @@
+"""
+Settings for the core project, split into profiles.
+
+DJANGO_ENV selects the profile: "dev" (default) or "prod". Every profile
+builds on core/settings/base.py and reads its secrets and hosts from the
+environment.
+"""
+
+import os
+
+if os.environ.get("DJANGO_ENV", "dev") == "prod":
+    from core.settings.prod import *  # noqa: F401,F403
+else:
+    from core.settings.dev import *  # noqa: F401,F403
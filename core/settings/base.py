@@ -0,0 +1,286 @@
+"""
+Django settings shared by every profile of the core project.
+
+Generated by 'django-admin startproject' using Django 4.0.5. The profile
+specific modules (dev, prod) extend this one, see core/settings/__init__.py.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.0/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/4.0/ref/settings/
+"""
+
+import os
+from importlib.util import find_spec
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = [host for host in os.environ.get("DJANGO_ALLOWED_HOSTS", "").split(",") if host]
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+
+    'rest_framework',
+    'core',
+    'user',
+    'shopping_list',
+    'jobs',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'shopping_list.audit.AuditLogMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'core.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'core.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/4.0/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get("DJANGO_SQLITE_PATH", BASE_DIR / 'db.sqlite3'),
+    }
+}
+
+# Database aliases holding shopping lists and their items, a list goes to
+# the alias picked by hashing its id (shopping_list.sharding). Aliases not
+# configured above are SQLite files next to the default database.
+SHOPPING_LIST_SHARDS = os.environ.get("DJANGO_SHOPPING_LIST_SHARDS", "default").split(",")
+
+for alias in SHOPPING_LIST_SHARDS:
+    DATABASES.setdefault(alias, {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / f'{alias}.sqlite3'})
+
+DATABASE_ROUTERS = ["shopping_list.sharding.ShoppingListShardRouter"]
+
+
+# Password validation
+# https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/4.0/topics/auth/passwords/
+#
+# DJANGO_PASSWORD_HASHER picks the hasher for new passwords ("pbkdf2" or
+# "argon2", the latter needs argon2-cffi). The remaining hashers stay listed
+# so existing hashes still verify and are rehashed on the next login.
+
+PASSWORD_HASHER = os.environ.get("DJANGO_PASSWORD_HASHER", "pbkdf2")
+
+PASSWORD_HASHERS = [
+    "user.hashers.TunablePBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+if PASSWORD_HASHER == "argon2":
+    PASSWORD_HASHERS.insert(0, "user.hashers.TunableArgon2PasswordHasher")
+elif find_spec("argon2") is not None:
+    PASSWORD_HASHERS.append("user.hashers.TunableArgon2PasswordHasher")
+
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get("DJANGO_PASSWORD_PBKDF2_ITERATIONS", 600000))
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/4.0/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/4.0/howto/static-files/
+
+STATIC_URL = 'static/'
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+AUTH_USER_MODEL = 'user.CustomUser'
+
+
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "rest_framework.renderers.JSONRenderer",
+    ],
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "rest_framework.authentication.SessionAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+        "user.authentication.CachedTokenAuthentication",
+    ],
+    "DEFAULT_PERMISSION_CLASSES": [
+        "rest_framework.permissions.IsAuthenticated",
+    ],
+    "DEFAULT_THROTTLE_CLASSES": [
+        "shopping_list.api.throttling.UserTokenBucketThrottle",
+        "shopping_list.api.throttling.ShoppingListTokenBucketThrottle",
+    ],
+    "DEFAULT_THROTTLE_RATES": {
+        "user_read": "600/min",
+        "user_write": "120/min",
+        "list_read": "300/min",
+        "list_write": "120/min",
+    },
+}
+
+
+# Seconds a resolved API token principal stays in the in-process cache.
+# Revoking a token clears it in the current process, other workers pick the
+# revocation up once their entry expires.
+API_TOKEN_CACHE_TTL = 30
+
+API_TOKEN_CACHE_MAX_ENTRIES = 10000
+
+
+# Seconds the figures of api/me/stats/ are cached per user in the cache
+# named by USER_STATS_CACHE, 0 computes them on every request.
+USER_STATS_CACHE_TTL = 0
+
+USER_STATS_CACHE = "default"
+
+
+# Token bucket store used by the shopping list throttles. The local store is
+# per process, CacheTokenBucketStore shares budgets through the cache named
+# by SHOPPING_LIST_THROTTLE_CACHE.
+SHOPPING_LIST_THROTTLE_STORE = "shopping_list.api.throttling.LocalTokenBucketStore"
+
+SHOPPING_LIST_THROTTLE_MAX_KEYS = 100000
+
+
+# Response compression (core.middleware.CompressionMiddleware). Brotli is
+# used when the brotli package is installed and the client accepts it.
+COMPRESSION_MIN_SIZE = 1024
+
+COMPRESSION_GZIP_LEVEL = 6
+
+COMPRESSION_BROTLI_QUALITY = 5
+
+
+# Background jobs, run with `manage.py run_workers`.
+JOBS_WORKERS = 2
+
+JOBS_WORKER_MODE = "thread"
+
+JOBS_POLL_INTERVAL = 1.0
+
+# Seconds after which a running job whose worker stopped renewing its lease
+# is queued again, or failed once out of attempts. Workers renew the lease of
+# their job and look for expired ones every JOBS_HEARTBEAT_SECONDS.
+JOBS_LEASE_SECONDS = 600
+
+JOBS_HEARTBEAT_SECONDS = 60
+
+# Jobs the workers queue every so many seconds, see jobs.queue.enqueue_scheduled.
+JOBS_SCHEDULE = {
+    "shopping_list.rotate_audit_log": 86400,
+}
+
+# Base delay in seconds before retrying a failed job, doubled per attempt.
+JOBS_RETRY_BACKOFF = 5
+
+
+# Moving an item to a position key longer than this queues a job that
+# respaces the positions of its list.
+SHOPPING_ITEM_POSITION_REBALANCE_LENGTH = 12
+
+# Items deleted per statement when a list is deleted while something
+# listens to item deletions, see ShoppingList.delete.
+SHOPPING_LIST_DELETE_BATCH_SIZE = 2000
+
+
+# What a view exceeding its query budget does (core.querybudget): "raise",
+# "log" a warning with the offending SQL, or "off" to skip counting.
+QUERY_BUDGET_MODE = "log"
+
+
+# Sampled request profiling (core.profiling), switched on and off at runtime
+# with `manage.py profile_requests`.
+PROFILING_DIR = os.environ.get("DJANGO_PROFILING_DIR", BASE_DIR / "profiles")
+
+# Seconds between checks of the switch file.
+PROFILING_CONFIG_CHECK_INTERVAL = 2.0
+
+# Seconds between stack samples for the .folded flamegraph files.
+PROFILING_SAMPLE_INTERVAL = 0.001
+
+PROFILING_MAX_PROFILES = 100
+
+PROFILING_MAX_BYTES = 200 * 1024 * 1024
+
+
+# Seconds a response stored for an Idempotency-Key is replayed to retries.
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Seconds a key stays claimed by a request that died. Running requests renew
+# their claim every third of this.
+IDEMPOTENCY_LOCK_SECONDS = 60
+
+# Months of list history kept by `manage.py rotate_audit_log`, and months
+# of PostgreSQL partitions it creates ahead.
+AUDIT_LOG_RETENTION_MONTHS = 12
+AUDIT_LOG_PARTITIONS_AHEAD = 2
@@ -0,0 +1,39 @@
+"""
+Development profile: DEBUG on, browsable API and developer tools.
+"""
+
+import os
+from importlib.util import find_spec
+
+from core.settings.base import *  # noqa: F401,F403
+from core.settings.base import DATABASES, INSTALLED_APPS, REST_FRAMEWORK
+
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ.get(
+    "DJANGO_SECRET_KEY", 'django-insecure-4r660*rmjj^^7juvbvgcwzpr818h1r%*4(=o1@r=wzpvo7i*!w'
+)
+
+DEBUG = True
+
+# Local SQLite shards, used by the sharding tests and to try sharding with
+# DJANGO_SHOPPING_LIST_SHARDS=shard_0,shard_1.
+for alias in ("shard_0", "shard_1"):
+    DATABASES.setdefault(alias, {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / f'{alias}.sqlite3'})
+
+CORS_ORIGIN_ALLOW_ALL = DEBUG
+
+# Fail loudly on N+1 regressions while developing and in tests.
+QUERY_BUDGET_MODE = "raise"
+
+# Only loaded when installed, it is not needed to serve requests.
+if find_spec("django_extensions") is not None:
+    INSTALLED_APPS = [*INSTALLED_APPS, 'django_extensions']
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": [
+        *REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"],
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
@@ -0,0 +1,42 @@
+"""
+Production profile: DEBUG off, JSON-only API, cached templates and
+persistent database connections. DJANGO_SECRET_KEY and
+DJANGO_ALLOWED_HOSTS must be set.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from core.settings.base import *  # noqa: F401,F403
+from core.settings.base import DATABASES, TEMPLATES
+
+
+try:
+    SECRET_KEY = os.environ["DJANGO_SECRET_KEY"]
+except KeyError:
+    raise ImproperlyConfigured("DJANGO_SECRET_KEY must be set in production.")
+
+# With DEBUG on every executed query is kept on the connection.
+DEBUG = False
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+DATABASES = {
+    alias: {**database, 'CONN_MAX_AGE': int(os.environ.get("DJANGO_CONN_MAX_AGE", 60))}
+    for alias, database in DATABASES.items()
+}
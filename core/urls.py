@@ -19,4 +19,6 @@ from django.urls import path, include
 urlpatterns = [
     path('admin/', admin.site.urls),
     path("", include('shopping_list.urls')),
+    path("", include('user.urls')),
+    path("", include('jobs.urls')),
 ]
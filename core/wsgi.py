@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+if os.environ.get('DJANGO_PREWARM', '1') == '1':
+    from core.prewarm import prewarm
+
+    prewarm()
@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from jobs.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "attempts", "progress", "created_at", "finished_at")
+    list_filter = ("status",)
+    raw_id_fields = ("owner",)
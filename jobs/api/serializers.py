@@ -0,0 +1,20 @@
+from rest_framework import serializers
+
+from jobs.models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    # The stored error is a traceback for the logs and the admin, clients
+    # only learn that the job failed.
+    error = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            "id", "name", "status", "attempts", "progress", "progress_message",
+            "result", "error", "created_at", "started_at", "finished_at",
+        ]
+        read_only_fields = fields
+
+    def get_error(self, job):
+        return "The job failed." if job.error else ""
@@ -0,0 +1,18 @@
+from rest_framework import generics
+
+from jobs.api.serializers import JobSerializer
+from jobs.models import Job
+
+
+class ListJob(generics.ListAPIView):
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        return Job.objects.filter(owner=self.request.user).order_by("-created_at")
+
+
+class JobDetail(generics.RetrieveAPIView):
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        return Job.objects.filter(owner=self.request.user)
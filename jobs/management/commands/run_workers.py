@@ -0,0 +1,77 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import work
+
+
+def _process_main(worker_id, poll_interval, once):
+    import django
+
+    django.setup()
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    work(worker_id, poll_interval=poll_interval, once=once, should_stop=stop.is_set)
+
+
+class Command(BaseCommand):
+    help = "Run background job workers in a thread or process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=getattr(settings, "JOBS_WORKERS", 2))
+        parser.add_argument("--mode", choices=["thread", "process"], default=getattr(settings, "JOBS_WORKER_MODE", "thread"))
+        parser.add_argument("--poll-interval", type=float, default=getattr(settings, "JOBS_POLL_INTERVAL", 1.0))
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is drained.")
+
+    def handle(self, *args, **options):
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        workers = options["workers"]
+        self.stdout.write(f"Starting {workers} {options['mode']} workers.")
+
+        if options["mode"] == "process":
+            self.run_processes(prefix, workers, options["poll_interval"], options["once"])
+        else:
+            self.run_threads(prefix, workers, options["poll_interval"], options["once"])
+
+    def run_threads(self, prefix, workers, poll_interval, once):
+        stop = threading.Event()
+        threads = [
+            threading.Thread(
+                target=work,
+                args=(f"{prefix}:{i}",),
+                kwargs={"poll_interval": poll_interval, "once": once, "should_stop": stop.is_set},
+            )
+            for i in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def run_processes(self, prefix, workers, poll_interval, once):
+        # Connections must not be shared with the children.
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=_process_main, args=(f"{prefix}:{i}", poll_interval, once))
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+                process.join()
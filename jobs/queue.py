@@ -0,0 +1,206 @@
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import get_handler
+
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(name, payload=None, owner=None, idempotency_key=None, max_attempts=3):
+    """
+    Queue a job and return it. With an ``idempotency_key`` the job already
+    queued under that key for the same owner is returned instead.
+    """
+    get_handler(name)
+
+    if idempotency_key is None:
+        return Job.objects.create(name=name, payload=payload or {}, owner=owner, max_attempts=max_attempts)
+
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                name=name, payload=payload or {}, owner=owner, max_attempts=max_attempts, idempotency_key=idempotency_key
+            )
+    except IntegrityError:
+        return Job.objects.get(owner=owner, idempotency_key=idempotency_key)
+
+
+def enqueue_once(name, payload=None, owner=None, max_attempts=3):
+    """
+    Queue a job unless the same job, same name and payload, is already
+    waiting to run. Returns the new job, or None. Requests racing each
+    other may both queue it, the job must tolerate running twice.
+    """
+    payload = payload or {}
+    waiting = Job.objects.filter(name=name, status=Job.Status.QUEUED, payload=payload)
+    if waiting.exists():
+        return None
+    return enqueue(name, payload, owner=owner, max_attempts=max_attempts)
+
+
+def claim_next(worker_id):
+    """
+    Atomically move the next due job to RUNNING and return it, or None.
+
+    The claim is a conditional UPDATE, so workers racing for the same row
+    never both win and no broker or row locks are needed.
+    """
+    while True:
+        pk = (
+            Job.objects
+            .filter(status=Job.Status.QUEUED, run_after__lte=timezone.now())
+            .order_by("run_after")
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if pk is None:
+            return None
+
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=pk, status=Job.Status.QUEUED).update(
+            status=Job.Status.RUNNING,
+            locked_by=worker_id,
+            attempts=F("attempts") + 1,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+
+
+def requeue_stale():
+    """
+    Put back running jobs whose lease was not renewed for JOBS_LEASE_SECONDS,
+    their worker died. The lost run counted as an attempt, jobs without
+    attempts left are failed instead. Returns how many jobs were put back.
+    """
+    now = timezone.now()
+    expired = now - timedelta(seconds=getattr(settings, "JOBS_LEASE_SECONDS", 600))
+    stale = Job.objects.filter(status=Job.Status.RUNNING).filter(
+        Q(heartbeat_at__lt=expired) | Q(heartbeat_at__isnull=True, started_at__lt=expired)
+    )
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.Status.FAILED, locked_by="", error="The worker running the job stopped.", finished_at=now
+    )
+    return stale.update(status=Job.Status.QUEUED, locked_by="")
+
+
+def enqueue_scheduled():
+    """
+    Queue the jobs of JOBS_SCHEDULE, ``{name: interval in seconds}``, that
+    are neither queued nor running and were last queued more than their
+    interval ago. Returns the jobs queued. Workers checking at the same time
+    may both queue a job, scheduled jobs must tolerate running twice.
+    """
+    queued = []
+    now = timezone.now()
+    for name, interval in getattr(settings, "JOBS_SCHEDULE", {}).items():
+        jobs = Job.objects.filter(name=name)
+        if jobs.filter(
+            Q(status__in=[Job.Status.QUEUED, Job.Status.RUNNING]) | Q(created_at__gt=now - timedelta(seconds=interval))
+        ).exists():
+            continue
+        queued.append(enqueue(name))
+    return queued
+
+
+class Heartbeat:
+    """
+    Renew the lease of a running job from a background thread every
+    JOBS_HEARTBEAT_SECONDS, so a job running longer than JOBS_LEASE_SECONDS
+    is not taken for abandoned and run a second time.
+    """
+    def __init__(self, job):
+        self.job = job
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def beat(self):
+        Job.objects.filter(pk=self.job.pk, status=Job.Status.RUNNING, locked_by=self.job.locked_by).update(
+            heartbeat_at=timezone.now()
+        )
+
+    def _run(self):
+        try:
+            while not self._stop.wait(getattr(settings, "JOBS_HEARTBEAT_SECONDS", 60)):
+                self.beat()
+        finally:
+            connection.close()
+
+
+def run_job(job):
+    try:
+        with Heartbeat(job):
+            result = get_handler(job.name)(job)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Job %s (%s) failed on attempt %s", job.pk, job.name, job.attempts)
+
+        if job.attempts < job.max_attempts:
+            backoff = getattr(settings, "JOBS_RETRY_BACKOFF", 5) * 2 ** (job.attempts - 1)
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.Status.QUEUED, locked_by="", error=error,
+                run_after=timezone.now() + timedelta(seconds=backoff),
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(status=Job.Status.FAILED, error=error, finished_at=timezone.now())
+        return False
+
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.Status.SUCCEEDED, result=result, progress=1, error="", finished_at=timezone.now()
+    )
+    return True
+
+
+def run_pending(worker_id):
+    """
+    Run due jobs until the queue is drained and return how many ran.
+    """
+    count = 0
+    while True:
+        job = claim_next(worker_id)
+        if job is None:
+            return count
+        run_job(job)
+        count += 1
+
+
+def work(worker_id, poll_interval=1.0, once=False, should_stop=lambda: False):
+    """
+    Worker loop run by each thread or process of ``manage.py run_workers``.
+    Polls for jobs until ``should_stop`` returns True, or until the queue is
+    drained when ``once`` is set. Every JOBS_HEARTBEAT_SECONDS jobs of dead
+    workers are put back and scheduled jobs are queued.
+    """
+    checked_at = None
+    try:
+        while not should_stop():
+            close_old_connections()
+            if checked_at is None or time.monotonic() - checked_at >= getattr(settings, "JOBS_HEARTBEAT_SECONDS", 60):
+                requeue_stale()
+                enqueue_scheduled()
+                checked_at = time.monotonic()
+            if not run_pending(worker_id):
+                if once:
+                    return
+                time.sleep(poll_interval)
+    finally:
+        connection.close()
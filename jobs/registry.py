@@ -0,0 +1,20 @@
+_handlers = {}
+
+
+def job_handler(name):
+    """
+    Register the decorated function as the handler for jobs called ``name``.
+    The function receives the Job and returns a JSON serialisable result.
+    """
+    def decorator(func):
+        _handlers[name] = func
+        return func
+
+    return decorator
+
+
+def get_handler(name):
+    try:
+        return _handlers[name]
+    except KeyError:
+        raise LookupError(f"No job handler registered for {name!r}.")
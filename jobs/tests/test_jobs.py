@@ -0,0 +1,175 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from jobs.models import Job
+from jobs.queue import claim_next, enqueue, requeue_stale, run_job, run_pending
+from jobs.registry import job_handler
+from shopping_list.tests.conftest import create_shopping_item, create_shopping_list
+from user.tests.conftest import create_user, create_authenticated_client
+
+
+calls = []
+
+
+@job_handler("tests.record")
+def record(job):
+    calls.append(job.payload)
+    job.report_progress(0.5, "halfway")
+    return {"echo": job.payload}
+
+
+@job_handler("tests.fail")
+def fail(job):
+    raise RuntimeError("boom")
+
+
+@job_handler("tests.slow")
+def slow(job):
+    time.sleep(0.3)
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+@pytest.mark.django_db
+def test_job_runs_and_stores_result():
+    job = enqueue("tests.record", {"value": 1})
+
+    assert run_pending("test-worker") == 1
+
+    job.refresh_from_db()
+    assert job.status == Job.Status.SUCCEEDED
+    assert job.result == {"echo": {"value": 1}}
+    assert job.progress == 1
+    assert calls == [{"value": 1}]
+
+
+@pytest.mark.django_db
+def test_unknown_job_name_is_rejected():
+    with pytest.raises(LookupError):
+        enqueue("tests.missing")
+
+
+@pytest.mark.django_db
+def test_idempotency_key_returns_existing_job(create_user):
+    user = create_user()
+
+    job = enqueue("tests.record", owner=user, idempotency_key="abc")
+    again = enqueue("tests.record", owner=user, idempotency_key="abc")
+
+    assert again.pk == job.pk
+    assert Job.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_claimed_job_is_not_claimed_twice():
+    enqueue("tests.record")
+
+    assert claim_next("worker-1") is not None
+    assert claim_next("worker-2") is None
+
+
+@pytest.mark.django_db
+def test_failed_job_is_retried_then_marked_failed(settings):
+    settings.JOBS_RETRY_BACKOFF = 0
+    job = enqueue("tests.fail", max_attempts=2)
+
+    run_pending("test-worker")
+
+    job.refresh_from_db()
+    assert job.status == Job.Status.FAILED
+    assert job.attempts == 2
+    assert "boom" in job.error
+
+
+@pytest.mark.django_db
+def test_jobs_without_heartbeat_are_requeued_until_out_of_attempts(settings):
+    settings.JOBS_LEASE_SECONDS = 60
+    alive, dead, exhausted = (enqueue("tests.record", max_attempts=2) for _ in range(3))
+    for worker in ("alive", "dead", "exhausted"):
+        claim_next(worker)
+    long_ago = timezone.now() - timedelta(seconds=120)
+    Job.objects.filter(pk__in=[dead.pk, exhausted.pk]).update(heartbeat_at=long_ago)
+    Job.objects.filter(pk=exhausted.pk).update(attempts=2)
+
+    assert requeue_stale() == 1
+
+    statuses = dict(Job.objects.values_list("pk", "status"))
+    assert statuses == {alive.pk: Job.Status.RUNNING, dead.pk: Job.Status.QUEUED, exhausted.pk: Job.Status.FAILED}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_running_job_renews_its_lease(settings):
+    settings.JOBS_HEARTBEAT_SECONDS = 0.05
+    job = enqueue("tests.slow")
+    claimed = claim_next("test-worker")
+
+    run_job(claimed)
+
+    job.refresh_from_db()
+    assert job.status == Job.Status.SUCCEEDED
+    assert job.heartbeat_at > job.started_at
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_workers_command_drains_queue():
+    enqueue("tests.record", {"value": 1})
+    enqueue("tests.record", {"value": 2})
+
+    call_command("run_workers", "--once", "--workers", "2")
+
+    assert set(Job.objects.values_list("status", flat=True)) == {Job.Status.SUCCEEDED}
+
+
+@pytest.mark.django_db
+def test_export_is_queued_and_progress_is_reported(
+    create_user, create_authenticated_client, create_shopping_list, create_shopping_item
+):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    create_shopping_item(shopping_list=shopping_list, name="Eggs")
+    client = create_authenticated_client(user)
+
+    response = client.post(reverse("export-shopping-list", args=[shopping_list.id]))
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.data["status"] == Job.Status.QUEUED
+
+    run_pending("test-worker")
+
+    response = client.get(reverse("job-detail", args=[response.data["id"]]))
+    assert response.data["status"] == Job.Status.SUCCEEDED
+    assert response.data["result"]["shopping_items"][0]["name"] == "Eggs"
+
+
+@pytest.mark.django_db
+def test_job_progress_restricted_to_owner(create_user, create_authenticated_client):
+    owner = create_user()
+    other = create_user(email="b@b.com")
+    job = enqueue("tests.record", owner=owner)
+
+    response = create_authenticated_client(other).get(reverse("job-detail", args=[job.id]))
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_job_errors_are_not_shown_to_clients(settings, create_user, create_authenticated_client):
+    settings.JOBS_RETRY_BACKOFF = 0
+    user = create_user()
+    job = enqueue("tests.fail", owner=user, max_attempts=1)
+    run_pending("test-worker")
+
+    response = create_authenticated_client(user).get(reverse("job-detail", args=[job.id]))
+
+    assert response.data["status"] == Job.Status.FAILED
+    assert response.data["error"] == "The job failed."
+    assert "Traceback" in Job.objects.get(pk=job.pk).error
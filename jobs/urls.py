@@ -0,0 +1,9 @@
+from django.urls import path
+
+from jobs.api.views import JobDetail, ListJob
+
+
+urlpatterns = [
+    path("api/jobs/", ListJob.as_view(), name="all-jobs"),
+    path("api/jobs/<uuid:pk>/", JobDetail.as_view(), name="job-detail"),
+]
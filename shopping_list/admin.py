@@ -1,7 +1,93 @@
-from django.contrib import admin
+import uuid
 
-# Register your models here.
-from shopping_list.models import ShoppingItem, ShoppingList
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
-admin.site.register(ShoppingItem)
-admin.site.register(ShoppingList)
+from core.paginator import EstimatedCountPaginator
+from shopping_list.models import AuditEvent, ShoppingItem, ShoppingList
+from shopping_list.ranking import keys_after
+
+
+class ShoppingItemActionForm(ActionForm):
+    target_shopping_list = forms.UUIDField(required=False, label="Target shopping list id")
+
+
+@admin.register(ShoppingItem)
+class ShoppingItemAdmin(admin.ModelAdmin):
+    list_display = ("name", "purchased", "shopping_list")
+    list_select_related = ("shopping_list",)
+    list_filter = ("purchased",)
+    search_fields = ("=id", "^name")
+    autocomplete_fields = ("shopping_list",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = ShoppingItemActionForm
+    actions = ("mark_purchased", "mark_not_purchased", "move_to_shopping_list")
+
+    @admin.action(description="Mark selected items as purchased")
+    def mark_purchased(self, request, queryset):
+        updated = queryset.update(purchased=True, purchased_at=Coalesce("purchased_at", Value(timezone.now())))
+        self.message_user(request, f"{updated} items marked as purchased.")
+
+    @admin.action(description="Mark selected items as not purchased")
+    def mark_not_purchased(self, request, queryset):
+        updated = queryset.update(purchased=False, purchased_at=None)
+        self.message_user(request, f"{updated} items marked as not purchased.")
+
+    @admin.action(description="Move selected items to the target shopping list")
+    def move_to_shopping_list(self, request, queryset):
+        try:
+            target = uuid.UUID(request.POST.get("target_shopping_list", ""))
+        except ValueError:
+            target = None
+        if target is None or not ShoppingList.objects.filter(pk=target).exists():
+            self.message_user(request, "Enter the id of an existing target shopping list.", messages.ERROR)
+            return
+        # Moved items are appended to the target in their current order.
+        # They leave their merge group, the target may have merged items of
+        # the same name.
+        items = list(queryset.select_related(None).order_by("shopping_list", "position").only("pk"))
+        with transaction.atomic(using=queryset.db):
+            for item, position in zip(items, keys_after(ShoppingItem.last_position(target), len(items))):
+                item.shopping_list_id = target
+                item.position = position
+                item.merge_key = None
+            ShoppingItem.objects.using(queryset.db).bulk_update(items, ["shopping_list", "position", "merge_key"])
+        self.message_user(request, f"{len(items)} items moved.")
+
+
+@admin.register(ShoppingList)
+class ShoppingListAdmin(admin.ModelAdmin):
+    list_display = ("name", "id", "updated_at")
+    search_fields = ("=id", "^name")
+    raw_id_fields = ("members",)
+    readonly_fields = ("created_at", "updated_at")
+    ordering = ("-updated_at",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(AuditEvent)
+class AuditEventAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "action", "shopping_list_id", "item_id", "actor")
+    list_select_related = ("actor",)
+    list_filter = ("action",)
+    search_fields = ("=shopping_list_id", "=item_id", "=actor__email")
+    ordering = ("-created_at",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # The history is append-only.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,89 @@
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+from shopping_list.models import ShoppingItem
+from user.models import CustomUser
+
+
+class ShoppingListFieldSet:
+    """
+    The slice of a shopping list a client asked for.
+
+    ``?fields=id,name,shopping_items.name`` keeps only the listed fields,
+    dotted names pick fields of the nested items or members.
+    ``?expand=shopping_items`` renders the listed relations in full and the
+    other ones as lists of ids. Without parameters everything is returned.
+
+    The same object trims the serializer and the queryset, so fields that
+    are not returned are not selected or prefetched either.
+    """
+    relations = {
+        "shopping_items": (ShoppingItem, "shopping_list_id"),
+        "members": (CustomUser, None),
+    }
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_query_params(cls, query_params):
+        fields = None
+        if query_params.get("fields"):
+            fields = {}
+            for name in query_params["fields"].split(","):
+                name, _, subfield = name.strip().partition(".")
+                if not subfield:
+                    fields[name] = None
+                elif fields.get(name, set()) is not None:
+                    fields.setdefault(name, set()).add(subfield)
+
+        expand = None
+        if "expand" in query_params:
+            expand = {name.strip() for name in query_params["expand"].split(",") if name.strip()}
+
+        return cls(fields, expand)
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def subfields(self, name):
+        return None if self.fields is None else self.fields.get(name)
+
+    def is_expanded(self, name):
+        return self.expand is None or name in self.expand
+
+    def apply_to_serializer(self, serializer):
+        for name in list(serializer.fields):
+            if not self.includes(name):
+                serializer.fields.pop(name)
+            elif name in self.relations and not self.is_expanded(name):
+                serializer.fields[name] = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+            elif self.subfields(name) is not None:
+                child = serializer.fields[name].child
+                for subfield in list(child.fields):
+                    if subfield not in self.subfields(name):
+                        child.fields.pop(subfield)
+
+    def apply_to_queryset(self, queryset, serializer_class):
+        declared = serializer_class._declared_fields
+        model_fields = {field.name for field in queryset.model._meta.concrete_fields}
+        queryset = queryset.only("pk", *(
+            name for name in serializer_class.Meta.fields
+            if name in model_fields and self.includes(name)
+        ))
+
+        for name, (model, fk_name) in self.relations.items():
+            if not self.includes(name):
+                continue
+            if self.is_expanded(name):
+                nested_fields = self.subfields(name) or declared[name].child.Meta.fields
+            else:
+                nested_fields = []
+            concrete = {field.name for field in model._meta.concrete_fields}
+            only = ["pk", *(field for field in nested_fields if field in concrete)]
+            if fk_name:
+                only.append(fk_name)
+            queryset = queryset.prefetch_related(Prefetch(name, queryset=model.objects.only(*only)))
+
+        return queryset
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.utils import timezone
+from rest_framework import exceptions, status
+from rest_framework.response import Response
+
+from shopping_list.models import IdempotencyKey
+from shopping_list.sharding import shard_atomic, shard_for
+
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyConflict(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is still being processed."
+    default_code = "idempotency_conflict"
+
+
+class IdempotencyKeyReused(exceptions.APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was already used for a different request."
+    default_code = "idempotency_key_reused"
+
+
+def request_fingerprint(request):
+    payload = json.dumps([request.method, request.path, request.data], sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ClaimRenewal:
+    """
+    Keep a pending key claimed while its request runs, however long it
+    takes, by pushing its expiry back every third of
+    IDEMPOTENCY_LOCK_SECONDS from a background thread. A request that dies
+    stops renewing and its key can be claimed again.
+    """
+
+    def __init__(self, record):
+        self.record = record
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def renew(self):
+        IdempotencyKey.objects.filter(pk=self.record.pk, status_code__isnull=True).update(
+            expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+        )
+
+    def _run(self):
+        try:
+            while not self._stop.wait(settings.IDEMPOTENCY_LOCK_SECONDS / 3):
+                try:
+                    self.renew()
+                except DatabaseError:
+                    logger.exception("Could not renew Idempotency-Key %s.", self.record.key)
+        finally:
+            connection.close()
+
+
+class IdempotentCreateMixin:
+    """
+    Make POST safe to retry: with an Idempotency-Key header the first
+    response is stored for IDEMPOTENCY_KEY_TTL seconds and returned to
+    retries with the same key instead of running the write again.
+
+    The key is claimed before the write and the claim is renewed while the
+    write runs, so a retry racing the original request gets 409 instead of
+    a second write. The write and the stored
+    response commit together, see shard_atomic for lists on a shard. Errors
+    are not stored, the client may retry them with the same key.
+    """
+
+    def get_write_db(self):
+        """
+        The database the write goes to, the list in the URL by default.
+        """
+        return shard_for(self.kwargs["pk"])
+
+    def post(self, request, *args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return super().post(request, *args, **kwargs)
+        if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+            raise exceptions.ValidationError({"Idempotency-Key": ["Ensure this header has at most 255 characters."]})
+
+        fingerprint = request_fingerprint(request)
+        record = self.claim_idempotency_key(request.user, key, fingerprint)
+        if record.status_code is not None:
+            response = Response(record.response, status=record.status_code)
+            response["Idempotent-Replayed"] = "true"
+            return response
+
+        try:
+            with ClaimRenewal(record), shard_atomic(self.get_write_db()):
+                response = super().post(request, *args, **kwargs)
+                if response.status_code < 400:
+                    IdempotencyKey.objects.filter(pk=record.pk).update(
+                        status_code=response.status_code,
+                        response=response.data,
+                        expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                    )
+        except Exception:
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+            raise
+        if response.status_code >= 400:
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+        return response
+
+    def claim_idempotency_key(self, user, key, fingerprint):
+        """
+        Return a new pending record for the key, or the finished record of an
+        earlier request.
+        """
+        expires_at = timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(user=user, key=key, fingerprint=fingerprint, expires_at=expires_at)
+        except IntegrityError:
+            pass
+
+        record = IdempotencyKey.objects.get(user=user, key=key)
+        if record.expires_at < timezone.now():
+            # Expired, or left pending by a request that died: take it over,
+            # unless a concurrent retry just did.
+            taken = IdempotencyKey.objects.filter(pk=record.pk, expires_at=record.expires_at).update(
+                fingerprint=fingerprint, status_code=None, response=None, expires_at=expires_at
+            )
+            if not taken:
+                raise IdempotencyConflict()
+            record.fingerprint, record.status_code, record.response, record.expires_at = fingerprint, None, None, expires_at
+            return record
+        if record.fingerprint != fingerprint:
+            raise IdempotencyKeyReused()
+        if record.status_code is None:
+            raise IdempotencyConflict()
+        return record
@@ -3,6 +3,18 @@ from rest_framework import permissions
 from shopping_list.models import ShoppingList
 
 
+def is_member(request, shopping_list_id):
+    """
+    ShoppingList.is_member remembered for the request, so the list throttle
+    and the permission checks share one query.
+    """
+    memberships = request.__dict__.setdefault("_shopping_list_memberships", {})
+    key = str(shopping_list_id)
+    if key not in memberships:
+        memberships[key] = ShoppingList.is_member(shopping_list_id, request.user)
+    return memberships[key]
+
+
 class ShoppingListMembersOnly(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
@@ -10,7 +22,10 @@ class ShoppingListMembersOnly(permissions.BasePermission):
         if request.user.is_superuser:
             return True
         
-        if request.user in obj.members.all():
+        if isinstance(obj, ShoppingList):
+            return is_member(request, obj.pk)
+
+        if obj.has_member(request.user):
             return True
         
         return False
@@ -24,7 +39,7 @@ class ShoppingItemShoppingListMembersOnly(permissions.BasePermission):
         if request.user.is_superuser:
             return True
 
-        if request.user in obj.shopping_list.members.all():
+        if is_member(request, obj.shopping_list_id):
             return True
 
         return False
@@ -36,9 +51,7 @@ class AllShoppingItemsShoppingListMembersOnly(permissions.BasePermission):
         if request.user.is_superuser:
             return True
         
-        current_shopping_list = ShoppingList.objects.get(pk=view.kwargs.get("pk"))
-
-        if request.user not in current_shopping_list.members.all():
+        if not is_member(request, view.kwargs.get("pk")):
             return False
         
         return True
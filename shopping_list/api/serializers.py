@@ -1,6 +1,7 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 
-from shopping_list.models import ShoppingItem, ShoppingList
+from shopping_list.models import ArchivedShoppingList, AuditEvent, ShoppingItem, ShoppingList
 from user.serializers import UserSerializer
 
 
@@ -8,19 +9,104 @@ class ShoppingItemSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ShoppingItem
-        fields = ["id", "name", "purchased"]
-        read_only_fields = ('id',)
+        fields = ["id", "name", "quantity", "unit", "purchased", "position"]
+        read_only_fields = ('position',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Clients may choose the id of a new item, not change it.
+        if self.instance is not None:
+            self.fields["id"].read_only = True
+        elif "view" in self.context and "pk" in self.context["view"].kwargs:
+            # New ids are unique on the shard the item is written to.
+            for validator in self.fields["id"].validators:
+                if isinstance(validator, UniqueValidator):
+                    validator.queryset = validator.queryset.for_list(self.context["view"].kwargs["pk"])
 
     def create(self, validated_data, **kwargs):
-        validated_data["shopping_list_id"] = self.context['request'].parser_context['kwargs']['pk']
+        request = self.context['request']
+        validated_data["shopping_list_id"] = request.parser_context['kwargs']['pk']
+        if request.query_params.get("merge") in ("1", "true"):
+            return ShoppingItem.add_or_merge(**validated_data)
         return super(ShoppingItemSerializer, self).create(validated_data)
 
 
+class ShoppingItemUpsertSerializer(ShoppingItemSerializer):
+    # Declared to skip the per-row uniqueness query, conflicts are upserted.
+    id = serializers.UUIDField()
+
+
+class ShoppingItemBatchSerializer(serializers.Serializer):
+    items = ShoppingItemUpsertSerializer(many=True, allow_empty=False, max_length=1000)
+    on_conflict = serializers.ChoiceField(choices=["update", "ignore"], default="update")
+
+
+class ShoppingItemTotalSerializer(serializers.Serializer):
+    name = serializers.CharField(source="normalized_name")
+    unit = serializers.CharField()
+    quantity = serializers.DecimalField(max_digits=16, decimal_places=3)
+    items = serializers.IntegerField()
+    shopping_lists = serializers.IntegerField()
+
+
+class SiblingItemField(serializers.PrimaryKeyRelatedField):
+    """
+    An item looked up on the shard of the moved item, ``context["item"]``.
+    """
+
+    def get_queryset(self):
+        item = self.context["item"]
+        return ShoppingItem.objects.using(item._state.db).only("id", "position", "shopping_list_id")
+
+
+class MoveShoppingItemSerializer(serializers.Serializer):
+    after = SiblingItemField(required=False, allow_null=True)
+    before = SiblingItemField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        item = self.context["item"]
+        for neighbour in (attrs.get("after"), attrs.get("before")):
+            if neighbour and (neighbour.pk == item.pk or neighbour.shopping_list_id != item.shopping_list_id):
+                raise serializers.ValidationError("Neighbours must be other items of the same shopping list.")
+        return attrs
+
+
 class ShoppingListSerializer(serializers.ModelSerializer):
     shopping_items = ShoppingItemSerializer(many=True, read_only=True)
     members = UserSerializer(many=True, read_only=True)
 
     class Meta:
         model = ShoppingList
-        fields = ["id", "name", "shopping_items", "members"]
+        fields = ["id", "name", "is_template", "shopping_items", "members"]
+        read_only_fields = ("is_template",)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fieldset = self.context.get("fieldset")
+        if fieldset is not None:
+            fieldset.apply_to_serializer(self)
+
+
+class CloneShoppingListSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=200, required=False)
+    copy_members = serializers.BooleanField(default=False)
+    as_template = serializers.BooleanField(default=False)
+
+
+class ArchivedShoppingListSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = ArchivedShoppingList
+        fields = ["id", "name", "archived_at"]
+
+
+class MembersByEmailSerializer(serializers.Serializer):
+    emails = serializers.ListField(child=serializers.EmailField(), allow_empty=False, max_length=1000)
+
+
+class AuditEventSerializer(serializers.ModelSerializer):
+    actor = UserSerializer(read_only=True)
+
+    class Meta:
+        model = AuditEvent
+        fields = ["id", "created_at", "action", "item_id", "actor", "data"]
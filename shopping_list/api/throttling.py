@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from shopping_list.api.permissions import is_member
+
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """
+    Parse a DRF style rate such as "100/min" into (capacity, seconds).
+    """
+    num, period = rate.split("/")
+    return int(num), DURATIONS[period[0]]
+
+
+class LocalTokenBucketStore:
+    """
+    In-process token buckets. Memory is bounded by evicting the least
+    recently used bucket once SHOPPING_LIST_THROTTLE_MAX_KEYS is reached.
+    """
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate):
+        """
+        Take one token from the bucket and return 0, or return the seconds
+        until a token is available.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * refill_rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / refill_rate
+            self._buckets[key] = (tokens - 1 if wait == 0 else tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > getattr(settings, "SHOPPING_LIST_THROTTLE_MAX_KEYS", 100000):
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheTokenBucketStore:
+    """
+    Token buckets kept in a Django cache so several workers share budgets.
+    Updates are not atomic, concurrent requests may occasionally both get
+    the last token.
+    """
+    key_prefix = "throttle:"
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, "SHOPPING_LIST_THROTTLE_CACHE", "default")]
+
+    def consume(self, key, capacity, refill_rate):
+        now = time.time()
+        tokens, last = self.cache.get(self.key_prefix + key, (capacity, now))
+        tokens = min(capacity, tokens + (now - last) * refill_rate)
+        wait = 0 if tokens >= 1 else (1 - tokens) / refill_rate
+        timeout = int(capacity / refill_rate) + 1
+        self.cache.set(self.key_prefix + key, (tokens - 1 if wait == 0 else tokens, now), timeout)
+        return wait
+
+    def clear(self):
+        """
+        Clears the whole cache, point SHOPPING_LIST_THROTTLE_CACHE at a cache
+        of its own if other data must survive.
+        """
+        self.cache.clear()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                path = getattr(settings, "SHOPPING_LIST_THROTTLE_STORE", "shopping_list.api.throttling.LocalTokenBucketStore")
+                _store = import_string(path)()
+    return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base class for token bucket throttles with separate read and write budgets.
+
+    Rates are looked up in REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] under
+    "<scope>_read" and "<scope>_write". A missing rate disables that budget.
+    """
+    scope = None
+
+    def get_ident_key(self, request, view):
+        raise NotImplementedError(".get_ident_key() must be overridden")
+
+    def allow_request(self, request, view):
+        self.wait_seconds = 0
+        access = "read" if request.method in SAFE_METHODS else "write"
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(f"{self.scope}_{access}")
+        if rate is None:
+            return True
+
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return True
+
+        capacity, duration = parse_rate(rate)
+        self.wait_seconds = get_store().consume(f"{self.scope}_{access}:{ident}", capacity, capacity / duration)
+        return self.wait_seconds == 0
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Budget per authenticated user, anonymous requests are keyed by client IP.
+    Uses only data already on the request, deciding costs no query.
+    """
+    scope = "user"
+
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return str(request.user.pk)
+        return self.get_ident(request)
+
+
+class ShoppingListTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Budget per shopping list shared by all its members, for views naming the
+    list URL kwarg in ``shopping_list_url_kwarg``.
+
+    Throttles run before the object permissions, so membership is checked
+    here first: requests of non-members must not spend the budget of a list.
+    The check is remembered for the permission classes, it adds no query.
+    """
+    scope = "list"
+
+    def get_ident_key(self, request, view):
+        kwarg = getattr(view, "shopping_list_url_kwarg", None)
+        pk = view.kwargs.get(kwarg) if kwarg else None
+        if pk is None or not request.user.is_authenticated or not is_member(request, pk):
+            return None
+        return str(pk)
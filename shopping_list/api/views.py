@@ -1,7 +1,44 @@
-from rest_framework import generics
+import itertools
+import uuid
 
-from shopping_list.api.serializers import ShoppingItemSerializer, ShoppingListSerializer
-from shopping_list.models import ShoppingItem, ShoppingList
+from django.conf import settings
+from django.db.models import Count, Sum, prefetch_related_objects
+from django.utils.functional import cached_property
+from rest_framework import generics, serializers, status
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from core.querybudget import view_query_budgets
+from jobs.api.serializers import JobSerializer
+from jobs.queue import enqueue, enqueue_once
+from shopping_list.api.fieldsets import ShoppingListFieldSet
+from shopping_list.api.idempotency import IdempotentCreateMixin
+from shopping_list.api.serializers import (
+    ArchivedShoppingListSerializer,
+    AuditEventSerializer,
+    CloneShoppingListSerializer,
+    MembersByEmailSerializer,
+    MoveShoppingItemSerializer,
+    ShoppingItemBatchSerializer,
+    ShoppingItemSerializer,
+    ShoppingItemTotalSerializer,
+    ShoppingListSerializer,
+)
+from shopping_list.archive import restore_shopping_list
+from shopping_list.cloning import clone_shopping_list
+from shopping_list import audit
+from shopping_list.models import (
+    ArchivedShoppingList,
+    AuditEvent,
+    ArchivedShoppingListMembership,
+    ShoppingItem,
+    ShoppingList,
+    ShoppingListMembership,
+)
+from shopping_list.sharding import fan_out_for_member, is_sharded, shard_for
+from user.models import CustomUser
+from user.serializers import UserSerializer
 from shopping_list.api.permissions import (
     AllShoppingItemsShoppingListMembersOnly,
     ShoppingItemShoppingListMembersOnly,
@@ -9,35 +46,401 @@ from shopping_list.api.permissions import (
 )
 
 
-class ListAddShoppingList(generics.ListCreateAPIView):
+class MemberListsMixin:
+    """
+    List the lists of ``get_queryset()`` the user is a member of. When
+    sharded they are read from every shard holding one of them.
+    ``membership`` is the through model of the lists.
+    """
+    membership = ShoppingListMembership
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if is_sharded():
+            return queryset
+        return queryset.filter(members=self.request.user)
+
+    def get_member_lists(self):
+        queryset = self.get_queryset()
+        results = fan_out_for_member(
+            self.request.user, lambda alias, ids: list(queryset.using(alias).filter(pk__in=ids)), self.membership
+        )
+        return list(itertools.chain.from_iterable(results))
+
+    def list(self, request, *args, **kwargs):
+        if not is_sharded():
+            return super().list(request, *args, **kwargs)
+        return Response(self.get_serializer(self.get_member_lists(), many=True).data)
+
+
+class ShoppingListShardMixin:
+    """
+    Look the object up on the shard holding the list in the URL.
+    """
+    shopping_list_url_kwarg = "pk"
+
+    def get_queryset(self):
+        return super().get_queryset().for_list(self.kwargs["pk"])
+
+
+class ShoppingListFieldSetMixin:
+    """
+    Honour ?fields= and ?expand= on reads, see ShoppingListFieldSet.
+    Writes always respond with the full representation.
+    """
+    def get_fieldset(self):
+        if self.request.method not in SAFE_METHODS:
+            return ShoppingListFieldSet()
+        if not hasattr(self, "_fieldset"):
+            self._fieldset = ShoppingListFieldSet.from_query_params(self.request.query_params)
+        return self._fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fieldset"] = self.get_fieldset()
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == "DELETE":
+            return queryset
+        return self.get_fieldset().apply_to_queryset(queryset, self.get_serializer_class())
+
+
+@view_query_budgets(get=(5, 4), post=10)
+class ListAddShoppingList(IdempotentCreateMixin, MemberListsMixin, ShoppingListFieldSetMixin, generics.ListCreateAPIView):
     queryset = ShoppingList.objects.all()
     serializer_class = ShoppingListSerializer
 
+    @cached_property
+    def new_shopping_list_id(self):
+        # Picked up front, the idempotent write is run on the list's shard.
+        return uuid.uuid4()
+
+    def get_write_db(self):
+        return shard_for(self.new_shopping_list_id)
+
     def perform_create(self, serializer):
-        return serializer.save(members=[self.request.user])
+        shopping_list = serializer.save(id=self.new_shopping_list_id)
+        shopping_list.add_members([self.request.user.pk])
+        return shopping_list
     
     def get_queryset(self):
-        return ShoppingList.objects.filter(members=self.request.user)
+        return super().get_queryset().filter(is_template=False)
 
 
-class ShoppingListDetail(generics.RetrieveUpdateDestroyAPIView):
+@view_query_budgets(get=6, put=9, patch=9, delete=7)
+class ShoppingListDetail(ShoppingListFieldSetMixin, ShoppingListShardMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = ShoppingList.objects.all()    
     serializer_class = ShoppingListSerializer
 
     permission_classes = [ShoppingListMembersOnly]
 
+    def perform_destroy(self, instance):
+        audit.record(AuditEvent.Action.LIST_DELETED, instance.pk, using=instance._state.db, name=instance.name)
+        instance.delete()
+
+
+@view_query_budgets(get=(5, 4))
+class ListShoppingListTemplate(MemberListsMixin, ShoppingListFieldSetMixin, generics.ListAPIView):
+    queryset = ShoppingList.objects.all()
+    serializer_class = ShoppingListSerializer
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_template=True)
+
+
+@view_query_budgets(post=13)
+class CloneShoppingList(IdempotentCreateMixin, ShoppingListShardMixin, generics.CreateAPIView):
+    """
+    Copy a list or template with its items, and optionally its members.
+    ``as_template`` saves the copy as a template, cloning a template gives
+    a regular list.
+    """
+    queryset = ShoppingList.objects.all()
+    serializer_class = CloneShoppingListSerializer
+    permission_classes = [ShoppingListMembersOnly]
+
+    def create(self, request, *args, **kwargs):
+        shopping_list = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        clone = clone_shopping_list(
+            shopping_list,
+            request.user,
+            name=serializer.validated_data.get("name"),
+            copy_members=serializer.validated_data["copy_members"],
+            is_template=serializer.validated_data["as_template"],
+        )
+        prefetch_related_objects([clone], "shopping_items", "members")
+        return Response(ShoppingListSerializer(clone).data, status=status.HTTP_201_CREATED)
+
+
+@view_query_budgets(post=6, delete=6)
+class ShoppingListMembers(ShoppingListShardMixin, generics.GenericAPIView):
+    """
+    Add (POST) or remove (DELETE) members by email, in bulk.
+
+    Emails are resolved with one IN query and the membership rows are written
+    with one statement, whatever the number of emails.
+    """
+    queryset = ShoppingList.objects.all()
+    serializer_class = MembersByEmailSerializer
+    permission_classes = [ShoppingListMembersOnly]
+
+    def resolve_emails(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        emails = serializer.validated_data["emails"]
+        users = list(CustomUser.objects.filter_by_emails(emails).only("id", "email"))
+        found = {user.email.lower() for user in users}
+        return users, sorted({email.lower() for email in emails} - found)
+
+    def post(self, request, *args, **kwargs):
+        shopping_list = self.get_object()
+        users, not_found = self.resolve_emails(request)
+        shopping_list.add_members([user.pk for user in users])
+        return Response({"members": UserSerializer(users, many=True).data, "not_found": not_found})
+
+    def delete(self, request, *args, **kwargs):
+        shopping_list = self.get_object()
+        users, not_found = self.resolve_emails(request)
+        shopping_list.remove_members([user.pk for user in users])
+        return Response({"members": UserSerializer(users, many=True).data, "not_found": not_found})
+
+
+@view_query_budgets(delete=5)
+class ShoppingListMemberDetail(ShoppingListShardMixin, generics.GenericAPIView):
+    queryset = ShoppingList.objects.all()
+    permission_classes = [ShoppingListMembersOnly]
+
+    def delete(self, request, *args, **kwargs):
+        self.get_object().remove_members([kwargs["member_pk"]])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
-class AddShoppingItem(generics.CreateAPIView):
+@view_query_budgets(post=5)
+class ExportShoppingList(ShoppingListShardMixin, generics.GenericAPIView):
+    """
+    Queue a background export of the list, poll the returned job for the result.
+    """
+    queryset = ShoppingList.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [ShoppingListMembersOnly]
+
+    def post(self, request, *args, **kwargs):
+        shopping_list = self.get_object()
+        job = enqueue(
+            "shopping_list.export",
+            {"shopping_list": str(shopping_list.pk)},
+            owner=request.user,
+            idempotency_key=request.headers.get("Idempotency-Key"),
+        )
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+@view_query_budgets(post=10)
+class AddShoppingItem(IdempotentCreateMixin, generics.CreateAPIView):
     queryset = ShoppingItem.objects.all()
     serializer_class = ShoppingItemSerializer
+    shopping_list_url_kwarg = "pk"
 
     permission_classes = [AllShoppingItemsShoppingListMembersOnly]
 
+    def perform_create(self, serializer):
+        item = serializer.save()
+        if getattr(item, "merged", False):
+            audit.record(
+                AuditEvent.Action.ITEM_UPDATED, item.shopping_list_id, item.pk, using=item._state.db,
+                name=item.name, changes={"quantity": item.quantity, "purchased": item.purchased},
+            )
+        else:
+            audit.record(
+                AuditEvent.Action.ITEM_ADDED, item.shopping_list_id, item.pk, using=item._state.db,
+                name=item.name, quantity=item.quantity, unit=item.unit,
+            )
+        ShoppingList.touch(self.kwargs["pk"])
+
+
+@view_query_budgets(post=20)
+class ShoppingItemBatch(generics.GenericAPIView):
+    """
+    Create or update many items with client-chosen ids in one request, e.g.
+    to replay edits made offline. Later rows win over earlier rows with the
+    same id. Ids of items in other lists are rejected.
+    """
+    serializer_class = ShoppingItemBatchSerializer
+    permission_classes = [AllShoppingItemsShoppingListMembersOnly]
+    shopping_list_url_kwarg = "pk"
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        rows = list({row["id"]: row for row in serializer.validated_data["items"]}.values())
+
+        existing = dict(
+            ShoppingItem.objects.for_list(kwargs["pk"])
+            .filter(pk__in=[row["id"] for row in rows])
+            .values_list("pk", "shopping_list_id")
+        )
+        foreign_ids = sorted(str(pk) for pk, shopping_list_id in existing.items() if str(shopping_list_id) != str(kwargs["pk"]))
+        if foreign_ids:
+            raise serializers.ValidationError({"items": [f"Items {', '.join(foreign_ids)} belong to another shopping list."]})
 
-class ShoppingItemDetail(generics.RetrieveUpdateDestroyAPIView):
+        on_conflict = serializer.validated_data["on_conflict"]
+        ShoppingItem.upsert(kwargs["pk"], rows, on_conflict=on_conflict)
+        using = shard_for(kwargs["pk"])
+        for row in rows:
+            if on_conflict == "ignore" and row["id"] in existing:
+                # Left alone by the upsert.
+                continue
+            audit.record(
+                AuditEvent.Action.ITEM_SYNCED, kwargs["pk"], row["id"], using=using,
+                name=row["name"], quantity=row.get("quantity"), purchased=row.get("purchased"),
+            )
+        ShoppingList.touch(kwargs["pk"])
+        return Response({"count": len(rows)})
+
+
+@view_query_budgets(get=4, put=6, patch=6, delete=6)
+class ShoppingItemDetail(ShoppingListShardMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = ShoppingItem.objects.all()
     serializer_class = ShoppingItemSerializer
     permission_classes = [ShoppingItemShoppingListMembersOnly]
     lookup_url_kwarg = "item_pk"
 
-    
+    def perform_update(self, serializer):
+        item = serializer.instance
+        changes = {
+            field: value for field, value in serializer.validated_data.items() if getattr(item, field) != value
+        }
+        serializer.save()
+        if changes:
+            action = AuditEvent.Action.ITEM_PURCHASED if changes.get("purchased") else AuditEvent.Action.ITEM_UPDATED
+            audit.record(action, item.shopping_list_id, item.pk, using=item._state.db, name=item.name, changes=changes)
+        ShoppingList.touch(item.shopping_list_id)
+
+    def perform_destroy(self, instance):
+        audit.record(
+            AuditEvent.Action.ITEM_DELETED, instance.shopping_list_id, instance.pk, using=instance._state.db,
+            name=instance.name,
+        )
+        instance.delete()
+        ShoppingList.touch(instance.shopping_list_id)
+
+
+@view_query_budgets(post=10)
+class MoveShoppingItem(ShoppingListShardMixin, generics.GenericAPIView):
+    """
+    Move an item after and/or before other items of its list. Only the moved
+    item is written, see shopping_list.ranking.
+    """
+    queryset = ShoppingItem.objects.all()
+    serializer_class = MoveShoppingItemSerializer
+    permission_classes = [ShoppingItemShoppingListMembersOnly]
+    lookup_url_kwarg = "item_pk"
+
+    def get_queryset(self):
+        return super().get_queryset().filter(shopping_list_id=self.kwargs["pk"])
+
+    def post(self, request, *args, **kwargs):
+        item = self.get_object()
+        serializer = self.get_serializer(data=request.data, context={**self.get_serializer_context(), "item": item})
+        serializer.is_valid(raise_exception=True)
+        try:
+            position = item.move(serializer.validated_data.get("after"), serializer.validated_data.get("before"))
+        except ValueError:
+            raise serializers.ValidationError({"non_field_errors": ["'after' must come before 'before' in the list."]})
+
+        if len(position) > settings.SHOPPING_ITEM_POSITION_REBALANCE_LENGTH:
+            # A job still waiting will see this position, one per list is enough.
+            enqueue_once("shopping_list.rebalance_positions", {"shopping_list": str(item.shopping_list_id)})
+        ShoppingList.touch(item.shopping_list_id)
+        return Response(ShoppingItemSerializer(item).data)
+
+
+@view_query_budgets(get=(3, 2))
+class ShoppingItemTotals(generics.ListAPIView):
+    """
+    Quantities of the user's items summed per normalized name and unit across
+    all their lists, computed by the database in one GROUP BY query.
+    ``?purchased=false`` counts only what is still to buy.
+    """
+    serializer_class = ShoppingItemTotalSerializer
+
+    def get_queryset(self):
+        items = ShoppingItem.objects.filter(shopping_list__is_template=False)
+        if not is_sharded():
+            items = items.filter(shopping_list__members=self.request.user)
+        purchased = self.request.query_params.get("purchased")
+        if purchased is not None:
+            items = items.filter(purchased=purchased in ("1", "true"))
+        return (
+            items.order_by("normalized_name", "unit")
+            .values("normalized_name", "unit")
+            .annotate(quantity=Sum("quantity"), items=Count("pk"), shopping_lists=Count("shopping_list", distinct=True))
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not is_sharded():
+            return super().list(request, *args, **kwargs)
+        totals = {}
+        queryset = self.get_queryset()
+        rows = fan_out_for_member(
+            request.user, lambda alias, ids: list(queryset.using(alias).filter(shopping_list_id__in=ids))
+        )
+        for row in itertools.chain.from_iterable(rows):
+            key = (row["normalized_name"], row["unit"])
+            if key in totals:
+                for field in ("quantity", "items", "shopping_lists"):
+                    totals[key][field] += row[field]
+            else:
+                totals[key] = row
+        return Response(self.get_serializer([totals[key] for key in sorted(totals)], many=True).data)
+
+
+class ShoppingListHistoryPagination(CursorPagination):
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+@view_query_budgets(get=4)
+class ShoppingListHistory(generics.ListAPIView):
+    """
+    The audit trail of a list, newest first, paginated with an opaque
+    cursor so pages stay stable while events are added.
+    """
+    serializer_class = AuditEventSerializer
+    permission_classes = [AllShoppingItemsShoppingListMembersOnly]
+    pagination_class = ShoppingListHistoryPagination
+    shopping_list_url_kwarg = "pk"
+
+    def get_queryset(self):
+        return AuditEvent.objects.filter(shopping_list_id=self.kwargs["pk"]).select_related("actor")
+
+
+@view_query_budgets(get=(3, 1))
+class ListArchivedShoppingList(MemberListsMixin, generics.ListAPIView):
+    queryset = ArchivedShoppingList.objects.order_by("-archived_at")
+    serializer_class = ArchivedShoppingListSerializer
+    membership = ArchivedShoppingListMembership
+
+    def get_member_lists(self):
+        archived_lists = super().get_member_lists()
+        archived_lists.sort(key=lambda archived_list: archived_list.archived_at, reverse=True)
+        return archived_lists
+
+
+class RestoreArchivedShoppingList(ShoppingListShardMixin, generics.GenericAPIView):
+    queryset = ArchivedShoppingList.objects.all()
+    serializer_class = ShoppingListSerializer
+    permission_classes = [ShoppingListMembersOnly]
+    # The list is archived, there is no live list budget to spend.
+    shopping_list_url_kwarg = None
+
+    def post(self, request, *args, **kwargs):
+        shopping_list = restore_shopping_list(self.get_object())
+        serializer = self.get_serializer(shopping_list)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ShoppingListConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shopping_list'
+
+    def ready(self):
+        from shopping_list import signals  # noqa: F401
@@ -0,0 +1,124 @@
+from datetime import timedelta
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from shopping_list.models import ArchivedShoppingItem, ArchivedShoppingList, ShoppingItem, ShoppingList
+from shopping_list.sharding import shard_atomic
+
+
+LIST_FIELDS = ("id", "name", "created_at", "updated_at")
+ITEM_FIELDS = (
+    "id", "name", "normalized_name", "quantity", "unit", "purchased", "purchased_at", "shopping_list_id", "position",
+    "merge_key",
+)
+
+LIST_MEMBERS = ShoppingList.members.through
+ARCHIVED_LIST_MEMBERS = ArchivedShoppingList.members.through
+
+
+def _copy_rows(queryset, target_model, field_map, batch_size, using):
+    """
+    Stream ``field_map`` columns out of ``queryset`` into ``target_model``
+    on the ``using`` database with bulk inserts of ``batch_size`` rows.
+    """
+    source_fields, target_fields = zip(*field_map)
+    rows = queryset.values_list(*source_fields).iterator(chunk_size=batch_size)
+    batch = []
+    for row in rows:
+        batch.append(target_model(**dict(zip(target_fields, row))))
+        if len(batch) == batch_size:
+            target_model.objects.using(using).bulk_create(batch)
+            batch = []
+    if batch:
+        target_model.objects.using(using).bulk_create(batch)
+
+
+def archivable_shopping_lists(older_than_days=90, completed_older_than_days=7):
+    """
+    Lists untouched for ``older_than_days``, plus completed lists (every item
+    purchased) untouched for ``completed_older_than_days``. Templates are
+    never archived.
+    """
+    now = timezone.now()
+    items = ShoppingItem.objects.filter(shopping_list=OuterRef("pk"))
+    completed = Exists(items) & ~Exists(items.filter(purchased=False))
+    return ShoppingList.objects.filter(is_template=False).filter(
+        Q(updated_at__lt=now - timedelta(days=older_than_days))
+        | Q(completed, updated_at__lt=now - timedelta(days=completed_older_than_days))
+    )
+
+
+def archive_shopping_lists(queryset, batch_size=500):
+    """
+    Move the lists in ``queryset`` with their items and memberships into the
+    archive tables, one transaction per batch. Returns the number of lists moved.
+
+    Lists and items are archived on the shard ``queryset`` reads from, call
+    once per shard. Memberships stay on the default database.
+    """
+    using = queryset.db
+    archived = 0
+    while True:
+        ids = list(queryset.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return archived
+
+        with shard_atomic(using):
+            _copy_rows(
+                ShoppingList.objects.using(using).filter(pk__in=ids),
+                ArchivedShoppingList,
+                [(field, field) for field in LIST_FIELDS],
+                batch_size,
+                using,
+            )
+            _copy_rows(
+                ShoppingItem.objects.using(using).filter(shopping_list_id__in=ids),
+                ArchivedShoppingItem,
+                [(field, field) for field in ITEM_FIELDS],
+                batch_size,
+                using,
+            )
+            _copy_rows(
+                LIST_MEMBERS.objects.filter(shoppinglist_id__in=ids),
+                ARCHIVED_LIST_MEMBERS,
+                [("shoppinglist_id", "archivedshoppinglist_id"), ("customuser_id", "customuser_id")],
+                batch_size,
+                DEFAULT_DB_ALIAS,
+            )
+            ShoppingList.objects.using(using).filter(pk__in=ids).delete()
+
+        archived += len(ids)
+
+
+def restore_shopping_list(archived_list, batch_size=500):
+    """
+    Move an archived list back into the hot tables and return it.
+    """
+    using = archived_list._state.db or DEFAULT_DB_ALIAS
+    with shard_atomic(using):
+        _copy_rows(
+            ArchivedShoppingList.objects.using(using).filter(pk=archived_list.pk),
+            ShoppingList,
+            [(field, field) for field in LIST_FIELDS],
+            batch_size,
+            using,
+        )
+        _copy_rows(
+            ArchivedShoppingItem.objects.using(using).filter(shopping_list_id=archived_list.pk),
+            ShoppingItem,
+            [(field, field) for field in ITEM_FIELDS],
+            batch_size,
+            using,
+        )
+        _copy_rows(
+            ARCHIVED_LIST_MEMBERS.objects.filter(archivedshoppinglist_id=archived_list.pk),
+            LIST_MEMBERS,
+            [("archivedshoppinglist_id", "shoppinglist_id"), ("customuser_id", "customuser_id")],
+            batch_size,
+            DEFAULT_DB_ALIAS,
+        )
+        pk = archived_list.pk
+        archived_list.delete()
+    return ShoppingList.objects.using(using).get(pk=pk)
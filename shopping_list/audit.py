@@ -0,0 +1,188 @@
+"""
+Audit trail of list changes.
+
+``record()`` queues an event once the transaction that made the change
+commits, events of rolled back changes are dropped. During a request
+AuditLogMiddleware collects them and writes them with one bulk INSERT after
+the response is built. Outside a request, e.g. in jobs, an event is written
+as soon as it is committed.
+
+On PostgreSQL the table is partitioned by month, ``rotate_audit_log()``
+creates the coming months and drops the expired ones. Rows of a month that
+had no partition yet sit in the default partition until their month is
+created. Other databases keep a plain table and expired rows are deleted in
+batches. The workers run the rotation daily, see JOBS_SCHEDULE.
+"""
+
+import contextvars
+import logging
+import re
+from datetime import datetime
+from functools import partial
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from shopping_list.models import AuditEvent
+
+
+logger = logging.getLogger(__name__)
+
+_events = contextvars.ContextVar("audit_events", default=None)
+
+PARTITION_RE = re.compile(r"_y(\d{4})m(\d{2})$")
+
+
+def record(action, shopping_list_id, item_id=None, using=DEFAULT_DB_ALIAS, **data):
+    """
+    Log ``action`` on a list once the current transaction on ``using``, the
+    database holding the changed rows, commits.
+    """
+    event = AuditEvent(action=action, shopping_list_id=shopping_list_id, item_id=item_id, data=data)
+    transaction.on_commit(partial(_committed, event), using=using)
+
+
+def _committed(event):
+    events = _events.get()
+    if events is None:
+        AuditEvent.objects.bulk_create([event])
+    else:
+        events.append(event)
+
+
+class AuditLogMiddleware:
+    """
+    Write the events of a request in one INSERT, attributed to the
+    authenticated user. Place it after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        events = []
+        token = _events.set(events)
+        try:
+            return self.get_response(request)
+        finally:
+            _events.reset(token)
+            if events:
+                self.flush(request, events)
+
+    def flush(self, request, events):
+        # DRF authenticates in the view and sets the user on the request.
+        user = getattr(request, "user", None)
+        actor_id = user.pk if user is not None and user.is_authenticated else None
+        for event in events:
+            event.actor_id = actor_id
+        try:
+            AuditEvent.objects.bulk_create(events)
+        except Exception:
+            # The changes are committed, failing the response would only
+            # make the client retry them.
+            logger.exception("Could not write %d audit events.", len(events))
+
+
+def _month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month):
+    return f"{AuditEvent._meta.db_table}_y{month.year}m{month.month:02d}"
+
+
+def _partitions(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+            "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+            "WHERE parent.relname = %s",
+            [AuditEvent._meta.db_table],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def default_partition_name():
+    return f"{AuditEvent._meta.db_table}_default"
+
+
+def create_partitions(connection, first_month, count):
+    """
+    Create the monthly partitions from ``first_month`` on, if missing.
+    Returns the names of the partitions created.
+
+    Rows of the month already in the default partition would make a plain
+    CREATE TABLE ... PARTITION OF fail, so each partition is created on its
+    own, filled with them and then attached.
+    """
+    quote = connection.ops.quote_name
+    table = quote(AuditEvent._meta.db_table)
+    existing = set(_partitions(connection))
+    created = []
+    for offset in range(count):
+        month = _add_months(first_month, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        bounds = [month, _add_months(month, 1)]
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f"CREATE TABLE {quote(name)} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+            if default_partition_name() in existing:
+                cursor.execute(
+                    f"WITH moved AS (DELETE FROM {quote(default_partition_name())} "
+                    f"WHERE {quote('created_at')} >= %s AND {quote('created_at')} < %s RETURNING *) "
+                    f"INSERT INTO {quote(name)} SELECT * FROM moved",
+                    bounds,
+                )
+            cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {quote(name)} FOR VALUES FROM (%s) TO (%s)", bounds)
+        created.append(name)
+    return created
+
+
+def rotate_audit_log(keep_months=12, months_ahead=2, batch_size=5000, using=DEFAULT_DB_ALIAS):
+    """
+    Drop events older than ``keep_months`` whole months and, on PostgreSQL,
+    create the partitions for the next ``months_ahead`` months. Expired rows
+    left in the default partition are deleted. Months are UTC. Returns what
+    was done.
+    """
+    connection = connections[using]
+    this_month = _month_start(timezone.now())
+    cutoff = _add_months(this_month, -keep_months)
+
+    if connection.vendor != "postgresql":
+        deleted = 0
+        events = AuditEvent.objects.using(using)
+        while True:
+            ids = list(events.filter(created_at__lt=cutoff).values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return {"created": [], "dropped": [], "deleted": deleted}
+            deleted += events.filter(pk__in=ids).delete()[0]
+
+    created = create_partitions(connection, this_month, months_ahead + 1)
+    dropped = []
+    deleted = 0
+    with connection.cursor() as cursor:
+        if default_partition_name() in _partitions(connection):
+            cursor.execute(
+                f"DELETE FROM {connection.ops.quote_name(default_partition_name())} "
+                f"WHERE {connection.ops.quote_name('created_at')} < %s",
+                [cutoff],
+            )
+            deleted = cursor.rowcount
+        for name in sorted(_partitions(connection)):
+            match = PARTITION_RE.search(name)
+            if match is None:
+                continue
+            month = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=cutoff.tzinfo)
+            if _add_months(month, 1) <= cutoff:
+                # Dropping a partition is a catalog change, no rows are scanned.
+                cursor.execute(f"DROP TABLE {connection.ops.quote_name(name)}")
+                dropped.append(name)
+    return {"created": created, "dropped": dropped, "deleted": deleted}
@@ -0,0 +1,101 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from shopping_list.models import ShoppingItem, ShoppingList
+from shopping_list.sharding import new_id_on, shard_atomic
+
+
+# Copied as they are, purchased is reset and ids are new.
+ITEM_COPY_FIELDS = ("name", "normalized_name", "quantity", "unit", "position", "merge_key")
+
+LIST_MEMBERS = ShoppingList.members.through
+
+
+def _uuid_sql(connection):
+    """
+    SQL generating a UUID in the format Django stores for the backend, or
+    None when the backend has no such function.
+    """
+    if connection.vendor == "sqlite":
+        return "lower(hex(randomblob(16)))"
+    if connection.vendor == "postgresql":
+        return "gen_random_uuid()"
+    return None
+
+
+def _column(connection, model, field_name):
+    return connection.ops.quote_name(model._meta.get_field(field_name).column)
+
+
+def _copy_items(source_id, target_id, using):
+    connection = connections[using]
+    uuid_sql = _uuid_sql(connection)
+    if uuid_sql is None:
+        rows = ShoppingItem.objects.using(using).filter(shopping_list_id=source_id).values(*ITEM_COPY_FIELDS)
+        ShoppingItem.objects.using(using).bulk_create(
+            [ShoppingItem(shopping_list_id=target_id, purchased=False, **row) for row in rows]
+        )
+        return
+
+    pk_field = ShoppingList._meta.pk
+    copied = ", ".join(_column(connection, ShoppingItem, field) for field in ITEM_COPY_FIELDS)
+    list_column = _column(connection, ShoppingItem, "shopping_list")
+    id_column = _column(connection, ShoppingItem, "id")
+    purchased_column = _column(connection, ShoppingItem, "purchased")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {connection.ops.quote_name(ShoppingItem._meta.db_table)} "
+            f"({id_column}, {list_column}, {purchased_column}, {copied}) "
+            f"SELECT {uuid_sql}, %s, %s, {copied} "
+            f"FROM {connection.ops.quote_name(ShoppingItem._meta.db_table)} WHERE {list_column} = %s",
+            [
+                pk_field.get_db_prep_value(target_id, connection),
+                False,
+                pk_field.get_db_prep_value(source_id, connection),
+            ],
+        )
+
+
+def _copy_members(source_id, clone):
+    """
+    Copy the members of the source list to ``clone`` and send m2m_changed
+    for them like ShoppingList.add_members does.
+    """
+    # Memberships are on the default database whatever shard holds the lists.
+    connection = connections[DEFAULT_DB_ALIAS]
+    if not connection.features.can_return_rows_from_bulk_insert:
+        user_ids = LIST_MEMBERS.objects.filter(shoppinglist_id=source_id).values_list("customuser_id", flat=True)
+        clone.add_members(user_ids)
+        return
+
+    pk_field = ShoppingList._meta.pk
+    table = connection.ops.quote_name(LIST_MEMBERS._meta.db_table)
+    list_column = _column(connection, LIST_MEMBERS, "shoppinglist")
+    user_column = _column(connection, LIST_MEMBERS, "customuser")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({list_column}, {user_column}) "
+            f"SELECT %s, {user_column} FROM {table} WHERE {list_column} = %s RETURNING {user_column}",
+            [pk_field.get_db_prep_value(clone.pk, connection), pk_field.get_db_prep_value(source_id, connection)],
+        )
+        clone._members_changed("post_add", {row[0] for row in cursor.fetchall()})
+
+
+def clone_shopping_list(shopping_list, user, name=None, copy_members=False, is_template=False):
+    """
+    Copy a list (or template) with all its items in a constant number of
+    queries, each copy is a single INSERT ... SELECT. Items of the copy are
+    not purchased. ``user`` is always a member, the other members are copied
+    with ``copy_members``.
+
+    The copy gets an id on the shard of the source, so the items are copied
+    within one database.
+    """
+    using = shopping_list._state.db or DEFAULT_DB_ALIAS
+    with shard_atomic(using):
+        clone = ShoppingList(id=new_id_on(using), name=name or shopping_list.name, is_template=is_template)
+        clone.save(using=using, force_insert=True)
+        _copy_items(shopping_list.pk, clone.pk, using)
+        if copy_members:
+            _copy_members(shopping_list.pk, clone)
+        clone.add_members([user.pk])
+    return clone
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from shopping_list.archive import archivable_shopping_lists, archive_shopping_lists
+from shopping_list.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    help = "Move old and completed shopping lists with their items into the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=90, help="Archive lists untouched for this long.")
+        parser.add_argument(
+            "--completed-older-than-days", type=int, default=7,
+            help="Archive lists with every item purchased untouched for this long.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many lists would be archived.")
+
+    def handle(self, *args, **options):
+        queryset = archivable_shopping_lists(options["older_than_days"], options["completed_older_than_days"])
+
+        if options["dry_run"]:
+            count = sum(queryset.using(alias).count() for alias in shard_aliases())
+            self.stdout.write(f"{count} shopping lists would be archived.")
+            return
+
+        archived = sum(
+            archive_shopping_lists(queryset.using(alias), batch_size=options["batch_size"]) for alias in shard_aliases()
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} shopping lists."))
@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.profiling import profiling_dir, read_config, write_config
+
+
+class Command(BaseCommand):
+    help = "Switch sampled request profiling on or off for all workers, or show its state."
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["on", "off", "status"])
+        parser.add_argument("--sample-rate", type=float, default=0.01, help="Fraction of matching requests to profile.")
+        parser.add_argument("--url-name", action="append", dest="url_names", default=[], help="Only profile this URL name, repeatable.")
+        parser.add_argument("--user-id", action="append", dest="user_ids", type=int, default=[], help="Only profile this user, repeatable.")
+        parser.add_argument("--min-duration-ms", type=float, default=0, help="Only keep profiles of requests at least this slow.")
+
+    def handle(self, *args, **options):
+        if options["action"] == "on":
+            write_config({
+                "enabled": True,
+                "sample_rate": options["sample_rate"],
+                "url_names": options["url_names"],
+                "user_ids": options["user_ids"],
+                "min_duration_ms": options["min_duration_ms"],
+            })
+        elif options["action"] == "off":
+            write_config({**read_config(), "enabled": False})
+
+        self.stdout.write(json.dumps(read_config(), indent=2))
+        self.stdout.write(f"Profiles are written to {profiling_dir()}")
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from shopping_list.audit import rotate_audit_log
+
+
+class Command(BaseCommand):
+    help = "Drop list history past its retention and create the coming monthly partitions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-months", type=int, default=settings.AUDIT_LOG_RETENTION_MONTHS)
+        parser.add_argument("--months-ahead", type=int, default=settings.AUDIT_LOG_PARTITIONS_AHEAD)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        result = rotate_audit_log(options["keep_months"], options["months_ahead"], batch_size=options["batch_size"])
+        for name in result["created"]:
+            self.stdout.write(f"Created partition {name}.")
+        for name in result["dropped"]:
+            self.stdout.write(f"Dropped partition {name}.")
+        self.stdout.write(self.style.SUCCESS(f"Deleted {result['deleted']} expired audit events."))
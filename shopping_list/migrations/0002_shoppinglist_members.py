@@ -3,6 +3,8 @@
 from django.conf import settings
 from django.db import migrations, models
 
+from shopping_list.sharding import DefaultDatabaseOnly
+
 
 class Migration(migrations.Migration):
 
@@ -12,9 +14,12 @@ class Migration(migrations.Migration):
     ]
 
     operations = [
-        migrations.AddField(
-            model_name='shoppinglist',
-            name='members',
-            field=models.ManyToManyField(to=settings.AUTH_USER_MODEL),
+        # The member table references the users, it isn't created on shards.
+        DefaultDatabaseOnly(
+            migrations.AddField(
+                model_name='shoppinglist',
+                name='members',
+                field=models.ManyToManyField(to=settings.AUTH_USER_MODEL),
+            ),
         ),
     ]
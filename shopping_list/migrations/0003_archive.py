@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+from shopping_list.sharding import DefaultDatabaseOnly
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('shopping_list', '0002_shoppinglist_members'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shoppinglist',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='shoppinglist',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='ArchivedShoppingList',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        # The member table references the users, it isn't created on shards.
+        DefaultDatabaseOnly(
+            migrations.AddField(
+                model_name='archivedshoppinglist',
+                name='members',
+                field=models.ManyToManyField(related_name='archived_shopping_lists', to=settings.AUTH_USER_MODEL),
+            ),
+        ),
+        migrations.CreateModel(
+            name='ArchivedShoppingItem',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('purchased', models.BooleanField()),
+                ('shopping_list', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_items', to='shopping_list.archivedshoppinglist')),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopping_list', '0003_archive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='shoppingitem',
+            name='name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='shoppingitem',
+            name='purchased',
+            field=models.BooleanField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='shoppinglist',
+            name='name',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:36
+
+from django.db import migrations, models
+
+from shopping_list.ranking import evenly_spaced_keys
+
+
+def backfill_positions(apps, schema_editor):
+    # Existing items had no order, number them by name within each list.
+    for model_name in ("ShoppingItem", "ArchivedShoppingItem"):
+        Item = apps.get_model("shopping_list", model_name)
+        list_ids = Item.objects.order_by().values_list("shopping_list_id", flat=True).distinct()
+        for list_id in list(list_ids):
+            items = list(Item.objects.filter(shopping_list_id=list_id).order_by("name", "pk").only("pk"))
+            for item, position in zip(items, evenly_spaced_keys(len(items))):
+                item.position = position
+            Item.objects.bulk_update(items, ["position"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopping_list', '0004_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='shoppingitem',
+            options={'ordering': ('shopping_list', 'position')},
+        ),
+        migrations.AddField(
+            model_name='archivedshoppingitem',
+            name='position',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='shoppingitem',
+            name='position',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='shoppingitem',
+            index=models.Index(fields=['shopping_list', 'position'], name='shopping_item_position_idx'),
+        ),
+        migrations.RunPython(backfill_positions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:37
+
+import django.core.validators
+from django.db import migrations, models
+
+
+def backfill_normalized_names(apps, schema_editor):
+    for model_name in ("ShoppingItem", "ArchivedShoppingItem"):
+        Item = apps.get_model("shopping_list", model_name)
+        items = list(Item.objects.only("pk", "name"))
+        for item in items:
+            item.normalized_name = " ".join(item.name.split()).casefold()
+        Item.objects.bulk_update(items, ["normalized_name"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopping_list', '0005_item_positions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedshoppingitem',
+            name='merge_key',
+            field=models.CharField(blank=True, max_length=128, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedshoppingitem',
+            name='normalized_name',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='archivedshoppingitem',
+            name='quantity',
+            field=models.DecimalField(decimal_places=3, default=1, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='archivedshoppingitem',
+            name='unit',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='shoppingitem',
+            name='merge_key',
+            field=models.CharField(blank=True, editable=False, max_length=128, null=True),
+        ),
+        migrations.AddField(
+            model_name='shoppingitem',
+            name='normalized_name',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='shoppingitem',
+            name='quantity',
+            field=models.DecimalField(decimal_places=3, default=1, max_digits=10, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.AddField(
+            model_name='shoppingitem',
+            name='unit',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingitem',
+            constraint=models.UniqueConstraint(fields=('shopping_list', 'merge_key'), name='shopping_item_merge_key_unique'),
+        ),
+        migrations.RunPython(backfill_normalized_names, migrations.RunPython.noop),
+    ]
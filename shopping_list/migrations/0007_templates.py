@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopping_list', '0006_item_quantities'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shoppinglist',
+            name='is_template',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:49
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, migrations, models
+import django.db.models.deletion
+
+
+def drop_members_from_shards(apps, schema_editor):
+    # Shards migrated before 0002 and 0003 kept the member tables on the
+    # default database have them too, they only belong there.
+    if schema_editor.connection.alias == DEFAULT_DB_ALIAS:
+        return
+    tables = schema_editor.connection.introspection.table_names()
+    for name in ("ShoppingListMembership", "ArchivedShoppingListMembership"):
+        model = apps.get_model("shopping_list", name)
+        if model._meta.db_table in tables:
+            schema_editor.delete_model(model)
+
+
+class Migration(migrations.Migration):
+    """
+    Turn the auto-created member tables into explicit models on the same
+    tables, then drop their foreign key constraint to the lists, which may
+    live on another database, and drop the member tables from the shards.
+    """
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('shopping_list', '0008_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ShoppingListMembership',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('customuser', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                        ('shoppinglist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='shopping_list.shoppinglist')),
+                    ],
+                    options={
+                        'db_table': 'shopping_list_shoppinglist_members',
+                        'unique_together': {('shoppinglist', 'customuser')},
+                    },
+                ),
+                migrations.CreateModel(
+                    name='ArchivedShoppingListMembership',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('archivedshoppinglist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='shopping_list.archivedshoppinglist')),
+                        ('customuser', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'db_table': 'shopping_list_archivedshoppinglist_members',
+                        'unique_together': {('archivedshoppinglist', 'customuser')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='archivedshoppinglist',
+                    name='members',
+                    field=models.ManyToManyField(related_name='archived_shopping_lists', through='shopping_list.ArchivedShoppingListMembership', to=settings.AUTH_USER_MODEL),
+                ),
+                migrations.AlterField(
+                    model_name='shoppinglist',
+                    name='members',
+                    field=models.ManyToManyField(through='shopping_list.ShoppingListMembership', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='shoppinglistmembership',
+            name='shoppinglist',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to='shopping_list.shoppinglist'),
+        ),
+        migrations.AlterField(
+            model_name='archivedshoppinglistmembership',
+            name='archivedshoppinglist',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to='shopping_list.archivedshoppinglist'),
+        ),
+        # The hint lets the router run this on the shards, see
+        # ShoppingListShardRouter.allow_migrate.
+        migrations.RunPython(
+            drop_members_from_shards, migrations.RunPython.noop, hints={"model_name": "shoppinglist"}
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:57
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def create_audit_table(apps, schema_editor):
+    """
+    On PostgreSQL a table partitioned by month of created_at, with a default
+    partition and the partitions up to two months ahead; elsewhere a plain
+    table. Later months are added by shopping_list.audit.rotate_audit_log.
+    """
+    AuditEvent = apps.get_model("shopping_list", "AuditEvent")
+    if schema_editor.connection.vendor != "postgresql":
+        schema_editor.create_model(AuditEvent)
+        return
+
+    table = AuditEvent._meta.db_table
+    # The partition key has to be part of the primary key.
+    schema_editor.execute(
+        f'CREATE TABLE "{table}" ('
+        '"id" bigint GENERATED BY DEFAULT AS IDENTITY, '
+        '"created_at" timestamp with time zone NOT NULL, '
+        '"shopping_list_id" uuid NOT NULL, '
+        '"item_id" uuid NULL, '
+        '"actor_id" bigint NULL, '
+        '"action" varchar(20) NOT NULL, '
+        '"data" jsonb NOT NULL, '
+        'PRIMARY KEY ("id", "created_at")'
+        ') PARTITION BY RANGE ("created_at")'
+    )
+    schema_editor.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+    schema_editor.execute(f'CREATE INDEX "audit_event_list_idx" ON "{table}" ("shopping_list_id", "created_at")')
+    schema_editor.execute(f'CREATE INDEX "{table}_actor_id_idx" ON "{table}" ("actor_id")')
+
+    month = django.utils.timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(3):
+        next_month = month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+        schema_editor.execute(
+            f'CREATE TABLE "{table}_y{month.year}m{month.month:02d}" PARTITION OF "{table}" FOR VALUES FROM (%s) TO (%s)',
+            [month, next_month],
+        )
+        month = next_month
+
+
+def drop_audit_table(apps, schema_editor):
+    schema_editor.delete_model(apps.get_model("shopping_list", "AuditEvent"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('shopping_list', '0009_membership_directory'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='AuditEvent',
+                    fields=[
+                        ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                        ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                        ('shopping_list_id', models.UUIDField()),
+                        ('item_id', models.UUIDField(blank=True, null=True)),
+                        ('action', models.CharField(choices=[('item_added', 'Item Added'), ('item_updated', 'Item Updated'), ('item_purchased', 'Item Purchased'), ('item_deleted', 'Item Deleted'), ('item_synced', 'Item Synced'), ('member_added', 'Member Added'), ('member_removed', 'Member Removed'), ('list_deleted', 'List Deleted')], max_length=20)),
+                        ('data', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                        ('actor', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'indexes': [models.Index(fields=['shopping_list_id', 'created_at'], name='audit_event_list_idx')],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_audit_table, drop_audit_table),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopping_list', '0010_audit_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedshoppingitem',
+            name='purchased_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='shoppingitem',
+            name='purchased_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
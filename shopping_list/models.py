@@ -1,23 +1,561 @@
 import uuid
+from decimal import Decimal
 
-from django.db import models
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import MinValueValidator
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.models.deletion import Collector
+from django.db.models.signals import m2m_changed
 from django.conf import settings
+from django.utils import timezone
+
+from shopping_list.ranking import evenly_spaced_keys, key_after, key_between, keys_after
+from shopping_list.sharding import ShardedQuerySet, shard_atomic, shard_for
+
+
+def delete_items_in_batches(items):
+    """
+    Without receivers of item deletions the cascade removes the items with
+    a single DELETE, none are loaded. With receivers, which need the rows,
+    delete them SHOPPING_LIST_DELETE_BATCH_SIZE at a time first rather than
+    all loaded at once by the cascade.
+    """
+    if Collector(using=items.db).can_fast_delete(items):
+        return
+    while True:
+        ids = list(items.values_list("pk", flat=True)[:settings.SHOPPING_LIST_DELETE_BATCH_SIZE])
+        if not ids:
+            return
+        items.model.objects.using(items.db).filter(pk__in=ids).delete()
+
+
+class ShoppingListQuerySet(ShardedQuerySet):
+
+    def delete(self):
+        # Memberships live with the users on the default database, they are
+        # not reached by the cascade. They go once the lists are gone, a
+        # failed delete must not leave lists nobody can reach.
+        ids = list(self.values_list("pk", flat=True))
+        membership = self.model.members.through
+        items = self.model.shopping_items.rel.related_model.objects.using(self.db)
+        with shard_atomic(self.db):
+            delete_items_in_batches(items.filter(shopping_list_id__in=ids))
+            deleted = super().delete()
+            membership.objects.filter(**{f"{membership.list_field}_id__in": ids}).delete()
+        return deleted
 
 
 class ShoppingList(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    name = models.CharField(max_length=200)
-    members = models.ManyToManyField(settings.AUTH_USER_MODEL)
+    name = models.CharField(max_length=200, db_index=True)
+    members = models.ManyToManyField(settings.AUTH_USER_MODEL, through="ShoppingListMembership")
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Templates are cloned into new lists, they are not shown or archived with regular lists.
+    is_template = models.BooleanField(default=False)
+
+    objects = ShoppingListQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
+    def delete(self, *args, **kwargs):
+        """
+        Delete the list with its items, see delete_items_in_batches, and
+        then its memberships.
+        """
+        pk = self.pk
+        items = ShoppingItem.objects.for_list(pk).filter(shopping_list_id=pk)
+        with shard_atomic(items.db):
+            delete_items_in_batches(items)
+            deleted = super().delete(*args, **kwargs)
+            ShoppingListMembership.objects.filter(shoppinglist_id=pk).delete()
+        return deleted
+
+    @classmethod
+    def touch(cls, pk):
+        """
+        Mark the list as active without loading it, used when its items change.
+        """
+        cls.objects.for_list(pk).filter(pk=pk).update(updated_at=timezone.now())
+
+    @staticmethod
+    def is_member(shopping_list_id, user):
+        """
+        Membership check on the through table alone, without loading users.
+        """
+        return ShoppingListMembership.objects.filter(
+            shoppinglist_id=shopping_list_id, customuser_id=user.pk
+        ).exists()
+
+    def has_member(self, user):
+        return ShoppingList.is_member(self.pk, user)
+
+    def add_members(self, user_ids):
+        """
+        Add members with one INSERT, skipping users that already are members.
+
+        Unlike ``members.add()`` this does not read the existing rows first
+        where the database can return the inserted rows. m2m_changed is
+        still sent, with the users actually added, so per-list caches can
+        be invalidated.
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+        connection = connections[ShoppingListMembership.objects.db]
+        if not connection.features.can_return_rows_from_bulk_insert:
+            user_ids -= set(self._memberships(user_ids).values_list("customuser_id", flat=True))
+            ShoppingListMembership.objects.bulk_create(
+                [ShoppingListMembership(shoppinglist_id=self.pk, customuser_id=user_id) for user_id in user_ids],
+                ignore_conflicts=True,
+            )
+            self._members_changed("post_add", user_ids)
+            return
+        table, list_column, user_column = self._membership_columns(connection)
+        rows = ", ".join(["(%s, %s)"] * len(user_ids))
+        params = [value for user_id in user_ids for value in (self._membership_list_value(connection), user_id)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({list_column}, {user_column}) VALUES {rows} "
+                f"ON CONFLICT DO NOTHING RETURNING {user_column}",
+                params,
+            )
+            self._members_changed("post_add", {row[0] for row in cursor.fetchall()})
+
+    def remove_members(self, user_ids):
+        """
+        Remove members with one DELETE, m2m_changed is sent with the users
+        that actually were members.
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+        connection = connections[ShoppingListMembership.objects.db]
+        if not connection.features.can_return_rows_from_bulk_insert:
+            user_ids = set(self._memberships(user_ids).values_list("customuser_id", flat=True))
+            self._memberships(user_ids).delete()
+            self._members_changed("post_remove", user_ids)
+            return
+        table, list_column, user_column = self._membership_columns(connection)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE {list_column} = %s "
+                f"AND {user_column} IN ({', '.join(['%s'] * len(user_ids))}) RETURNING {user_column}",
+                [self._membership_list_value(connection), *user_ids],
+            )
+            self._members_changed("post_remove", {row[0] for row in cursor.fetchall()})
+
+    def _memberships(self, user_ids):
+        return ShoppingListMembership.objects.filter(shoppinglist_id=self.pk, customuser_id__in=user_ids)
+
+    @staticmethod
+    def _membership_columns(connection):
+        quote = connection.ops.quote_name
+        opts = ShoppingListMembership._meta
+        return (
+            quote(opts.db_table),
+            quote(opts.get_field("shoppinglist").column),
+            quote(opts.get_field("customuser").column),
+        )
+
+    def _membership_list_value(self, connection):
+        return ShoppingListMembership._meta.get_field("shoppinglist").get_db_prep_save(self.pk, connection)
+
+    def _members_changed(self, action, user_ids):
+        """
+        Send m2m_changed for the users that were added or removed, if any.
+        """
+        if not user_ids:
+            return
+        m2m_changed.send(
+            sender=ShoppingList.members.through,
+            instance=self,
+            action=action,
+            reverse=False,
+            model=get_user_model(),
+            pk_set=user_ids,
+            using=ShoppingListMembership.objects.db,
+        )
+
+
+class ShoppingListMembership(models.Model):
+    """
+    Membership of a user in a list. Stored on the default database with the
+    users whatever shard holds the list, so it doubles as the directory of a
+    user's lists, see shopping_list.sharding.
+    """
+    list_field = "shoppinglist"
+
+    shoppinglist = models.ForeignKey(ShoppingList, on_delete=models.DO_NOTHING, db_constraint=False)
+    customuser = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "shopping_list_shoppinglist_members"
+        unique_together = [("shoppinglist", "customuser")]
+
+
+def normalize_item_name(name):
+    return " ".join(name.split()).casefold()
+
+
+def item_merge_key(name, unit):
+    return f"{normalize_item_name(name)}|{normalize_item_name(unit)}"
+
 
 class ShoppingItem(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    name = models.CharField(max_length=100, db_index=True)
+    normalized_name = models.CharField(max_length=100, default="", editable=False)
+    quantity = models.DecimalField(max_digits=10, decimal_places=3, default=1, validators=[MinValueValidator(0)])
+    unit = models.CharField(max_length=20, blank=True, default="")
+    purchased = models.BooleanField(db_index=True)
+    # When the item was last marked purchased, null while it is not.
+    purchased_at = models.DateTimeField(null=True, blank=True, editable=False)
+    shopping_list = models.ForeignKey(ShoppingList, on_delete=models.CASCADE, related_name="shopping_items")
+    # Fractional index within the list, see shopping_list.ranking.
+    position = models.CharField(max_length=64, default="")
+    # Set on items added with add_or_merge, later merged adds of the same
+    # name and unit increase their quantity instead of adding a row.
+    merge_key = models.CharField(max_length=128, null=True, blank=True, editable=False)
+
+    objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ("shopping_list", "position")
+        indexes = [models.Index(fields=["shopping_list", "position"], name="shopping_item_position_idx")]
+        constraints = [
+            models.UniqueConstraint(fields=["shopping_list", "merge_key"], name="shopping_item_merge_key_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.name}"
+
+    def save(self, *args, **kwargs):
+        if not self.position:
+            self.position = ShoppingItem.next_position(self.shopping_list_id)
+        self.normalized_name = normalize_item_name(self.name)
+        if not self.purchased:
+            self.purchased_at = None
+        elif self.purchased_at is None:
+            self.purchased_at = timezone.now()
+        # A renamed item leaves its merge group rather than colliding with another.
+        if self.merge_key is not None and self.merge_key != item_merge_key(self.name, self.unit):
+            self.merge_key = None
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def add_or_merge(shopping_list_id, name, quantity=Decimal(1), unit="", purchased=False, id=None):
+        """
+        Add an item, or add ``quantity`` to the item of the list with the
+        same normalized name and unit that was itself added this way.
+
+        The insert and the merge are one INSERT ... ON CONFLICT statement, so
+        concurrent adds never create duplicates. A merged item that was
+        already purchased starts over from the added quantity. ``id`` is only
+        used when a new row is inserted. The returned item has ``merged`` set
+        when an existing row was updated.
+        """
+        merge_key = item_merge_key(name, unit)
+        item = ShoppingItem(
+            id=id or uuid.uuid4(),
+            shopping_list_id=shopping_list_id,
+            name=name,
+            normalized_name=normalize_item_name(name),
+            quantity=quantity,
+            unit=unit,
+            purchased=purchased,
+            purchased_at=timezone.now() if purchased else None,
+            position=ShoppingItem.next_position(shopping_list_id),
+            merge_key=merge_key,
+        )
+
+        using = shard_for(shopping_list_id)
+        connection = connections[using]
+        if not connection.features.supports_update_conflicts_with_target:
+            with transaction.atomic(using=using):
+                existing = ShoppingItem.objects.using(using).select_for_update().filter(
+                    shopping_list_id=shopping_list_id, merge_key=merge_key
+                ).first()
+                if existing is None:
+                    item.save(force_insert=True, using=using)
+                    item.merged = False
+                    return item
+                existing.quantity = quantity if existing.purchased else existing.quantity + quantity
+                existing.purchased = purchased
+                existing.save(update_fields=["quantity", "purchased", "purchased_at"])
+                existing.merged = True
+                return existing
+
+        fields = ShoppingItem._meta.concrete_fields
+        quote = connection.ops.quote_name
+        table = quote(ShoppingItem._meta.db_table)
+        sql = (
+            f"INSERT INTO {table} ({', '.join(quote(field.column) for field in fields)}) "
+            f"VALUES ({', '.join(['%s'] * len(fields))}) "
+            f"ON CONFLICT ({quote('shopping_list_id')}, {quote('merge_key')}) DO UPDATE SET "
+            f"{quote('quantity')} = CASE WHEN {table}.{quote('purchased')} THEN excluded.{quote('quantity')} "
+            f"ELSE {table}.{quote('quantity')} + excluded.{quote('quantity')} END, "
+            f"{quote('purchased')} = excluded.{quote('purchased')}, "
+            f"{quote('purchased_at')} = CASE WHEN excluded.{quote('purchased')} "
+            f"THEN COALESCE({table}.{quote('purchased_at')}, excluded.{quote('purchased_at')}) END"
+        )
+        params = [field.get_db_prep_save(getattr(item, field.attname), connection) for field in fields]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+        result = ShoppingItem.objects.using(using).get(shopping_list_id=shopping_list_id, merge_key=merge_key)
+        result.merged = result.pk != item.pk
+        return result
+
+    @staticmethod
+    def last_position(shopping_list_id):
+        return (
+            ShoppingItem.objects.for_list(shopping_list_id)
+            .filter(shopping_list_id=shopping_list_id)
+            .order_by("-position")
+            .values_list("position", flat=True)
+            .first()
+        ) or None
+
+    @staticmethod
+    def next_position(shopping_list_id):
+        """
+        A position after the last item of the list, see ranking.key_after.
+        """
+        return key_after(ShoppingItem.last_position(shopping_list_id))
+
+    @staticmethod
+    def upsert(shopping_list_id, rows, on_conflict="update"):
+        """
+        Insert items with client-chosen ids in bulk. Rows whose id already
+        exists are overwritten with ``on_conflict="update"``, or left alone
+        with ``"ignore"``. Each row is a full representation: name, purchased
+        and optionally quantity and unit. New rows are appended to the list,
+        existing rows keep their position.
+
+        Callers must make sure none of the ids belong to another list.
+        """
+        last = ShoppingItem.last_position(shopping_list_id)
+        now = timezone.now()
+        items = [
+            ShoppingItem(
+                shopping_list_id=shopping_list_id,
+                normalized_name=normalize_item_name(row["name"]),
+                position=position,
+                purchased_at=now if row.get("purchased") else None,
+                **row,
+            )
+            for row, position in zip(rows, keys_after(last, len(rows)))
+        ]
+        objects = ShoppingItem.objects.for_list(shopping_list_id)
+        if on_conflict == "ignore":
+            return objects.bulk_create(items, ignore_conflicts=True)
+        with transaction.atomic(using=objects.db):
+            items = objects.bulk_create(
+                items,
+                update_conflicts=True,
+                unique_fields=["id"],
+                update_fields=["name", "normalized_name", "quantity", "unit", "purchased"],
+            )
+            # Overwritten rows keep their purchase time unless purchased
+            # changed, and their merge key unless renamed, see save().
+            # bulk_create cannot express either in the upsert itself.
+            upserted = objects.filter(pk__in=[item.pk for item in items])
+            upserted.filter(
+                models.Q(purchased=True, purchased_at__isnull=True) | models.Q(purchased=False, purchased_at__isnull=False)
+            ).update(
+                purchased_at=models.Case(models.When(purchased=True, then=models.Value(now)), default=None)
+            )
+            merge_keys = models.Case(
+                *[models.When(pk=item.pk, then=models.Value(item_merge_key(item.name, item.unit))) for item in items],
+                output_field=models.CharField(),
+            )
+            upserted.filter(merge_key__isnull=False).exclude(merge_key=merge_keys).update(merge_key=None)
+        return items
+
+    def move(self, after=None, before=None):
+        """
+        Place the item right after ``after`` or right before ``before``, or
+        between both when both are given. With neither it goes to the end.
+
+        Only this item's row is written. Raises ValueError when ``after``
+        does not sort before ``before``.
+        """
+        siblings = (
+            ShoppingItem.objects.for_list(self.shopping_list_id)
+            .filter(shopping_list_id=self.shopping_list_id)
+            .exclude(pk=self.pk)
+        )
+        low = after.position if after else None
+        high = before.position if before else None
+
+        if after and not before:
+            high = siblings.filter(position__gt=low).order_by("position").values_list("position", flat=True).first()
+        elif before and not after:
+            low = siblings.filter(position__lt=high).order_by("-position").values_list("position", flat=True).first()
+        elif not after and not before:
+            low = siblings.order_by("-position").values_list("position", flat=True).first()
+
+        position = key_between(low, high)
+        if len(position) > ShoppingItem._meta.get_field("position").max_length:
+            ShoppingItem.rebalance_positions(self.shopping_list_id)
+            for item in (self, after, before):
+                if item:
+                    item.refresh_from_db(fields=["position"])
+            return self.move(after, before)
+
+        ShoppingItem.objects.for_list(self.shopping_list_id).filter(pk=self.pk).update(position=position)
+        self.position = position
+        return position
+
+    @staticmethod
+    def rebalance_positions(shopping_list_id, batch_size=1000):
+        """
+        Rewrite the positions of all items of the list to short, evenly
+        spaced keys, keeping their order.
+        """
+        objects = ShoppingItem.objects.for_list(shopping_list_id)
+        with transaction.atomic(using=objects.db):
+            items = list(
+                objects.select_for_update()
+                .filter(shopping_list_id=shopping_list_id)
+                .order_by("position", "pk")
+                .only("pk", "position")
+            )
+            for item, position in zip(items, evenly_spaced_keys(len(items))):
+                item.position = position
+            objects.bulk_update(items, ["position"], batch_size=batch_size)
+        return len(items)
+
+
+class ArchivedShoppingList(models.Model):
+    """
+    Cold storage for lists moved out of ShoppingList by the
+    archive_shopping_lists command. Rows keep their original ids.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    name = models.CharField(max_length=200)
+    members = models.ManyToManyField(
+        settings.AUTH_USER_MODEL, through="ArchivedShoppingListMembership", related_name="archived_shopping_lists"
+    )
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    objects = ShoppingListQuerySet.as_manager()
+
+    def __str__(self):
+        return self.name
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        with shard_atomic(self._state.db or DEFAULT_DB_ALIAS):
+            deleted = super().delete(*args, **kwargs)
+            ArchivedShoppingListMembership.objects.filter(archivedshoppinglist_id=pk).delete()
+        return deleted
+
+    def has_member(self, user):
+        return ArchivedShoppingListMembership.objects.filter(
+            archivedshoppinglist_id=self.pk, customuser_id=user.pk
+        ).exists()
+
+
+class ArchivedShoppingListMembership(models.Model):
+    list_field = "archivedshoppinglist"
+
+    archivedshoppinglist = models.ForeignKey(ArchivedShoppingList, on_delete=models.DO_NOTHING, db_constraint=False)
+    customuser = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "shopping_list_archivedshoppinglist_members"
+        unique_together = [("archivedshoppinglist", "customuser")]
+
+
+class ArchivedShoppingItem(models.Model):
+    id = models.UUIDField(primary_key=True, editable=False)
     name = models.CharField(max_length=100)
     purchased = models.BooleanField()
-    shopping_list = models.ForeignKey(ShoppingList, on_delete=models.CASCADE, related_name="shopping_items")
+    shopping_list = models.ForeignKey(ArchivedShoppingList, on_delete=models.CASCADE, related_name="shopping_items")
+    position = models.CharField(max_length=64, default="")
+    normalized_name = models.CharField(max_length=100, default="")
+    quantity = models.DecimalField(max_digits=10, decimal_places=3, default=1)
+    unit = models.CharField(max_length=20, blank=True, default="")
+    merge_key = models.CharField(max_length=128, null=True, blank=True)
+    purchased_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ShardedQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.name}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    The response to a write sent with an Idempotency-Key header, replayed
+    when the client retries with the same key. ``status_code`` is null while
+    the first request is still running.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="shopping_list_idempotency_key_unique"),
+        ]
+
+    def __str__(self):
+        return self.key
+
+    @classmethod
+    def delete_expired(cls, batch_size=1000):
+        """
+        Delete expired keys in batches, returns how many were deleted.
+        """
+        deleted = 0
+        while True:
+            ids = list(cls.objects.filter(expires_at__lt=timezone.now()).values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += cls.objects.filter(pk__in=ids).delete()[0]
+
+
+class AuditEvent(models.Model):
+    """
+    Append-only history of changes to lists, written in bulk at the end of
+    the request, see shopping_list.audit. Lists and items are referenced by
+    id only: the events outlive them and lists may be on another shard. On
+    PostgreSQL the table is partitioned by month of ``created_at``.
+    """
+    class Action(models.TextChoices):
+        ITEM_ADDED = "item_added"
+        ITEM_UPDATED = "item_updated"
+        ITEM_PURCHASED = "item_purchased"
+        ITEM_DELETED = "item_deleted"
+        ITEM_SYNCED = "item_synced"
+        MEMBER_ADDED = "member_added"
+        MEMBER_REMOVED = "member_removed"
+        LIST_DELETED = "list_deleted"
+
+    id = models.BigAutoField(primary_key=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    shopping_list_id = models.UUIDField()
+    item_id = models.UUIDField(null=True, blank=True)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        related_name="+",
+    )
+    action = models.CharField(max_length=20, choices=Action.choices)
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["shopping_list_id", "created_at"], name="audit_event_list_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.action} on {self.shopping_list_id}"
@@ -0,0 +1,90 @@
+"""
+Fractional indexing for item positions.
+
+Positions are strings compared byte by byte, read as base 36 fractions
+(``"h"`` is 17/36). A key can always be generated between two others, so
+moving an item rewrites only that item. Keys never end in ``"0"`` which
+keeps that guarantee. Only digits and lowercase letters are used, they sort
+the same way in every database collation.
+"""
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+
+def key_between(before, after):
+    """
+    Return a key sorting strictly between ``before`` and ``after``.
+    Either may be None for an open end.
+    """
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"{before!r} does not sort before {after!r}.")
+    return _midpoint(before or "", after)
+
+
+def key_after(key, width=4):
+    """
+    A key after ``key``, for appending. The first ``width`` characters of
+    ``key`` are incremented as a base 36 number, so keys appended one after
+    another keep the same length instead of growing. The width is only
+    widened once that prefix is all ``"z"``.
+    """
+    if key is None:
+        return key_between(None, None)
+    while not key[:width].ljust(width, "0").strip("z"):
+        width += 1
+    value = 0
+    for digit in key[:width].ljust(width, "0"):
+        value = value * BASE + DIGITS.index(digit)
+    return _to_key(value + 1, width)
+
+
+def _midpoint(a, b):
+    if b is not None:
+        # Copy the shared prefix, padding a with zeros.
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else BASE
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b) // 2]
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def evenly_spaced_keys(count):
+    """
+    ``count`` ascending keys spread over the key space, each as short as
+    possible with room to insert between neighbours.
+    """
+    width = 1
+    while BASE ** width < (count + 1) * BASE:
+        width += 1
+    step = BASE ** width // (count + 1)
+    return [_to_key(step * i, width) for i in range(1, count + 1)]
+
+
+def keys_after(last, count):
+    """
+    ``count`` ascending keys after ``last``, the greatest key in use (None
+    when there is none). Each is ``key_after`` the previous one, so repeated
+    batches do not lengthen the keys.
+    """
+    keys = []
+    for _ in range(count):
+        last = key_after(last)
+        keys.append(last)
+    return keys
+
+
+def _to_key(value, width):
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return "".join(reversed(digits)).rstrip("0")
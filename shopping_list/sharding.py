@@ -0,0 +1,202 @@
+"""
+Placement of shopping data on SHOPPING_LIST_SHARDS.
+
+A list, its items and its archived copy live on the shard picked by
+hashing the list id. Membership rows stay on the default database with the
+users, they are the directory used to find a user's lists across shards.
+With the single "default" shard, the default setting, nothing is routed.
+"""
+
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, migrations, models, transaction
+
+
+# Models stored on the shards, everything else stays on the default database.
+SHARDED_MODELS = {"shoppinglist", "shoppingitem", "archivedshoppinglist", "archivedshoppingitem"}
+
+
+def shard_aliases():
+    return settings.SHOPPING_LIST_SHARDS
+
+
+def is_sharded():
+    return len(shard_aliases()) > 1
+
+
+def shard_for(shopping_list_id):
+    aliases = shard_aliases()
+    if len(aliases) == 1:
+        return aliases[0]
+    if not isinstance(shopping_list_id, uuid.UUID):
+        shopping_list_id = uuid.UUID(str(shopping_list_id))
+    return aliases[zlib.crc32(shopping_list_id.bytes) % len(aliases)]
+
+
+def new_id_on(alias):
+    """
+    A new list id that hashes to ``alias``, so a copy can stay on the shard
+    of its source.
+    """
+    while True:
+        shopping_list_id = uuid.uuid4()
+        if shard_for(shopping_list_id) == alias:
+            return shopping_list_id
+
+
+def group_by_shard(shopping_list_ids):
+    grouped = {}
+    for shopping_list_id in shopping_list_ids:
+        grouped.setdefault(shard_for(shopping_list_id), []).append(shopping_list_id)
+    return grouped
+
+
+@contextmanager
+def shard_atomic(alias):
+    """
+    A transaction on ``alias`` and one on the default database, which holds
+    the memberships. The two commit one after the other, not atomically.
+    """
+    with transaction.atomic(using=alias):
+        if alias == DEFAULT_DB_ALIAS:
+            yield
+        else:
+            with transaction.atomic():
+                yield
+
+
+def fan_out(func, aliases):
+    """
+    Call ``func(alias)`` for every alias, concurrently when there are
+    several, and return the results in the order of ``aliases``. The
+    execute wrappers of the calling thread, e.g. query budgets, also see the
+    queries of the worker threads.
+    """
+    aliases = list(aliases)
+    if len(aliases) <= 1:
+        return [func(alias) for alias in aliases]
+
+    wrappers = {name: list(connections[name].execute_wrappers) for name in connections}
+
+    def call(alias):
+        try:
+            with ExitStack() as stack:
+                for name, installed in wrappers.items():
+                    for wrapper in installed:
+                        stack.enter_context(connections[name].execute_wrapper(wrapper))
+                return func(alias)
+        finally:
+            # Worker threads get their own connections, do not leak them.
+            for connection in connections.all(initialized_only=True):
+                connection.close()
+
+    with ThreadPoolExecutor(max_workers=len(aliases)) as executor:
+        return list(executor.map(call, aliases))
+
+
+def fan_out_for_member(user, func, membership=None):
+    """
+    Call ``func(alias, shopping_list_ids)`` for every shard holding lists
+    ``user`` is a member of, with the ids of those on the shard, see
+    fan_out. ``membership`` is the through model of the lists, by default
+    ShoppingListMembership. Each list is on one shard, so results over
+    the lists, e.g. counts, add up across shards.
+    """
+    if membership is None:
+        membership = apps.get_model("shopping_list", "ShoppingListMembership")
+    ids_by_shard = group_by_shard(
+        membership.objects.filter(customuser=user).values_list(f"{membership.list_field}_id", flat=True)
+    )
+    return fan_out(lambda alias: func(alias, ids_by_shard[alias]), ids_by_shard)
+
+
+class ShardedQuerySet(models.QuerySet):
+
+    def create(self, **kwargs):
+        # Unless a database was picked, let the router place the new row by
+        # its list rather than on the default database.
+        obj = self.model(**kwargs)
+        self._for_write = True
+        obj.save(force_insert=True, using=self._db)
+        return obj
+
+    def for_list(self, shopping_list_id):
+        """
+        Query the shard holding ``shopping_list_id``. For items this only
+        picks the database, filter on the list as well.
+        """
+        return self.using(shard_for(shopping_list_id))
+
+
+class ShoppingListShardRouter:
+    """
+    Routes saves and related lookups of sharded models by the list they
+    belong to. Querysets without an instance go to the default database,
+    use ``objects.for_list()`` to reach the right shard.
+    """
+
+    def _shopping_list_id(self, instance):
+        name = instance._meta.model_name
+        if name in ("shoppinglist", "archivedshoppinglist"):
+            return instance.pk
+        return getattr(instance, "shopping_list_id", None)
+
+    def _db(self, model, **hints):
+        if not is_sharded():
+            return None
+        if model._meta.app_label != "shopping_list" or model._meta.model_name not in SHARDED_MODELS:
+            # Django would otherwise follow the instance hint, e.g. read the
+            # members of a list from the list's shard.
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is None or instance._meta.model_name not in SHARDED_MODELS:
+            return None
+        if instance._state.db is not None:
+            return instance._state.db
+        shopping_list_id = self._shopping_list_id(instance)
+        return shard_for(shopping_list_id) if shopping_list_id is not None else None
+
+    db_for_read = _db
+    db_for_write = _db
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Memberships and users on the default database point at lists on
+        # the shards, those foreign keys have no database constraint.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == DEFAULT_DB_ALIAS:
+            return None
+        return app_label == "shopping_list" and model_name in SHARDED_MODELS
+
+
+class DefaultDatabaseOnly(migrations.SeparateDatabaseAndState):
+    """
+    Migration operation changing the schema of the default database only,
+    the state changes everywhere. Used for the auto-created member tables:
+    the router lets their list model migrate on the shards, but the tables
+    reference the users, which only exist on the default database.
+    """
+
+    def __init__(self, operation):
+        self.operation = operation
+        super().__init__(database_operations=[operation], state_operations=[operation])
+
+    def deconstruct(self):
+        return self.__class__.__qualname__, [self.operation], {}
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.alias == DEFAULT_DB_ALIAS:
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.alias == DEFAULT_DB_ALIAS:
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return f"{self.operation.describe()} (default database only)"
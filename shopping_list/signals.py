@@ -0,0 +1,20 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from shopping_list import audit
+from shopping_list.models import AuditEvent, ShoppingList
+
+
+MEMBER_ACTIONS = {"post_add": AuditEvent.Action.MEMBER_ADDED, "post_remove": AuditEvent.Action.MEMBER_REMOVED}
+
+
+@receiver(m2m_changed, sender=ShoppingList.members.through)
+def audit_member_changes(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if action not in MEMBER_ACTIONS or not pk_set:
+        return
+    if reverse:
+        for shopping_list_id in pk_set:
+            audit.record(MEMBER_ACTIONS[action], shopping_list_id, using=using, member=instance.pk)
+    else:
+        for user_id in pk_set:
+            audit.record(MEMBER_ACTIONS[action], instance.pk, using=using, member=user_id)
@@ -0,0 +1,56 @@
+from django.conf import settings
+
+from jobs.registry import job_handler
+from shopping_list.api.serializers import ShoppingItemSerializer
+from shopping_list.archive import archivable_shopping_lists, archive_shopping_lists
+from shopping_list.audit import rotate_audit_log
+from shopping_list.models import IdempotencyKey, ShoppingItem, ShoppingList
+from shopping_list.sharding import shard_aliases
+from user.serializers import UserSerializer
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+@job_handler("shopping_list.export")
+def export_shopping_list(job):
+    shopping_list = ShoppingList.objects.for_list(job.payload["shopping_list"]).get(pk=job.payload["shopping_list"])
+    items = shopping_list.shopping_items.all()
+    total = items.count()
+
+    exported = []
+    for item in items.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        exported.append(ShoppingItemSerializer(item).data)
+        if len(exported) % EXPORT_CHUNK_SIZE == 0:
+            job.report_progress(len(exported) / total, f"{len(exported)} of {total} items exported")
+
+    return {
+        "id": str(shopping_list.id),
+        "name": shopping_list.name,
+        "shopping_items": exported,
+        "members": UserSerializer(shopping_list.members.all(), many=True).data,
+    }
+
+
+@job_handler("shopping_list.archive")
+def archive_old_shopping_lists(job):
+    queryset = archivable_shopping_lists(**job.payload)
+    return {"archived": sum(archive_shopping_lists(queryset.using(alias)) for alias in shard_aliases())}
+
+
+@job_handler("shopping_list.rebalance_positions")
+def rebalance_item_positions(job):
+    return {"rebalanced": ShoppingItem.rebalance_positions(job.payload["shopping_list"])}
+
+
+@job_handler("shopping_list.delete_expired_idempotency_keys")
+def delete_expired_idempotency_keys(job):
+    return {"deleted": IdempotencyKey.delete_expired()}
+
+
+@job_handler("shopping_list.rotate_audit_log")
+def rotate_audit_events(job):
+    return rotate_audit_log(
+        job.payload.get("keep_months", settings.AUDIT_LOG_RETENTION_MONTHS),
+        job.payload.get("months_ahead", settings.AUDIT_LOG_PARTITIONS_AHEAD),
+    )
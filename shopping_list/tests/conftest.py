@@ -1,7 +1,8 @@
 import pytest
 
 from user.models import CustomUser
-from shopping_list.models import ShoppingItem, ShoppingList
+from shopping_list.models import ShoppingItem, ShoppingList, normalize_item_name
+from shopping_list.ranking import evenly_spaced_keys
 
 
 @pytest.fixture(scope="session")
@@ -10,12 +11,29 @@ def create_shopping_list():
     def _create_shopping_list(user: CustomUser = None, name: str = "Groceries"):
 
         shopping_list = ShoppingList.objects.create(name=name)
-        shopping_list.members.add(user)
+        if user:
+            shopping_list.add_members([user.pk])
         return shopping_list
     
     return _create_shopping_list
 
 
+@pytest.fixture(scope="session")
+def create_shopping_lists():
+
+    def _create_shopping_lists(count: int, user: CustomUser = None, name: str = "List {}"):
+
+        shopping_lists = ShoppingList.objects.bulk_create([ShoppingList(name=name.format(i)) for i in range(count)])
+        if user:
+            Membership = ShoppingList.members.through
+            Membership.objects.bulk_create(
+                [Membership(shoppinglist_id=shopping_list.pk, customuser_id=user.pk) for shopping_list in shopping_lists]
+            )
+        return shopping_lists
+
+    return _create_shopping_lists
+
+
 @pytest.fixture(scope="session")
 def create_shopping_item():
 
@@ -27,11 +45,31 @@ def create_shopping_item():
             shopping_list = ShoppingList.objects.create(name="Groceries")
         
 
-        if user and user not in shopping_list.members.all():
-            shopping_list.members.add(user)
+        if user:
+            shopping_list.add_members([user.pk])
 
         shopping_item = ShoppingItem.objects.create(name=name, purchased=purchased, shopping_list=shopping_list)
 
         return shopping_item
     
     return _create_shopping_item
+
+
+@pytest.fixture(scope="session")
+def create_shopping_items():
+
+    def _create_shopping_items(count: int, shopping_list: ShoppingList, name: str = "Item {}", purchased: bool = False):
+
+        names = [name.format(i) for i in range(count)]
+        return ShoppingItem.objects.bulk_create([
+            ShoppingItem(
+                name=item_name,
+                normalized_name=normalize_item_name(item_name),
+                purchased=purchased,
+                shopping_list=shopping_list,
+                position=position,
+            )
+            for item_name, position in zip(names, evenly_spaced_keys(count))
+        ])
+
+    return _create_shopping_items
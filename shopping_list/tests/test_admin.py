@@ -0,0 +1,84 @@
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from shopping_list.models import ShoppingItem, ShoppingList
+
+
+def changelist_queries(admin_client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.get(url)
+    assert response.status_code == 200
+    return len(queries)
+
+
+@pytest.mark.django_db
+def test_item_changelist_query_count_does_not_grow_with_rows(admin_client, create_shopping_item):
+    url = reverse("admin:shopping_list_shoppingitem_changelist")
+    create_shopping_item(name="Eggs")
+    baseline = changelist_queries(admin_client, url)
+
+    for name in ("Milk", "Bread", "Rice"):
+        create_shopping_item(name=name)
+
+    assert changelist_queries(admin_client, url) == baseline
+
+
+@pytest.mark.django_db
+def test_item_change_form_does_not_render_every_shopping_list(admin_client, create_shopping_item):
+    item = create_shopping_item(name="Eggs")
+    ShoppingList.objects.create(name="Unrelated list")
+
+    response = admin_client.get(reverse("admin:shopping_list_shoppingitem_change", args=[item.id]))
+
+    assert response.status_code == 200
+    assert "Unrelated list" not in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_mark_purchased_action(admin_client, create_shopping_item):
+    item = create_shopping_item(name="Eggs")
+
+    admin_client.post(
+        reverse("admin:shopping_list_shoppingitem_changelist"),
+        {"action": "mark_purchased", "_selected_action": [item.id]},
+    )
+
+    item.refresh_from_db()
+    assert item.purchased
+
+
+@pytest.mark.django_db
+def test_move_items_action(admin_client, create_shopping_item):
+    item = create_shopping_item(name="Eggs")
+    target = ShoppingList.objects.create(name="Weekend")
+
+    admin_client.post(
+        reverse("admin:shopping_list_shoppingitem_changelist"),
+        {"action": "move_to_shopping_list", "_selected_action": [item.id], "target_shopping_list": target.id},
+    )
+
+    assert ShoppingItem.objects.get(pk=item.pk).shopping_list_id == target.id
+
+
+@pytest.mark.django_db
+def test_moved_items_are_appended_and_leave_their_merge_group(admin_client, create_shopping_list):
+    source = create_shopping_list(name="Weekly")
+    target = create_shopping_list(name="Weekend")
+    milk = ShoppingItem.add_or_merge(source.id, "Milk")
+    eggs = ShoppingItem.objects.create(shopping_list=source, name="Eggs", purchased=False)
+    ShoppingItem.add_or_merge(target.id, "Milk")
+    ShoppingItem.objects.create(shopping_list=target, name="Bread", purchased=False)
+
+    response = admin_client.post(
+        reverse("admin:shopping_list_shoppingitem_changelist"),
+        {"action": "move_to_shopping_list", "_selected_action": [eggs.id, milk.id], "target_shopping_list": target.id},
+    )
+
+    assert response.status_code == 302
+    items = ShoppingItem.objects.filter(shopping_list=target).order_by("position")
+    assert [(item.name, item.merge_key) for item in items] == [
+        ("Milk", "milk|"), ("Bread", None), ("Milk", None), ("Eggs", None)
+    ]
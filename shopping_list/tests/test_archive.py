@@ -0,0 +1,75 @@
+import pytest
+
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from shopping_list.models import ArchivedShoppingItem, ArchivedShoppingList, ShoppingItem, ShoppingList
+from user.tests.conftest import create_user, create_authenticated_client
+
+
+def age(shopping_list, days):
+    ShoppingList.objects.filter(pk=shopping_list.pk).update(updated_at=timezone.now() - timedelta(days=days))
+
+
+@pytest.mark.django_db
+def test_old_and_completed_lists_are_archived_with_items(create_user, create_shopping_list, create_shopping_item):
+    user = create_user()
+    old_list = create_shopping_list(user, name="Old")
+    completed_list = create_shopping_list(user, name="Completed")
+    active_list = create_shopping_list(user, name="Active")
+    create_shopping_item(shopping_list=old_list, name="Eggs")
+    create_shopping_item(shopping_list=completed_list, name="Milk", purchased=True)
+    create_shopping_item(shopping_list=active_list, name="Bread", purchased=True)
+    age(old_list, 100)
+    age(completed_list, 10)
+
+    call_command("archive_shopping_lists", batch_size=1)
+
+    assert list(ShoppingList.objects.values_list("name", flat=True)) == ["Active"]
+    assert set(ArchivedShoppingList.objects.values_list("name", flat=True)) == {"Old", "Completed"}
+    assert set(ArchivedShoppingItem.objects.values_list("name", flat=True)) == {"Eggs", "Milk"}
+    assert ShoppingItem.objects.count() == 1
+    assert list(ArchivedShoppingList.objects.get(pk=old_list.pk).members.all()) == [user]
+
+
+@pytest.mark.django_db
+def test_archived_list_is_restored_by_member(
+    create_user, create_shopping_list, create_shopping_item, create_authenticated_client
+):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    create_shopping_item(shopping_list=shopping_list, name="Eggs")
+    age(shopping_list, 100)
+    call_command("archive_shopping_lists")
+    client = create_authenticated_client(user)
+
+    assert client.get(reverse("archived-shopping-lists")).data[0]["id"] == str(shopping_list.id)
+
+    response = client.post(reverse("restore-archived-shopping-list", args=[shopping_list.id]))
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data["shopping_items"][0]["name"] == "Eggs"
+    assert ShoppingList.objects.get(pk=shopping_list.pk).members.get() == user
+    assert not ArchivedShoppingList.objects.exists()
+    assert not ArchivedShoppingItem.objects.exists()
+
+
+@pytest.mark.django_db
+def test_archived_list_restore_restricted_if_not_member(
+    create_user, create_shopping_list, create_authenticated_client
+):
+    user_member = create_user()
+    user_not_member = create_user(email="b@b.com")
+    shopping_list = create_shopping_list(user_member)
+    age(shopping_list, 100)
+    call_command("archive_shopping_lists")
+
+    client = create_authenticated_client(user_not_member)
+    response = client.post(reverse("restore-archived-shopping-list", args=[shopping_list.id]))
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert ArchivedShoppingList.objects.exists()
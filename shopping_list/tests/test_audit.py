@@ -0,0 +1,215 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from jobs.models import Job
+from jobs.queue import enqueue_scheduled
+from shopping_list import audit
+from shopping_list.models import AuditEvent
+from shopping_list.tests.conftest import create_shopping_item
+from user.tests.conftest import create_user, create_authenticated_client
+
+
+def actions(shopping_list):
+    return list(AuditEvent.objects.filter(shopping_list_id=shopping_list.id).order_by("id").values_list("action", flat=True))
+
+
+@pytest.fixture(params=[True, False], ids=["returning", "read-first"])
+def returning(request, settings, monkeypatch):
+    """
+    Membership changes with and without RETURNING. Without it the current
+    members are read first, view budgets are set for databases that have it.
+    """
+    settings.QUERY_BUDGET_MODE = "raise" if request.param else "off"
+    monkeypatch.setattr(type(connection.features), "can_return_rows_from_bulk_insert", request.param)
+    return request.param
+
+
+# Events are written on commit, tests going through requests need real
+# transactions.
+@pytest.mark.django_db(transaction=True)
+def test_item_changes_are_logged_with_their_actor(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+
+    item_id = client.post(
+        reverse("add-shopping-item", args=[shopping_list.id]), {"name": "Milk", "purchased": False}, format="json"
+    ).data["id"]
+    item_url = reverse("shopping-item-detail", args=[shopping_list.id, item_id])
+    client.patch(item_url, {"quantity": "2"}, format="json")
+    client.patch(item_url, {"purchased": True}, format="json")
+    client.patch(item_url, {"purchased": True}, format="json")
+    client.delete(item_url)
+
+    assert actions(shopping_list) == ["member_added", "item_added", "item_updated", "item_purchased", "item_deleted"]
+    purchased = AuditEvent.objects.get(action=AuditEvent.Action.ITEM_PURCHASED)
+    assert purchased.actor == user
+    assert str(purchased.item_id) == item_id
+    assert purchased.data == {"name": "Milk", "changes": {"purchased": True}}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_events_of_a_request_are_written_with_one_insert(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+    items = [{"id": str(uuid.uuid4()), "name": f"Item {i}", "purchased": False} for i in range(20)]
+
+    with CaptureQueriesContext(connection) as queries:
+        client.post(reverse("shopping-item-batch", args=[shopping_list.id]), {"items": items}, format="json")
+
+    inserts = [query for query in queries if query["sql"].startswith(f'INSERT INTO "{AuditEvent._meta.db_table}"')]
+    assert len(inserts) == 1
+    assert AuditEvent.objects.filter(action=AuditEvent.Action.ITEM_SYNCED, actor=user).count() == 20
+
+
+@pytest.mark.django_db(transaction=True)
+def test_merged_adds_are_logged_as_updates(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+    url = reverse("add-shopping-item", args=[shopping_list.id]) + "?merge=true"
+
+    for _ in range(2):
+        client.post(url, {"name": "Milk", "purchased": False}, format="json")
+
+    assert actions(shopping_list) == ["member_added", "item_added", "item_updated"]
+    assert AuditEvent.objects.get(action=AuditEvent.Action.ITEM_UPDATED).data["changes"] == {"quantity": "2.000", "purchased": False}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rows_ignored_by_a_batch_are_not_logged(create_user, create_authenticated_client, create_shopping_list, create_shopping_item):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    existing = create_shopping_item(shopping_list=shopping_list, name="Eggs")
+    client = create_authenticated_client(user)
+    items = [{"id": str(existing.id), "name": "Eggs", "purchased": True}, {"id": str(uuid.uuid4()), "name": "Tea", "purchased": False}]
+
+    client.post(reverse("shopping-item-batch", args=[shopping_list.id]), {"items": items, "on_conflict": "ignore"}, format="json")
+
+    synced = AuditEvent.objects.filter(action=AuditEvent.Action.ITEM_SYNCED)
+    assert [event.data["name"] for event in synced] == ["Tea"]
+
+
+@pytest.mark.django_db
+def test_rolled_back_changes_are_not_logged(create_shopping_list):
+    shopping_list = create_shopping_list()
+
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            audit.record(AuditEvent.Action.LIST_DELETED, shopping_list.id)
+            raise RuntimeError
+
+    assert actions(shopping_list) == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_member_and_list_deletion_are_logged(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    friend = create_user(email="friend@example.com")
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+
+    client.post(reverse("shopping-list-members", args=[shopping_list.id]), {"emails": [friend.email]}, format="json")
+    client.delete(reverse("shopping-list-member-detail", args=[shopping_list.id, friend.id]))
+    client.delete(reverse("shopping-list-detail", args=[shopping_list.id]))
+
+    assert actions(shopping_list) == ["member_added", "member_added", "member_removed", "list_deleted"]
+    assert AuditEvent.objects.get(action=AuditEvent.Action.MEMBER_REMOVED).data == {"member": friend.id}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_only_actual_member_changes_are_logged(returning, create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    friends = [create_user(email=f"friend{i}@example.com") for i in range(2)]
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+    members_url = reverse("shopping-list-members", args=[shopping_list.id])
+
+    for _ in range(3):
+        client.post(members_url, {"emails": [friend.email for friend in friends]}, format="json")
+    client.delete(reverse("shopping-list-member-detail", args=[shopping_list.id, 999]))
+
+    assert actions(shopping_list) == ["member_added"] * 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_copied_members_are_logged(returning, create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    friend = create_user(email="friend@example.com")
+    shopping_list = create_shopping_list(user)
+    shopping_list.add_members([friend.pk])
+    client = create_authenticated_client(user)
+
+    clone_id = client.post(
+        reverse("clone-shopping-list", args=[shopping_list.id]), {"copy_members": True}, format="json"
+    ).data["id"]
+
+    members = AuditEvent.objects.filter(shopping_list_id=clone_id, action=AuditEvent.Action.MEMBER_ADDED)
+    assert sorted(event.data["member"] for event in members) == sorted([user.id, friend.id])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_history_is_paginated_newest_first(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    now = timezone.now()
+    AuditEvent.objects.bulk_create([
+        AuditEvent(
+            shopping_list_id=shopping_list.id, action=AuditEvent.Action.ITEM_ADDED, data={"name": f"Item {i}"},
+            created_at=now + timedelta(seconds=i),
+        )
+        for i in range(5)
+    ])
+    client = create_authenticated_client(user)
+
+    first = client.get(reverse("shopping-list-history", args=[shopping_list.id]), {"page_size": 3})
+    second = client.get(first.data["next"])
+
+    assert first.status_code == status.HTTP_200_OK
+    names = [event["data"].get("name") for event in first.data["results"] + second.data["results"]]
+    assert names == ["Item 4", "Item 3", "Item 2", "Item 1", "Item 0", None]
+    assert second.data["next"] is None
+
+
+@pytest.mark.django_db
+def test_history_is_for_members_only(create_user, create_authenticated_client, create_shopping_list):
+    shopping_list = create_shopping_list(create_user())
+    client = create_authenticated_client(create_user(email="stranger@example.com"))
+
+    response = client.get(reverse("shopping-list-history", args=[shopping_list.id]))
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_rotation_deletes_expired_events(create_shopping_list):
+    shopping_list = create_shopping_list()
+    now = timezone.now()
+    AuditEvent.objects.bulk_create([
+        AuditEvent(shopping_list_id=shopping_list.id, action=AuditEvent.Action.ITEM_ADDED, created_at=now - timedelta(days=days))
+        for days in (0, 40, 100, 400)
+    ])
+
+    result = audit.rotate_audit_log(keep_months=2, batch_size=1)
+
+    assert result["deleted"] == 2
+    assert AuditEvent.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_workers_schedule_the_rotation_daily():
+    assert [job.name for job in enqueue_scheduled()] == ["shopping_list.rotate_audit_log"]
+    assert enqueue_scheduled() == []
+
+    Job.objects.update(status=Job.Status.SUCCEEDED, created_at=timezone.now() - timedelta(days=2))
+
+    assert len(enqueue_scheduled()) == 1
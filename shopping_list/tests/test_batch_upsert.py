@@ -0,0 +1,166 @@
+import uuid
+
+import pytest
+
+from django.urls import reverse
+from rest_framework import status
+
+from shopping_list.models import ShoppingItem
+from user.tests.conftest import create_user, create_authenticated_client
+
+
+def batch(client, shopping_list, items, **data):
+    return client.post(reverse("shopping-item-batch", args=[shopping_list.id]), {"items": items, **data}, format="json")
+
+
+@pytest.mark.django_db
+def test_item_is_created_with_client_id(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+    url = reverse("add-shopping-item", args=[shopping_list.id])
+    item_id = str(uuid.uuid4())
+
+    created = client.post(url, {"id": item_id, "name": "Milk", "purchased": False}, format="json")
+    duplicate = client.post(url, {"id": item_id, "name": "Milk", "purchased": False}, format="json")
+
+    assert created.status_code == status.HTTP_201_CREATED
+    assert created.data["id"] == item_id
+    assert duplicate.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_item_id_cannot_be_changed(create_user, create_authenticated_client, create_shopping_item):
+    user = create_user()
+    item = create_shopping_item(user)
+    client = create_authenticated_client(user)
+
+    client.patch(reverse("shopping-item-detail", args=[item.shopping_list_id, item.id]), {"id": str(uuid.uuid4())}, format="json")
+
+    assert ShoppingItem.objects.filter(pk=item.pk).exists()
+
+
+@pytest.mark.django_db
+def test_batch_inserts_offline_queue_in_one_request(create_user, create_authenticated_client, create_shopping_list, create_shopping_item):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    create_shopping_item(shopping_list=shopping_list, name="Existing")
+    client = create_authenticated_client(user)
+    items = [{"id": str(uuid.uuid4()), "name": f"Item {i}", "purchased": False} for i in range(1000)]
+
+    response = batch(client, shopping_list, items)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == {"count": 1000}
+    names = list(shopping_list.shopping_items.values_list("name", flat=True))
+    assert names == ["Existing", *(f"Item {i}" for i in range(1000))]
+    assert max(len(position) for position in shopping_list.shopping_items.values_list("position", flat=True)) <= 4
+
+
+@pytest.mark.django_db
+def test_repeated_batches_keep_positions_short(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+
+    expected = []
+    for number in range(30):
+        items = [{"id": str(uuid.uuid4()), "name": f"Item {number}.{i}", "purchased": False} for i in range(1 + number % 3 * 50)]
+        assert batch(client, shopping_list, items).status_code == status.HTTP_200_OK
+        expected += [item["name"] for item in items]
+
+    assert list(shopping_list.shopping_items.values_list("name", flat=True)) == expected
+    assert max(len(position) for position in shopping_list.shopping_items.values_list("position", flat=True)) <= 4
+
+
+@pytest.mark.django_db
+def test_batch_updates_or_ignores_existing_ids(create_user, create_authenticated_client, create_shopping_list, create_shopping_item):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    first = create_shopping_item(shopping_list=shopping_list, name="Milk")
+    second = create_shopping_item(shopping_list=shopping_list, name="Eggs")
+    client = create_authenticated_client(user)
+
+    batch(client, shopping_list, [{"id": str(first.id), "name": "Oat milk", "quantity": "2", "purchased": True}])
+    batch(client, shopping_list, [{"id": str(second.id), "name": "Bread", "purchased": True}], on_conflict="ignore")
+
+    first_after = ShoppingItem.objects.get(pk=first.pk)
+    assert (first_after.name, first_after.quantity, first_after.purchased) == ("Oat milk", 2, True)
+    assert first_after.position == first.position
+    assert ShoppingItem.objects.get(pk=second.pk).name == "Eggs"
+    assert ShoppingItem.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_batch_keeps_last_edit_of_an_id(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    item_id = str(uuid.uuid4())
+
+    batch(create_authenticated_client(user), shopping_list, [
+        {"id": item_id, "name": "Milk", "purchased": False},
+        {"id": item_id, "name": "Milk", "purchased": True},
+    ])
+
+    assert ShoppingItem.objects.get().purchased is True
+
+
+@pytest.mark.django_db
+def test_batch_rejects_ids_of_other_lists(create_user, create_authenticated_client, create_shopping_list, create_shopping_item):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    other = create_shopping_item(create_user(email="other@example.com"), name="Secret")
+
+    response = batch(create_authenticated_client(user), shopping_list, [
+        {"id": str(uuid.uuid4()), "name": "Milk", "purchased": False},
+        {"id": str(other.id), "name": "Mine now", "purchased": False},
+    ])
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert ShoppingItem.objects.get(pk=other.pk).name == "Secret"
+    assert ShoppingItem.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_batch_not_member_forbidden(create_user, create_authenticated_client, create_shopping_list):
+    shopping_list = create_shopping_list(create_user())
+    client = create_authenticated_client(create_user(email="other@example.com"))
+
+    response = batch(client, shopping_list, [{"id": str(uuid.uuid4()), "name": "Milk", "purchased": False}])
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_merged_add_uses_client_id_for_new_rows(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+    url = reverse("add-shopping-item", args=[shopping_list.id]) + "?merge=true"
+    item_id = str(uuid.uuid4())
+
+    first = client.post(url, {"id": item_id, "name": "Milk", "purchased": False}, format="json")
+    merged = client.post(url, {"id": str(uuid.uuid4()), "name": "Milk", "purchased": False}, format="json")
+
+    assert first.data["id"] == merged.data["id"] == item_id
+    assert ShoppingItem.objects.get().quantity == 2
+
+
+@pytest.mark.django_db
+def test_renamed_merge_item_leaves_its_merge_group(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+    url = reverse("add-shopping-item", args=[shopping_list.id]) + "?merge=true"
+
+    milk = client.post(url, {"name": "Milk", "purchased": False}, format="json").data["id"]
+    kept = client.post(url, {"name": "Tea", "purchased": False}, format="json").data["id"]
+    batch(client, shopping_list, [
+        {"id": milk, "name": "Eggs", "purchased": False},
+        {"id": kept, "name": "Tea", "quantity": "3", "purchased": False},
+    ])
+    client.post(url, {"name": "Milk", "purchased": False}, format="json")
+    client.post(url, {"name": "Tea", "purchased": False}, format="json")
+
+    items = {item.name: (item.quantity, item.merge_key) for item in ShoppingItem.objects.all()}
+    assert items == {"Eggs": (1, None), "Milk": (1, "milk|"), "Tea": (4, "tea|")}
@@ -0,0 +1,85 @@
+import pytest
+
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from shopping_list.archive import archivable_shopping_lists
+from shopping_list.models import ShoppingItem, ShoppingList
+from shopping_list.tests.conftest import create_shopping_items
+from user.tests.conftest import create_user, create_authenticated_client
+
+
+@pytest.mark.django_db
+def test_clone_copies_items_in_constant_queries(create_user, create_authenticated_client, create_shopping_list, create_shopping_items, query_budget):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    create_shopping_items(300, shopping_list, purchased=True)
+    client = create_authenticated_client(user)
+
+    with query_budget(11):
+        response = client.post(reverse("clone-shopping-list", args=[shopping_list.id]), {"name": "Next week"}, format="json")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    clone = ShoppingList.objects.get(pk=response.data["id"])
+    assert clone.name == "Next week"
+    assert list(clone.shopping_items.values_list("name", flat=True)) == [f"Item {i}" for i in range(300)]
+    assert not clone.shopping_items.filter(purchased=True).exists()
+    assert len({item["id"] for item in response.data["shopping_items"]}) == 300
+    assert ShoppingItem.objects.count() == 600
+
+
+@pytest.mark.django_db
+def test_clone_copies_members_only_when_asked(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    friend = create_user(email="friend@example.com")
+    shopping_list = create_shopping_list(user)
+    shopping_list.members.add(friend)
+    client = create_authenticated_client(user)
+    url = reverse("clone-shopping-list", args=[shopping_list.id])
+
+    alone = client.post(url, {}, format="json")
+    shared = client.post(url, {"copy_members": True}, format="json")
+
+    assert [member["email"] for member in alone.data["members"]] == [user.email]
+    assert {member["email"] for member in shared.data["members"]} == {user.email, friend.email}
+
+
+@pytest.mark.django_db
+def test_templates_are_listed_apart_and_cloned_into_lists(create_user, create_authenticated_client, create_shopping_list, create_shopping_item):
+    user = create_user()
+    shopping_list = create_shopping_list(user, name="Weekly")
+    create_shopping_item(shopping_list=shopping_list, name="Milk")
+    client = create_authenticated_client(user)
+
+    template = client.post(reverse("clone-shopping-list", args=[shopping_list.id]), {"as_template": True}, format="json")
+    lists = client.get(reverse("all-shopping-lists"))
+    templates = client.get(reverse("shopping-list-templates"))
+    from_template = client.post(reverse("clone-shopping-list", args=[template.data["id"]]), {}, format="json")
+
+    assert template.data["is_template"] is True
+    assert [item["id"] for item in templates.data] == [template.data["id"]]
+    assert [item["id"] for item in lists.data] == [str(shopping_list.id)]
+    assert from_template.data["is_template"] is False
+    assert [item["name"] for item in from_template.data["shopping_items"]] == ["Milk"]
+
+
+@pytest.mark.django_db
+def test_templates_are_not_archived(create_user, create_shopping_list):
+    template = create_shopping_list(create_user(), name="Weekly")
+    ShoppingList.objects.filter(pk=template.pk).update(is_template=True, updated_at=timezone.now() - timedelta(days=365))
+
+    assert not archivable_shopping_lists().exists()
+
+
+@pytest.mark.django_db
+def test_clone_not_member_forbidden(create_user, create_authenticated_client, create_shopping_list):
+    shopping_list = create_shopping_list(create_user())
+    client = create_authenticated_client(create_user(email="other@example.com"))
+
+    response = client.post(reverse("clone-shopping-list", args=[shopping_list.id]), {}, format="json")
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert ShoppingList.objects.count() == 1
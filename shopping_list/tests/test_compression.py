@@ -0,0 +1,98 @@
+import asyncio
+import gzip
+
+import pytest
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+
+from core.middleware import CompressionMiddleware, accepted_encodings, compression_stats
+from shopping_list.models import ShoppingItem
+from user.tests.conftest import create_user, create_authenticated_client
+
+
+@pytest.fixture(autouse=True)
+def reset_compression_stats():
+    compression_stats.reset()
+
+
+def run_middleware(response, accept_encoding="gzip"):
+    request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+    return CompressionMiddleware(lambda request: response)(request)
+
+
+@pytest.mark.django_db
+def test_large_shopping_list_response_is_gzipped(create_user, create_shopping_list, create_authenticated_client):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    ShoppingItem.objects.bulk_create(
+        [ShoppingItem(name=f"Item {i}", purchased=False, shopping_list=shopping_list) for i in range(50)]
+    )
+    client = create_authenticated_client(user)
+    url = reverse("shopping-list-detail", args=[shopping_list.id])
+
+    response = client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+    assert response["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response["Vary"]
+    assert len(response.content) < len(gzip.decompress(response.content))
+    responses, original, compressed = compression_stats.totals["gzip"]
+    assert (responses, original, compressed) == (1, len(gzip.decompress(response.content)), len(response.content))
+
+
+def test_small_responses_are_not_compressed(settings):
+    settings.COMPRESSION_MIN_SIZE = 1024
+
+    response = run_middleware(HttpResponse(b"x" * 100))
+
+    assert not response.has_header("Content-Encoding")
+
+
+def test_already_encoded_responses_are_not_compressed():
+    original = HttpResponse(b"x" * 5000, headers={"Content-Encoding": "br"})
+
+    response = run_middleware(original)
+
+    assert response["Content-Encoding"] == "br"
+    assert response.content == b"x" * 5000
+
+
+def test_refused_encoding_is_not_used():
+    response = run_middleware(HttpResponse(b"x" * 5000), accept_encoding="gzip;q=0, identity")
+
+    assert not response.has_header("Content-Encoding")
+
+
+def test_streaming_responses_are_compressed_chunk_by_chunk():
+    response = run_middleware(StreamingHttpResponse(b"chunk %d " % i for i in range(1000)))
+
+    assert response["Content-Encoding"] == "gzip"
+    assert gzip.decompress(b"".join(response.streaming_content)) == b"".join(b"chunk %d " % i for i in range(1000))
+
+
+def test_async_streaming_responses_are_compressed():
+    async def chunks():
+        for i in range(1000):
+            yield b"chunk %d " % i
+
+    response = run_middleware(StreamingHttpResponse(chunks()))
+
+    async def read():
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+    assert response["Content-Encoding"] == "gzip"
+    assert gzip.decompress(asyncio.run(read())) == b"".join(b"chunk %d " % i for i in range(1000))
+
+
+def test_gzip_output_length_is_randomized():
+    content = b"<input name='csrfmiddlewaretoken' value='secret'>" * 100
+
+    responses = [run_middleware(HttpResponse(content, content_type="text/html")) for _ in range(10)]
+
+    assert all(gzip.decompress(response.content) == content for response in responses)
+    assert len({len(response.content) for response in responses}) > 1
+
+
+def test_accepted_encodings_parses_quality_values():
+    assert accepted_encodings("br;q=0.9, gzip, deflate;q=0") == {"br", "gzip"}
@@ -0,0 +1,97 @@
+import pytest
+
+from django.db import connection
+from django.db.models.signals import post_delete, pre_delete
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from shopping_list.models import ShoppingItem, ShoppingList, ShoppingListMembership
+from shopping_list.tests.conftest import create_shopping_items
+from user.tests.conftest import create_user, create_authenticated_client
+
+
+ITEMS_TABLE = f'"{ShoppingItem._meta.db_table}"'
+
+
+@pytest.mark.django_db
+def test_large_list_is_deleted_without_loading_items(create_user, create_authenticated_client, create_shopping_list, create_shopping_items):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    create_shopping_items(3000, shopping_list)
+    client = create_authenticated_client(user)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.delete(reverse("shopping-list-detail", args=[shopping_list.id]))
+
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    item_queries = [query["sql"] for query in queries if ITEMS_TABLE in query["sql"]]
+    assert len(item_queries) == 1
+    assert item_queries[0].startswith(f"DELETE FROM {ITEMS_TABLE}")
+    assert not ShoppingItem.objects.exists()
+
+
+@pytest.mark.django_db
+def test_items_are_deleted_in_batches_when_deletions_are_observed(settings, create_shopping_list, create_shopping_items):
+    settings.SHOPPING_LIST_DELETE_BATCH_SIZE = 100
+    shopping_list = create_shopping_list()
+    create_shopping_items(250, shopping_list)
+    deleted = []
+
+    def receiver(sender, instance, **kwargs):
+        deleted.append(instance.pk)
+
+    post_delete.connect(receiver, sender=ShoppingItem)
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            shopping_list.delete()
+    finally:
+        post_delete.disconnect(receiver, sender=ShoppingItem)
+
+    assert len(set(deleted)) == 250
+    batches = [query["sql"] for query in queries if query["sql"].startswith(f"SELECT {ITEMS_TABLE}.\"id\" FROM")]
+    assert len(batches) == 4
+    assert all("LIMIT 100" in sql for sql in batches)
+    assert not ShoppingList.objects.filter(pk=shopping_list.pk).exists()
+
+
+@pytest.mark.django_db
+def test_queryset_delete_batches_items_too(settings, create_shopping_lists, create_shopping_items):
+    settings.SHOPPING_LIST_DELETE_BATCH_SIZE = 100
+    shopping_lists = create_shopping_lists(2)
+    for shopping_list in shopping_lists:
+        create_shopping_items(150, shopping_list)
+    deleted = []
+
+    def receiver(sender, instance, **kwargs):
+        deleted.append(instance.pk)
+
+    post_delete.connect(receiver, sender=ShoppingItem)
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            ShoppingList.objects.filter(pk__in=[shopping_list.pk for shopping_list in shopping_lists]).delete()
+    finally:
+        post_delete.disconnect(receiver, sender=ShoppingItem)
+
+    assert len(set(deleted)) == 300
+    batches = [query["sql"] for query in queries if query["sql"].startswith(f"SELECT {ITEMS_TABLE}.\"id\" FROM")]
+    assert len(batches) == 4
+    assert not ShoppingList.objects.exists()
+
+
+@pytest.mark.django_db
+def test_failed_delete_keeps_the_members(create_user, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+
+    def receiver(sender, instance, **kwargs):
+        raise RuntimeError
+
+    pre_delete.connect(receiver, sender=ShoppingList)
+    try:
+        with pytest.raises(RuntimeError):
+            shopping_list.delete()
+    finally:
+        pre_delete.disconnect(receiver, sender=ShoppingList)
+
+    assert ShoppingListMembership.objects.filter(shoppinglist_id=shopping_list.pk, customuser=user).exists()
@@ -0,0 +1,59 @@
+import pytest
+
+from django.contrib.auth import authenticate
+
+from shopping_list.models import ShoppingItem, ShoppingList
+from shopping_list.tests.conftest import create_shopping_items, create_shopping_lists
+from user.models import CustomUser
+from user.tests.conftest import TEST_PASSWORD, create_users
+
+
+@pytest.fixture(scope="module")
+def shared_lists(module_transaction, create_users, create_shopping_lists, create_shopping_items):
+    with module_transaction.unblock():
+        owner, = create_users(1)
+        shopping_lists = create_shopping_lists(50, user=owner)
+        create_shopping_items(100, shopping_lists[0])
+    return owner, shopping_lists
+
+
+@pytest.mark.django_db
+def test_batched_factories_create_rows(shared_lists):
+    owner, shopping_lists = shared_lists
+
+    assert ShoppingList.objects.filter(members=owner).count() == 50
+    assert ShoppingItem.objects.filter(shopping_list=shopping_lists[0]).count() == 100
+
+
+@pytest.mark.django_db
+def test_batched_items_keep_their_order(shared_lists):
+    _, shopping_lists = shared_lists
+
+    names = list(shopping_lists[0].shopping_items.values_list("name", flat=True))
+
+    assert names == [f"Item {i}" for i in range(100)]
+
+
+@pytest.mark.django_db
+def test_changes_are_rolled_back_between_tests(shared_lists):
+    ShoppingList.objects.all().delete()
+
+    assert not ShoppingList.objects.exists()
+
+
+@pytest.mark.django_db
+def test_shared_rows_survive_earlier_tests(shared_lists):
+    assert ShoppingList.objects.count() == 50
+
+
+def test_unmarked_tests_cannot_write_shared_rows(shared_lists):
+    with pytest.raises(RuntimeError, match="Database access not allowed"):
+        ShoppingList.objects.all().delete()
+
+
+@pytest.mark.django_db
+def test_users_share_a_precomputed_password_hash(create_users):
+    first, second = create_users(2, email="hash{}@example.com")
+
+    assert first.password == second.password
+    assert authenticate(email="hash0@example.com", password=TEST_PASSWORD) == CustomUser.objects.get(pk=first.pk)
@@ -0,0 +1,82 @@
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from user.tests.conftest import create_user
+
+
+@pytest.fixture
+def shopping_list_with_items(create_user, create_shopping_list, create_shopping_item):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    create_shopping_item(shopping_list=shopping_list, name="Eggs")
+    create_shopping_item(shopping_list=shopping_list, name="Milk", purchased=True)
+    return user, shopping_list
+
+
+def get(user, url, **params):
+    client = APIClient()
+    client.force_authenticate(user)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params)
+    return response, [query["sql"] for query in queries.captured_queries]
+
+
+@pytest.mark.django_db
+def test_fields_trim_the_response(shopping_list_with_items):
+    user, shopping_list = shopping_list_with_items
+
+    response, _ = get(user, reverse("shopping-list-detail", args=[shopping_list.id]), fields="id,name")
+
+    assert set(response.data) == {"id", "name"}
+
+
+@pytest.mark.django_db
+def test_omitted_members_never_query_the_user_table(shopping_list_with_items):
+    user, shopping_list = shopping_list_with_items
+
+    response, queries = get(
+        user, reverse("shopping-list-detail", args=[shopping_list.id]), fields="id,name,shopping_items"
+    )
+
+    assert len(response.data["shopping_items"]) == 2
+    assert not any("user_customuser" in sql for sql in queries)
+
+
+@pytest.mark.django_db
+def test_nested_item_fields_narrow_the_select(shopping_list_with_items):
+    user, shopping_list = shopping_list_with_items
+
+    response, queries = get(user, reverse("all-shopping-lists"), fields="name,shopping_items.name")
+
+    assert response.data[0]["shopping_items"][0].keys() == {"name"}
+    item_queries = [sql for sql in queries if 'FROM "shopping_list_shoppingitem"' in sql]
+    assert len(item_queries) == 1
+    assert "purchased" not in item_queries[0]
+
+
+@pytest.mark.django_db
+def test_relations_not_expanded_are_returned_as_ids(shopping_list_with_items):
+    user, shopping_list = shopping_list_with_items
+
+    response, _ = get(user, reverse("shopping-list-detail", args=[shopping_list.id]), expand="members")
+
+    assert response.data["members"] == [{"id": user.id, "email": user.email}]
+    assert set(response.data["shopping_items"]) == set(shopping_list.shopping_items.values_list("id", flat=True))
+
+
+@pytest.mark.django_db
+def test_list_query_count_does_not_grow_with_lists(create_user, create_shopping_list, create_shopping_item):
+    user = create_user()
+    create_shopping_item(user=user, shopping_list=create_shopping_list(user))
+    _, few = get(user, reverse("all-shopping-lists"))
+
+    for name in ("Books", "Tools", "Pharmacy"):
+        create_shopping_item(user=user, shopping_list=create_shopping_list(user, name=name))
+    response, many = get(user, reverse("all-shopping-lists"))
+
+    assert len(response.data) == 4
+    assert len(many) == len(few)
@@ -0,0 +1,147 @@
+import pytest
+
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from shopping_list.api.idempotency import ClaimRenewal
+from shopping_list.models import IdempotencyKey, ShoppingItem, ShoppingList
+from user.tests.conftest import create_user, create_authenticated_client
+
+
+@pytest.mark.django_db
+def test_retry_returns_original_response_without_writing(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+    url = reverse("add-shopping-item", args=[shopping_list.id])
+    data = {"name": "Milk", "purchased": False}
+
+    first = client.post(url, data, format="json", HTTP_IDEMPOTENCY_KEY="retry-1")
+    retry = client.post(url, data, format="json", HTTP_IDEMPOTENCY_KEY="retry-1")
+
+    assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+    assert retry.json() == first.json()
+    assert retry["Idempotent-Replayed"] == "true"
+    assert ShoppingItem.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_shopping_list_create_is_idempotent(create_user, create_authenticated_client):
+    client = create_authenticated_client(create_user())
+
+    for _ in range(3):
+        client.post(reverse("all-shopping-lists"), {"name": "Groceries"}, format="json", HTTP_IDEMPOTENCY_KEY="list-1")
+
+    assert ShoppingList.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_clone_is_idempotent(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+    url = reverse("clone-shopping-list", args=[shopping_list.id])
+
+    responses = [client.post(url, {}, format="json", HTTP_IDEMPOTENCY_KEY="clone-1") for _ in range(2)]
+
+    assert responses[0].data["id"] == responses[1].data["id"]
+    assert responses[1]["Idempotent-Replayed"] == "true"
+    assert ShoppingList.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_key_reused_for_different_request_is_rejected(create_user, create_authenticated_client):
+    client = create_authenticated_client(create_user())
+    url = reverse("all-shopping-lists")
+
+    client.post(url, {"name": "Groceries"}, format="json", HTTP_IDEMPOTENCY_KEY="list-1")
+    response = client.post(url, {"name": "Party"}, format="json", HTTP_IDEMPOTENCY_KEY="list-1")
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert ShoppingList.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_key_still_in_progress_conflicts(create_user, create_authenticated_client):
+    user = create_user()
+    client = create_authenticated_client(user)
+    url = reverse("all-shopping-lists")
+    client.post(url, {"name": "Groceries"}, format="json", HTTP_IDEMPOTENCY_KEY="list-1")
+    IdempotencyKey.objects.update(status_code=None, response=None)
+
+    response = client.post(url, {"name": "Groceries"}, format="json", HTTP_IDEMPOTENCY_KEY="list-1")
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+
+@pytest.mark.django_db
+def test_errors_are_not_stored(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+    url = reverse("add-shopping-item", args=[shopping_list.id])
+
+    invalid = client.post(url, {"name": "Milk"}, format="json", HTTP_IDEMPOTENCY_KEY="item-1")
+    IdempotencyKey.objects.all().delete()
+    valid = client.post(url, {"name": "Milk", "purchased": False}, format="json", HTTP_IDEMPOTENCY_KEY="item-2")
+
+    assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+    assert valid.status_code == status.HTTP_201_CREATED
+    assert not IdempotencyKey.objects.filter(key="item-1").exists()
+
+
+@pytest.mark.django_db
+def test_expired_key_runs_the_write_again(create_user, create_authenticated_client):
+    client = create_authenticated_client(create_user())
+    url = reverse("all-shopping-lists")
+
+    client.post(url, {"name": "Groceries"}, format="json", HTTP_IDEMPOTENCY_KEY="list-1")
+    IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+    response = client.post(url, {"name": "Groceries"}, format="json", HTTP_IDEMPOTENCY_KEY="list-1")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert "Idempotent-Replayed" not in response
+    assert ShoppingList.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_keys_are_scoped_to_the_user(create_user, create_authenticated_client):
+    url = reverse("all-shopping-lists")
+
+    for email in ("a@example.com", "b@example.com"):
+        create_authenticated_client(create_user(email=email)).post(
+            url, {"name": "Groceries"}, format="json", HTTP_IDEMPOTENCY_KEY="list-1"
+        )
+
+    assert ShoppingList.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_expired_keys_are_deleted(create_user):
+    user = create_user()
+    now = timezone.now()
+    IdempotencyKey.objects.create(user=user, key="old", fingerprint="", status_code=201, expires_at=now - timedelta(hours=1))
+    IdempotencyKey.objects.create(user=user, key="new", fingerprint="", status_code=201, expires_at=now + timedelta(hours=1))
+
+    call_command("delete_expired_idempotency_keys", batch_size=1)
+
+    assert list(IdempotencyKey.objects.values_list("key", flat=True)) == ["new"]
+
+
+@pytest.mark.django_db
+def test_claims_of_running_requests_are_renewed(create_user, settings):
+    settings.IDEMPOTENCY_LOCK_SECONDS = 60
+    user = create_user()
+    soon = timezone.now() + timedelta(seconds=5)
+    pending = IdempotencyKey.objects.create(user=user, key="pending", fingerprint="", expires_at=soon)
+    done = IdempotencyKey.objects.create(user=user, key="done", fingerprint="", status_code=201, expires_at=soon)
+
+    for record in (pending, done):
+        ClaimRenewal(record).renew()
+
+    assert IdempotencyKey.objects.get(pk=pending.pk).expires_at > soon + timedelta(seconds=30)
+    assert IdempotencyKey.objects.get(pk=done.pk).expires_at == soon
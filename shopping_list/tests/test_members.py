@@ -0,0 +1,88 @@
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from user.models import CustomUser
+from user.tests.conftest import create_user, create_authenticated_client
+
+
+def post_members(client, shopping_list, emails):
+    url = reverse("shopping-list-members", args=[shopping_list.id])
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(url, {"emails": emails}, format="json")
+    return response, len(queries)
+
+
+@pytest.mark.django_db
+def test_members_are_added_by_email(create_user, create_shopping_list, create_authenticated_client):
+    owner = create_user()
+    create_user(email="friend@mail.com")
+    shopping_list = create_shopping_list(owner)
+
+    response, _ = post_members(create_authenticated_client(owner), shopping_list, ["Friend@Mail.com", "nobody@mail.com"])
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [member["email"] for member in response.data["members"]] == ["friend@mail.com"]
+    assert response.data["not_found"] == ["nobody@mail.com"]
+    assert set(shopping_list.members.values_list("email", flat=True)) == {"a@a.com", "friend@mail.com"}
+
+
+@pytest.mark.django_db
+def test_adding_members_costs_constant_queries(create_user, create_shopping_list, create_authenticated_client):
+    owner = create_user()
+    shopping_list = create_shopping_list(owner)
+    client = create_authenticated_client(owner)
+    CustomUser.objects.bulk_create([CustomUser(email=f"user{i}@mail.com") for i in range(200)])
+
+    _, few = post_members(client, shopping_list, ["user0@mail.com", "user1@mail.com"])
+    response, many = post_members(client, shopping_list, [f"user{i}@mail.com" for i in range(200)])
+
+    assert response.status_code == status.HTTP_200_OK
+    assert many == few
+    assert shopping_list.members.count() == 201
+
+
+@pytest.mark.django_db
+def test_adding_existing_members_is_ignored(create_user, create_shopping_list, create_authenticated_client):
+    owner = create_user()
+    shopping_list = create_shopping_list(owner)
+
+    response, _ = post_members(create_authenticated_client(owner), shopping_list, ["a@a.com"])
+
+    assert response.status_code == status.HTTP_200_OK
+    assert shopping_list.members.count() == 1
+
+
+@pytest.mark.django_db
+def test_members_are_removed_by_email_and_id(create_user, create_shopping_list, create_authenticated_client):
+    owner = create_user()
+    friend = create_user(email="friend@mail.com")
+    other = create_user(email="other@mail.com")
+    shopping_list = create_shopping_list(owner)
+    shopping_list.members.add(friend, other)
+    client = create_authenticated_client(owner)
+
+    response = client.delete(
+        reverse("shopping-list-members", args=[shopping_list.id]), {"emails": ["friend@mail.com"]}, format="json"
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.delete(reverse("shopping-list-member-detail", args=[shopping_list.id, other.id]))
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    assert list(shopping_list.members.all()) == [owner]
+
+
+@pytest.mark.django_db
+def test_members_restricted_if_not_member(create_user, create_shopping_list, create_authenticated_client):
+    owner = create_user()
+    outsider = create_user(email="outsider@mail.com")
+    shopping_list = create_shopping_list(owner)
+
+    response, _ = post_members(create_authenticated_client(outsider), shopping_list, ["outsider@mail.com"])
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert not shopping_list.members.filter(pk=outsider.pk).exists()
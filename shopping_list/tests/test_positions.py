@@ -0,0 +1,167 @@
+import random
+
+import pytest
+
+from django.urls import reverse
+from rest_framework import status
+
+from jobs.models import Job
+from jobs.queue import run_pending
+from shopping_list.models import ShoppingItem
+from shopping_list.ranking import evenly_spaced_keys, key_after, key_between
+from user.tests.conftest import create_user, create_authenticated_client
+
+
+def names(shopping_list):
+    return list(shopping_list.shopping_items.values_list("name", flat=True))
+
+
+def test_key_between_keeps_order_under_random_inserts():
+    keys = []
+    for _ in range(2000):
+        index = random.randint(0, len(keys))
+        low = keys[index - 1] if index > 0 else None
+        high = keys[index] if index < len(keys) else None
+        key = key_between(low, high)
+        assert (low is None or low < key) and (high is None or key < high)
+        assert not key.endswith("0")
+        keys.insert(index, key)
+
+
+def test_key_between_rejects_unordered_bounds():
+    with pytest.raises(ValueError):
+        key_between("i", "9")
+
+
+def test_evenly_spaced_keys_are_short_and_ordered():
+    keys = evenly_spaced_keys(5000)
+
+    assert keys == sorted(keys)
+    assert len(set(keys)) == 5000
+    assert max(len(key) for key in keys) <= 4
+
+
+def test_appended_keys_keep_their_length():
+    key = None
+    for _ in range(5000):
+        following = key_after(key)
+        assert key is None or key < following
+        key = following
+
+    assert len(key) == 4
+    assert key_after("zzzz") == "zzzz1"
+
+
+@pytest.mark.django_db
+def test_appending_many_items_keeps_positions_short(create_shopping_list):
+    shopping_list = create_shopping_list()
+
+    for index in range(450):
+        if index % 2:
+            ShoppingItem.objects.create(shopping_list=shopping_list, name=f"Item {index}", purchased=False)
+        else:
+            ShoppingItem.add_or_merge(shopping_list.id, f"Item {index}")
+
+    positions = list(shopping_list.shopping_items.values_list("position", flat=True))
+    assert names(shopping_list) == [f"Item {index}" for index in range(450)]
+    assert max(len(position) for position in positions) <= 4
+
+
+@pytest.mark.django_db
+def test_new_items_are_appended(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+
+    for name in ("Eggs", "Milk", "Bread"):
+        client.post(reverse("add-shopping-item", args=[shopping_list.id]), {"name": name, "purchased": False}, format="json")
+
+    assert names(shopping_list) == ["Eggs", "Milk", "Bread"]
+
+
+@pytest.mark.django_db
+def test_move_item_writes_only_that_item(create_user, create_authenticated_client, create_shopping_list, create_shopping_item):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    eggs, milk, bread = (create_shopping_item(shopping_list=shopping_list, name=name) for name in ("Eggs", "Milk", "Bread"))
+    client = create_authenticated_client(user)
+
+    response = client.post(
+        reverse("move-shopping-item", args=[shopping_list.id, bread.id]), {"after": str(eggs.id)}, format="json"
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert names(shopping_list) == ["Eggs", "Bread", "Milk"]
+    assert ShoppingItem.objects.get(pk=eggs.pk).position == eggs.position
+    assert ShoppingItem.objects.get(pk=milk.pk).position == milk.position
+
+    client.post(reverse("move-shopping-item", args=[shopping_list.id, milk.id]), {"before": str(eggs.id)}, format="json")
+    assert names(shopping_list) == ["Milk", "Eggs", "Bread"]
+
+    client.post(reverse("move-shopping-item", args=[shopping_list.id, milk.id]), {}, format="json")
+    assert names(shopping_list) == ["Eggs", "Bread", "Milk"]
+
+
+@pytest.mark.django_db
+def test_move_rejects_items_of_other_lists(create_user, create_authenticated_client, create_shopping_list, create_shopping_item):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    other_list = create_shopping_list(user, name="Other")
+    item = create_shopping_item(shopping_list=shopping_list)
+    other = create_shopping_item(shopping_list=other_list)
+    client = create_authenticated_client(user)
+
+    response = client.post(
+        reverse("move-shopping-item", args=[shopping_list.id, item.id]), {"after": str(other.id)}, format="json"
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_move_rejects_crossed_neighbours(create_user, create_authenticated_client, create_shopping_list, create_shopping_item):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    eggs, milk, bread = (create_shopping_item(shopping_list=shopping_list, name=name) for name in ("Eggs", "Milk", "Bread"))
+    client = create_authenticated_client(user)
+
+    response = client.post(
+        reverse("move-shopping-item", args=[shopping_list.id, eggs.id]),
+        {"after": str(bread.id), "before": str(milk.id)},
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_move_item_not_member_forbidden(create_user, create_authenticated_client, create_shopping_list, create_shopping_item):
+    owner = create_user()
+    shopping_list = create_shopping_list(owner)
+    item = create_shopping_item(shopping_list=shopping_list)
+    client = create_authenticated_client(create_user(email="other@example.com"))
+
+    response = client.post(reverse("move-shopping-item", args=[shopping_list.id, item.id]), {}, format="json")
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_long_positions_are_rebalanced_by_a_job(create_user, create_authenticated_client, create_shopping_list, create_shopping_item, settings):
+    settings.SHOPPING_ITEM_POSITION_REBALANCE_LENGTH = 3
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    first = create_shopping_item(shopping_list=shopping_list, name="first")
+    create_shopping_item(shopping_list=shopping_list, name="last")
+    client = create_authenticated_client(user)
+
+    moved = [create_shopping_item(shopping_list=shopping_list, name=f"item {i}") for i in range(20)]
+    for item in moved:
+        client.post(reverse("move-shopping-item", args=[shopping_list.id, item.id]), {"after": str(first.id)}, format="json")
+    expected = names(shopping_list)
+
+    assert Job.objects.filter(name="shopping_list.rebalance_positions").count() == 1
+    run_pending("test-worker")
+
+    assert names(shopping_list) == expected
+    assert max(len(position) for position in shopping_list.shopping_items.values_list("position", flat=True)) <= 2
@@ -0,0 +1,90 @@
+import pstats
+
+import pytest
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from user.models import APIToken
+from user.tests.conftest import create_user, create_authenticated_client
+
+
+@pytest.fixture
+def profiles(settings, tmp_path):
+    settings.PROFILING_DIR = tmp_path
+    settings.PROFILING_CONFIG_CHECK_INTERVAL = 0
+    return tmp_path
+
+
+def stems(directory):
+    return {path.stem for path in directory.iterdir() if path.suffix in (".prof", ".folded", ".sql")}
+
+
+@pytest.mark.django_db
+def test_matching_requests_are_profiled_with_sql_and_stacks(profiles, create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    create_shopping_list(user)
+    call_command("profile_requests", "on", "--sample-rate", "1", "--url-name", "all-shopping-lists")
+    client = create_authenticated_client(user)
+
+    client.get(reverse("all-shopping-lists"))
+    client.get(reverse("api-tokens"))
+
+    stem, = stems(profiles)
+    assert "GET-all-shopping-lists" in stem
+    assert pstats.Stats(str(profiles / f"{stem}.prof")).total_calls > 0
+    sql = (profiles / f"{stem}.sql").read_text()
+    assert sql.startswith("-- GET /api/shopping-lists/ 200")
+    assert "SELECT" in sql
+    for line in (profiles / f"{stem}.folded").read_text().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and stack
+
+
+@pytest.mark.django_db
+def test_user_filter_matches_token_clients(profiles, create_user):
+    user = create_user()
+    other = create_user(email="other@example.com")
+    call_command("profile_requests", "on", "--sample-rate", "1", "--user-id", str(user.pk))
+
+    for account, url_name in ((other, "api-tokens"), (user, "all-shopping-lists")):
+        _, key = APIToken.generate(account)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {key}")
+        client.get(reverse(url_name))
+
+    stem, = stems(profiles)
+    assert "GET-all-shopping-lists" in stem
+
+
+@pytest.mark.django_db
+def test_nothing_is_profiled_when_switched_off(profiles, create_user, create_authenticated_client):
+    call_command("profile_requests", "on", "--sample-rate", "1")
+    call_command("profile_requests", "off")
+
+    create_authenticated_client(create_user()).get(reverse("all-shopping-lists"))
+
+    assert stems(profiles) == set()
+
+
+@pytest.mark.django_db
+def test_fast_requests_are_not_kept(profiles, create_user, create_authenticated_client):
+    call_command("profile_requests", "on", "--sample-rate", "1", "--min-duration-ms", "60000")
+
+    create_authenticated_client(create_user()).get(reverse("all-shopping-lists"))
+
+    assert stems(profiles) == set()
+
+
+@pytest.mark.django_db
+def test_only_newest_profiles_are_kept(profiles, settings, create_user, create_authenticated_client):
+    settings.PROFILING_MAX_PROFILES = 2
+    call_command("profile_requests", "on", "--sample-rate", "1")
+    client = create_authenticated_client(create_user())
+
+    for _ in range(4):
+        client.get(reverse("all-shopping-lists"))
+
+    assert len(stems(profiles)) == 2
+    assert len(list(profiles.glob("*.prof"))) == 2
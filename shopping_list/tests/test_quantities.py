@@ -0,0 +1,92 @@
+import pytest
+
+from decimal import Decimal
+
+from django.urls import reverse
+from rest_framework import status
+
+from shopping_list.models import ShoppingItem
+from user.tests.conftest import create_user, create_authenticated_client
+
+
+def add(client, shopping_list, merge=True, **data):
+    url = reverse("add-shopping-item", args=[shopping_list.id])
+    if merge:
+        url += "?merge=true"
+    return client.post(url, {"purchased": False, **data}, format="json")
+
+
+@pytest.mark.django_db
+def test_merged_adds_sum_quantities(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+
+    first = add(client, shopping_list, name="Milk", quantity="1", unit="l")
+    second = add(client, shopping_list, name="  milk ", quantity="0.5", unit="L")
+
+    assert first.status_code == status.HTTP_201_CREATED
+    assert second.data["id"] == first.data["id"]
+    item = ShoppingItem.objects.get()
+    assert item.quantity == Decimal("1.5")
+    assert item.name == "Milk"
+
+
+@pytest.mark.django_db
+def test_merge_keeps_units_and_plain_adds_apart(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+
+    add(client, shopping_list, name="Milk", quantity="1", unit="l")
+    add(client, shopping_list, name="Milk", quantity="500", unit="ml")
+    add(client, shopping_list, merge=False, name="Milk")
+    add(client, shopping_list, merge=False, name="Milk")
+
+    assert ShoppingItem.objects.count() == 4
+
+
+@pytest.mark.django_db
+def test_merge_into_purchased_item_starts_over(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+
+    add(client, shopping_list, name="Eggs", quantity="6")
+    ShoppingItem.objects.update(purchased=True)
+    add(client, shopping_list, name="Eggs", quantity="12")
+
+    item = ShoppingItem.objects.get()
+    assert item.quantity == 12
+    assert item.purchased is False
+
+
+@pytest.mark.django_db
+def test_renamed_item_leaves_merge_group(create_user, create_authenticated_client, create_shopping_list):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+
+    response = add(client, shopping_list, name="Milk")
+    client.patch(reverse("shopping-item-detail", args=[shopping_list.id, response.data["id"]]), {"name": "Oat milk"}, format="json")
+    add(client, shopping_list, name="Milk")
+
+    assert ShoppingItem.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_totals_are_summed_across_member_lists(create_user, create_authenticated_client, create_shopping_list, create_shopping_item):
+    user = create_user()
+    groceries = create_shopping_list(user, name="Groceries")
+    party = create_shopping_list(user, name="Party")
+    other = create_shopping_list(create_user(email="other@example.com"), name="Other")
+    ShoppingItem.objects.create(shopping_list=groceries, name="Milk", quantity=1, unit="l", purchased=False)
+    ShoppingItem.objects.create(shopping_list=party, name="milk", quantity=2, unit="l", purchased=False)
+    ShoppingItem.objects.create(shopping_list=party, name="Milk", quantity=3, unit="l", purchased=True)
+    ShoppingItem.objects.create(shopping_list=other, name="Milk", quantity=5, unit="l", purchased=False)
+    client = create_authenticated_client(user)
+
+    response = client.get(reverse("shopping-item-totals"), {"purchased": "false"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == [{"name": "milk", "unit": "l", "quantity": "3.000", "items": 2, "shopping_lists": 2}]
@@ -0,0 +1,70 @@
+import logging
+
+import pytest
+
+from django.urls import reverse
+from rest_framework import status
+
+from core.querybudget import QueryBudgetExceeded
+from shopping_list.api.views import ShoppingListDetail
+from shopping_list.models import ShoppingList
+from shopping_list.tests.conftest import create_shopping_items
+from user.tests.conftest import create_user, create_users, create_authenticated_client
+
+
+@pytest.mark.django_db
+def test_block_within_budget_passes(query_budget):
+    with query_budget(1) as budget:
+        ShoppingList.objects.count()
+
+    assert len(budget.queries) == 1
+
+
+@pytest.mark.django_db
+def test_block_over_budget_fails_with_sql_and_stack(query_budget):
+    with pytest.raises(QueryBudgetExceeded) as error:
+        with query_budget(1):
+            ShoppingList.objects.count()
+            list(ShoppingList.objects.filter(name="Groceries"))
+
+    message = str(error.value)
+    assert "ran 2 queries, its budget is 1" in message
+    assert "2. SELECT" in message
+    assert "test_block_over_budget_fails_with_sql_and_stack" in message
+
+
+@pytest.mark.django_db
+def test_view_over_budget_fails(create_user, create_authenticated_client, create_shopping_list, monkeypatch):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    monkeypatch.setitem(ShoppingListDetail.query_budgets, "GET", 1)
+
+    with pytest.raises(QueryBudgetExceeded):
+        create_authenticated_client(user).get(reverse("shopping-list-detail", args=[shopping_list.id]))
+
+
+@pytest.mark.django_db
+def test_view_over_budget_is_logged_in_log_mode(create_user, create_authenticated_client, create_shopping_list, monkeypatch, settings, caplog):
+    settings.QUERY_BUDGET_MODE = "log"
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    monkeypatch.setitem(ShoppingListDetail.query_budgets, "GET", 1)
+
+    with caplog.at_level(logging.WARNING, logger="core.querybudget"):
+        response = create_authenticated_client(user).get(reverse("shopping-list-detail", args=[shopping_list.id]))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "ShoppingListDetail GET ran" in caplog.text
+
+
+@pytest.mark.django_db
+def test_detail_budget_holds_for_large_lists(create_user, create_users, create_authenticated_client, create_shopping_list, create_shopping_items):
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    shopping_list.add_members([member.pk for member in create_users(30)])
+    create_shopping_items(200, shopping_list)
+
+    response = create_authenticated_client(user).get(reverse("shopping-list-detail", args=[shopping_list.id]))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data["shopping_items"]) == 200
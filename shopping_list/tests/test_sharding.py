@@ -0,0 +1,220 @@
+import pytest
+
+from core.querybudget import query_budget
+
+from django.db import connections
+from django.db.migrations.loader import MigrationLoader
+from django.urls import reverse
+from rest_framework import status
+
+from shopping_list.archive import archive_shopping_lists
+from shopping_list.models import ArchivedShoppingList, ShoppingItem, ShoppingList, ShoppingListMembership
+from shopping_list.sharding import fan_out, group_by_shard, new_id_on, shard_for
+from user.tests.conftest import create_user, create_authenticated_client
+
+
+SHARDS = ["shard_0", "shard_1"]
+
+sharded_db = pytest.mark.django_db(transaction=True, databases=["default", *SHARDS])
+
+
+@pytest.fixture
+def shards(settings):
+    settings.SHOPPING_LIST_SHARDS = SHARDS
+    return SHARDS
+
+
+@pytest.fixture
+def create_list_on():
+    def _create_list_on(alias, user, name="Groceries"):
+        shopping_list = ShoppingList.objects.create(id=new_id_on(alias), name=name)
+        shopping_list.add_members([user.pk])
+        return shopping_list
+
+    return _create_list_on
+
+
+def test_shard_for_is_stable_and_spreads_ids(shards):
+    ids = [new_id_on("shard_0") for _ in range(5)] + [new_id_on("shard_1") for _ in range(5)]
+
+    assert {shard_for(shopping_list_id) for shopping_list_id in ids[:5]} == {"shard_0"}
+    assert {shard_for(str(shopping_list_id)) for shopping_list_id in ids[5:]} == {"shard_1"}
+    assert {alias: len(grouped) for alias, grouped in group_by_shard(ids).items()} == {"shard_0": 5, "shard_1": 5}
+
+
+def test_single_shard_routes_everything_to_default(settings):
+    settings.SHOPPING_LIST_SHARDS = ["default"]
+
+    assert shard_for(new_id_on("default")) == "default"
+
+
+@sharded_db
+def test_created_lists_and_items_land_on_their_shard(shards, create_user, create_authenticated_client):
+    user = create_user()
+    client = create_authenticated_client(user)
+
+    for index in range(6):
+        response = client.post(reverse("all-shopping-lists"), {"name": f"List {index}"}, format="json")
+        assert response.status_code == status.HTTP_201_CREATED
+        shopping_list_id = response.data["id"]
+        response = client.post(
+            reverse("add-shopping-item", args=[shopping_list_id]), {"name": "Milk", "purchased": False}, format="json"
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+        alias = shard_for(shopping_list_id)
+        other = SHARDS[1 - SHARDS.index(alias)]
+        assert ShoppingList.objects.using(alias).filter(pk=shopping_list_id).exists()
+        assert not ShoppingList.objects.using(other).filter(pk=shopping_list_id).exists()
+        assert ShoppingItem.objects.using(alias).filter(shopping_list_id=shopping_list_id).count() == 1
+
+    assert ShoppingListMembership.objects.filter(customuser=user).count() == 6
+    assert not ShoppingList.objects.using("default").exists()
+
+
+@sharded_db
+def test_idempotent_create_is_replayed_with_sharding(shards, create_user, create_authenticated_client):
+    client = create_authenticated_client(create_user())
+
+    responses = [
+        client.post(reverse("all-shopping-lists"), {"name": "Weekly"}, format="json", HTTP_IDEMPOTENCY_KEY="create-1")
+        for _ in range(2)
+    ]
+
+    assert [response.status_code for response in responses] == [status.HTTP_201_CREATED] * 2
+    assert responses[0].data["id"] == responses[1].data["id"]
+    assert ShoppingList.objects.using(shard_for(responses[0].data["id"])).count() == 1
+
+
+@sharded_db
+def test_query_budgets_count_queries_of_fanned_out_shards(shards):
+    with query_budget(10, mode="raise") as budget:
+        fan_out(lambda alias: list(ShoppingList.objects.using(alias).all()), SHARDS)
+
+    assert len(budget.queries) == 2
+
+
+@sharded_db
+def test_list_endpoint_reads_every_shard(shards, create_user, create_authenticated_client, create_list_on):
+    user = create_user()
+    stranger = create_user(email="stranger@example.com")
+    on_0 = create_list_on("shard_0", user, "Weekly")
+    on_1 = create_list_on("shard_1", user, "Party")
+    create_list_on("shard_1", stranger, "Not mine")
+    client = create_authenticated_client(user)
+
+    response = client.get(reverse("all-shopping-lists"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert sorted(shopping_list["id"] for shopping_list in response.data) == sorted([str(on_0.pk), str(on_1.pk)])
+
+
+@sharded_db
+def test_detail_item_and_move_endpoints_use_the_list_shard(shards, create_user, create_authenticated_client, create_list_on):
+    user = create_user()
+    shopping_list = create_list_on("shard_1", user)
+    first = ShoppingItem.objects.create(shopping_list=shopping_list, name="Eggs", purchased=False)
+    second = ShoppingItem.objects.create(shopping_list=shopping_list, name="Bread", purchased=False)
+    client = create_authenticated_client(user)
+
+    response = client.get(reverse("shopping-list-detail", args=[shopping_list.pk]))
+    assert [item["name"] for item in response.data["shopping_items"]] == ["Eggs", "Bread"]
+    assert [member["email"] for member in response.data["members"]] == [user.email]
+
+    response = client.patch(
+        reverse("shopping-item-detail", args=[shopping_list.pk, first.pk]), {"purchased": True}, format="json"
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert ShoppingItem.objects.using("shard_1").get(pk=first.pk).purchased
+
+    response = client.post(
+        reverse("move-shopping-item", args=[shopping_list.pk, first.pk]), {"after": str(second.pk)}, format="json"
+    )
+    assert response.status_code == status.HTTP_200_OK
+    items = ShoppingItem.objects.for_list(shopping_list.pk).filter(shopping_list=shopping_list)
+    assert list(items.values_list("name", flat=True)) == ["Bread", "Eggs"]
+
+    response = client.delete(reverse("shopping-list-detail", args=[shopping_list.pk]))
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert not ShoppingItem.objects.using("shard_1").exists()
+    assert not ShoppingListMembership.objects.exists()
+
+
+@sharded_db
+def test_totals_add_up_across_shards(shards, create_user, create_authenticated_client, create_list_on):
+    user = create_user()
+    for alias in SHARDS:
+        shopping_list = create_list_on(alias, user)
+        ShoppingItem.objects.create(shopping_list=shopping_list, name="Milk", quantity=2, unit="l", purchased=False)
+    client = create_authenticated_client(user)
+
+    response = client.get(reverse("shopping-item-totals"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == [{"name": "milk", "unit": "l", "quantity": "4.000", "items": 2, "shopping_lists": 2}]
+
+
+@sharded_db
+def test_clone_stays_on_the_shard_of_its_source(shards, create_user, create_authenticated_client, create_list_on):
+    user = create_user()
+    shopping_list = create_list_on("shard_0", user)
+    ShoppingItem.objects.create(shopping_list=shopping_list, name="Rice", purchased=True)
+    client = create_authenticated_client(user)
+
+    response = client.post(reverse("clone-shopping-list", args=[shopping_list.pk]), {}, format="json")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert shard_for(response.data["id"]) == "shard_0"
+    assert [item["name"] for item in response.data["shopping_items"]] == ["Rice"]
+    assert ShoppingListMembership.objects.filter(shoppinglist_id=response.data["id"], customuser=user).exists()
+
+
+@sharded_db
+def test_archive_and_restore_within_a_shard(shards, create_user, create_authenticated_client, create_list_on):
+    user = create_user()
+    shopping_list = create_list_on("shard_1", user)
+    ShoppingItem.objects.create(shopping_list=shopping_list, name="Tea", purchased=False)
+
+    assert archive_shopping_lists(ShoppingList.objects.using("shard_1").all()) == 1
+    assert ArchivedShoppingList.objects.using("shard_1").filter(pk=shopping_list.pk).exists()
+    assert not ShoppingList.objects.using("shard_1").exists()
+
+    client = create_authenticated_client(user)
+    response = client.get(reverse("archived-shopping-lists"))
+    assert [archived["id"] for archived in response.data] == [str(shopping_list.pk)]
+
+    response = client.post(reverse("restore-archived-shopping-list", args=[shopping_list.pk]))
+    assert response.status_code == status.HTTP_201_CREATED
+    assert [item["name"] for item in response.data["shopping_items"]] == ["Tea"]
+    assert ShoppingListMembership.objects.filter(shoppinglist_id=shopping_list.pk, customuser=user).exists()
+
+
+@sharded_db
+def test_user_stats_add_up_across_shards(shards, create_user, create_authenticated_client, create_list_on):
+    user = create_user()
+    for alias in SHARDS:
+        shopping_list = create_list_on(alias, user)
+        ShoppingItem.objects.create(shopping_list=shopping_list, name="Milk", purchased=False)
+        ShoppingItem.objects.create(shopping_list=shopping_list, name="Eggs", purchased=True)
+    client = create_authenticated_client(user)
+
+    response = client.get(reverse("user-stats"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert (response.data["shopping_lists"], response.data["open_items"], response.data["purchased_this_week"]) == (2, 2, 2)
+
+
+@pytest.mark.parametrize("migration_name", ["0002_shoppinglist_members", "0003_archive"])
+@sharded_db
+def test_member_tables_are_only_created_on_the_default_database(shards, migration_name):
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    migration = loader.get_migration("shopping_list", migration_name)
+    sql = {}
+    for alias in ("default", "shard_0"):
+        state = loader.project_state([loader.check_key(key, "shopping_list") for key in migration.dependencies])
+        with connections[alias].schema_editor(collect_sql=True) as editor:
+            migration.apply(state, editor)
+        sql[alias] = " ".join(editor.collected_sql)
+
+    assert "_members" in sql["default"]
+    assert "_members" not in sql["shard_0"]
@@ -0,0 +1,48 @@
+import subprocess
+
+import pytest
+
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+
+from core.prewarm import prewarm
+from core.management.commands.profile_startup import parse_importtime
+
+
+@pytest.mark.django_db
+def test_prewarm_does_not_touch_the_database(django_assert_num_queries):
+    with django_assert_num_queries(0):
+        prewarm(freeze=False)
+
+
+def test_importtime_output_is_grouped_by_package():
+    lines = [
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |     django.utils",
+        "import time:       300 |        400 |   django",
+        "import time:        50 |         50 | shopping_list",
+    ]
+
+    per_package, per_module = parse_importtime(lines)
+
+    assert per_package == pytest.approx({"django": 0.0004, "shopping_list": 0.00005})
+    assert per_module["django"] == 0.0004
+
+
+def test_profile_startup_reports_a_child_killed_without_output(monkeypatch):
+    monkeypatch.setattr(
+        subprocess, "run", lambda *args, **kwargs: subprocess.CompletedProcess(args, -9, stdout="", stderr="")
+    )
+
+    with pytest.raises(CommandError, match="status -9"):
+        call_command("profile_startup")
+
+
+def test_profile_startup_reports_phases():
+    out = StringIO()
+
+    call_command("profile_startup", "--top", "3", stdout=out)
+
+    assert "app registry" in out.getvalue()
+    assert "url resolver" in out.getvalue()
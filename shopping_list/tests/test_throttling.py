@@ -0,0 +1,106 @@
+import pytest
+
+from django.conf import settings as django_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+
+from shopping_list.api.permissions import AllShoppingItemsShoppingListMembersOnly
+from shopping_list.api.throttling import CacheTokenBucketStore, ShoppingListTokenBucketThrottle, UserTokenBucketThrottle
+from shopping_list.api.views import AddShoppingItem
+from user.views import APITokenDetail
+from user.tests.conftest import create_user, create_authenticated_client
+
+
+@pytest.fixture
+def throttle_rates(settings):
+
+    def _throttle_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **django_settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": rates,
+        }
+
+    return _throttle_rates
+
+
+@pytest.mark.django_db
+def test_shopping_list_reads_are_throttled_with_retry_after(
+    create_user, create_shopping_list, create_authenticated_client, throttle_rates
+):
+    throttle_rates(list_read="2/min")
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+    url = reverse("shopping-list-detail", args=[shopping_list.id])
+
+    responses = [client.get(url) for _ in range(3)]
+
+    assert [response.status_code for response in responses[:2]] == [status.HTTP_200_OK] * 2
+    assert responses[2].status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(responses[2]["Retry-After"]) > 0
+
+
+@pytest.mark.django_db
+def test_read_and_write_budgets_are_separate(
+    create_user, create_shopping_list, create_authenticated_client, throttle_rates
+):
+    throttle_rates(user_read="1/min", user_write="5/min")
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    client = create_authenticated_client(user)
+    url = reverse("shopping-list-detail", args=[shopping_list.id])
+
+    assert client.get(url).status_code == status.HTTP_200_OK
+    assert client.get(url).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert client.patch(url, {"name": "Food"}, format="json").status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_list_throttle_shares_the_membership_query_with_permissions(
+    create_user, create_shopping_list, django_assert_num_queries, throttle_rates
+):
+    throttle_rates(user_read="10/min", list_read="10/min")
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    request = APIRequestFactory().get("/")
+    request.user = user
+    view = AddShoppingItem(kwargs={"pk": shopping_list.pk})
+
+    with django_assert_num_queries(1):
+        assert UserTokenBucketThrottle().allow_request(request, view)
+        assert ShoppingListTokenBucketThrottle().allow_request(request, view)
+        assert AllShoppingItemsShoppingListMembersOnly().has_permission(request, view)
+
+
+@pytest.mark.django_db
+def test_non_members_do_not_spend_the_list_budget(
+    create_user, create_shopping_list, create_authenticated_client, throttle_rates
+):
+    throttle_rates(list_read="2/min")
+    user = create_user()
+    shopping_list = create_shopping_list(user)
+    stranger = create_authenticated_client(create_user(email="stranger@example.com"))
+    url = reverse("shopping-list-detail", args=[shopping_list.id])
+
+    assert [stranger.get(url).status_code for _ in range(3)] == [status.HTTP_403_FORBIDDEN] * 3
+    client = create_authenticated_client(user)
+    assert [client.get(url).status_code for _ in range(2)] == [status.HTTP_200_OK] * 2
+
+
+def test_views_without_a_list_are_not_list_throttled(throttle_rates):
+    throttle_rates(list_read="1/min")
+    request = APIRequestFactory().get("/")
+    view = APITokenDetail(kwargs={"pk": 1})
+
+    assert all(ShoppingListTokenBucketThrottle().allow_request(request, view) for _ in range(3))
+
+
+def test_cache_store_can_be_cleared():
+    store = CacheTokenBucketStore()
+    store.consume("list_read:1", 1, 1 / 60)
+    assert store.consume("list_read:1", 1, 1 / 60) > 0
+
+    store.clear()
+
+    assert store.consume("list_read:1", 1, 1 / 60) == 0
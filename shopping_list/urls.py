@@ -1,12 +1,39 @@
 from django.urls import path, include
 
-from shopping_list.api.views import AddShoppingItem, ListAddShoppingList, ShoppingItemDetail, ShoppingListDetail
+from shopping_list.api.views import (
+    AddShoppingItem,
+    CloneShoppingList,
+    ExportShoppingList,
+    ListAddShoppingList,
+    ListArchivedShoppingList,
+    ListShoppingListTemplate,
+    MoveShoppingItem,
+    RestoreArchivedShoppingList,
+    ShoppingItemBatch,
+    ShoppingItemDetail,
+    ShoppingItemTotals,
+    ShoppingListDetail,
+    ShoppingListHistory,
+    ShoppingListMemberDetail,
+    ShoppingListMembers,
+)
 
 
 urlpatterns = [
     path("api-auth/", include("rest_framework.urls", namespace="rest_framework")),
     path("api/shopping-lists/", ListAddShoppingList.as_view(), name="all-shopping-lists"),
     path("api/shopping-lists/<uuid:pk>/", ShoppingListDetail.as_view(), name="shopping-list-detail"),
+    path("api/shopping-lists/<uuid:pk>/members/", ShoppingListMembers.as_view(), name="shopping-list-members"),
+    path("api/shopping-lists/<uuid:pk>/members/<int:member_pk>/", ShoppingListMemberDetail.as_view(), name="shopping-list-member-detail"),
+    path("api/shopping-lists/<uuid:pk>/clone/", CloneShoppingList.as_view(), name="clone-shopping-list"),
+    path("api/shopping-lists/<uuid:pk>/export/", ExportShoppingList.as_view(), name="export-shopping-list"),
+    path("api/shopping-lists/<uuid:pk>/history/", ShoppingListHistory.as_view(), name="shopping-list-history"),
     path("api/shopping-lists/<uuid:pk>/shopping-items/", AddShoppingItem.as_view(), name="add-shopping-item"),
+    path("api/shopping-lists/<uuid:pk>/shopping-items/batch/", ShoppingItemBatch.as_view(), name="shopping-item-batch"),
     path("api/shopping-lists/<uuid:pk>/shopping-items/<uuid:item_pk>/", ShoppingItemDetail.as_view(), name="shopping-item-detail"),
+    path("api/shopping-lists/<uuid:pk>/shopping-items/<uuid:item_pk>/move/", MoveShoppingItem.as_view(), name="move-shopping-item"),
+    path("api/shopping-list-templates/", ListShoppingListTemplate.as_view(), name="shopping-list-templates"),
+    path("api/shopping-items/totals/", ShoppingItemTotals.as_view(), name="shopping-item-totals"),
+    path("api/archived-shopping-lists/", ListArchivedShoppingList.as_view(), name="archived-shopping-lists"),
+    path("api/archived-shopping-lists/<uuid:pk>/restore/", RestoreArchivedShoppingList.as_view(), name="restore-archived-shopping-list"),
 ]
@@ -1,16 +1,58 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.db.models import Count, Q
+from django.db.models.functions import Lower
+from django.urls import reverse
+from django.utils.html import format_html
 
+from core.paginator import EstimatedCountPaginator
+from shopping_list.models import ShoppingList
 from .forms import CustomUserCreationForm, CustomUserChangeForm
 from .models import CustomUser
 
 
+class ShoppingListMembershipInline(admin.TabularInline):
+    """
+    Read-only view of a user's shopping lists. Item totals come from one
+    aggregate query, the items themselves are never loaded.
+    """
+    model = ShoppingList.members.through
+    verbose_name = "shopping list"
+    verbose_name_plural = "shopping lists"
+    fields = ("shopping_list", "item_count", "open_item_count")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("shoppinglist").annotate(
+            item_count=Count("shoppinglist__shopping_items"),
+            open_item_count=Count("shoppinglist__shopping_items", filter=Q(shoppinglist__shopping_items__purchased=False)),
+        )
+
+    @admin.display(description="shopping list")
+    def shopping_list(self, obj):
+        url = reverse("admin:shopping_list_shoppinglist_change", args=[obj.shoppinglist_id])
+        return format_html('<a href="{}">{}</a>', url, obj.shoppinglist.name)
+
+    @admin.display(description="items")
+    def item_count(self, obj):
+        return obj.item_count
+
+    @admin.display(description="open items")
+    def open_item_count(self, obj):
+        return obj.open_item_count
+
+
 class CustomUserAdmin(UserAdmin):
     add_form = CustomUserCreationForm
     form = CustomUserChangeForm
     model = CustomUser
     list_display = ("email", "is_staff", "is_active",)
-    list_filter = ("email", "is_staff", "is_active",)
+    list_filter = ("is_staff", "is_active",)
     fieldsets = (
         (None, {"fields": ("email", "password")}),
         ("Permissions", {"fields": ("is_staff", "is_active", "groups", "user_permissions")}),
@@ -26,6 +68,18 @@ class CustomUserAdmin(UserAdmin):
     )
     search_fields = ("email",)
     ordering = ("email",)
+    inlines = (ShoppingListMembershipInline,)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # On PostgreSQL a prefix match on LOWER(email) uses the
+        # text_pattern_ops index of migration 0004, the default icontains
+        # search always scans the table.
+        search_term = search_term.strip().lower()
+        if not search_term:
+            return queryset, False
+        return queryset.alias(email_lower=Lower("email")).filter(email_lower__startswith=search_term), False
 
 
 admin.site.register(CustomUser, CustomUserAdmin)
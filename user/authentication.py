@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from user.models import APIToken, CustomUser
+
+
+# Fields kept for a resolved principal. They are enough for the permission
+# classes in this project, anything else is loaded lazily from the database.
+PRINCIPAL_FIELDS = ("id", "email", "is_superuser", "is_staff", "is_active")
+
+
+class PrincipalCache:
+    """
+    Small in-process TTL cache mapping token digests to user fields.
+
+    Entries are evicted least recently used once ``max_entries`` is reached.
+    """
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, "API_TOKEN_CACHE_TTL", 30)
+
+    @property
+    def max_entries(self):
+        return getattr(settings, "API_TOKEN_CACHE_MAX_ENTRIES", 10000)
+
+    def get(self, key_hash):
+        with self._lock:
+            entry = self._entries.get(key_hash)
+            if entry is None:
+                return None
+            expires, principal = entry
+            if expires < time.monotonic():
+                del self._entries[key_hash]
+                return None
+            self._entries.move_to_end(key_hash)
+            return principal
+
+    def set(self, key_hash, principal):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key_hash] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(key_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key_hash):
+        with self._lock:
+            self._entries.pop(key_hash, None)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            stale = [key for key, (_, principal) in self._entries.items() if principal["id"] == user_id]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache()
+
+
+def principal_to_user(principal):
+    """
+    Build a CustomUser from cached fields without touching the database.
+    Fields that are not cached are deferred, so saving the instance only
+    writes the fields that were actually loaded.
+    """
+    field_names = [f.attname for f in CustomUser._meta.concrete_fields if f.attname in principal]
+    return CustomUser.from_db(DEFAULT_DB_ALIAS, field_names, [principal[name] for name in field_names])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Authenticates ``Authorization: Token <key>`` headers against APIToken.
+
+    Resolved principals are cached in-process for API_TOKEN_CACHE_TTL seconds,
+    so repeated requests with the same key do not query the database.
+    """
+    def authenticate_credentials(self, key):
+        key_hash = APIToken.hash_key(key)
+
+        principal = principal_cache.get(key_hash)
+        if principal is None:
+            principal = (
+                CustomUser.objects
+                .filter(api_tokens__key_hash=key_hash, api_tokens__revoked_at__isnull=True)
+                .values(*PRINCIPAL_FIELDS)
+                .first()
+            )
+            if principal is None:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            principal_cache.set(key_hash, principal)
+
+        if not principal["is_active"]:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        return principal_to_user(principal), key_hash
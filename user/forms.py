@@ -9,6 +9,9 @@ class CustomUserCreationForm(UserCreationForm):
         model = CustomUser
         fields = ("email",)
 
+    def clean_email(self):
+        return CustomUser.objects.normalize_email(self.cleaned_data["email"])
+
 
 class CustomUserChangeForm(UserChangeForm):
 
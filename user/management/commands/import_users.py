@@ -0,0 +1,27 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from user.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Bulk create users from a CSV file with email and password columns."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--processes", type=int, default=None, help="Hashing processes, one per core by default.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--skip-existing", action="store_true", help="Ignore emails that already exist.")
+
+    def handle(self, *args, **options):
+        with open(options["path"], newline="") as f:
+            rows = [(row["email"], row["password"]) for row in csv.DictReader(f)]
+
+        created = CustomUser.objects.bulk_create_users(
+            rows,
+            processes=options["processes"],
+            batch_size=options["batch_size"],
+            ignore_conflicts=options["skip_existing"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Imported {len(created)} of {len(rows)} users."))
@@ -1,12 +1,45 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
 from django.contrib.auth.base_user import BaseUserManager
+from django.contrib.auth.hashers import make_password
+from django.db.models.functions import Lower
 from django.utils.translation import gettext_lazy as _
 
 
+# Below this many passwords a process pool costs more than it saves.
+PARALLEL_HASHING_THRESHOLD = 200
+
+
 class CustomUserManager(BaseUserManager):
     """
     Custom user model manager where email is the unique identifiers
     for authentication instead of usernames.
     """
+    @classmethod
+    def normalize_email(cls, email):
+        """
+        Lowercase the whole address, emails are matched case-insensitively.
+        """
+        return super().normalize_email(email).lower()
+
+    def filter_by_email(self, email):
+        """
+        Case-insensitive email lookup. Filtering on LOWER(email) lets the
+        database use the functional unique index instead of scanning.
+        """
+        return self.alias(email_lower=Lower("email")).filter(email_lower=email.lower())
+
+    def filter_by_emails(self, emails):
+        """
+        Case-insensitive lookup of many emails with a single IN query.
+        """
+        return self.alias(email_lower=Lower("email")).filter(email_lower__in={email.lower() for email in emails})
+
+    def get_by_natural_key(self, username):
+        return self.filter_by_email(username).get()
+
     def create_user(self, email, password, **extra_fields):
         """
         Create and save a user with the given email and password.
@@ -31,4 +64,46 @@ class CustomUserManager(BaseUserManager):
             raise ValueError(_("Superuser must have is_staff=True."))
         if extra_fields.get("is_superuser") is not True:
             raise ValueError(_("Superuser must have is_superuser=True."))
-        return self.create_user(email, password, **extra_fields)
\ No newline at end of file
+        return self.create_user(email, password, **extra_fields)
+
+    def bulk_create_users(self, users, processes=None, batch_size=1000, ignore_conflicts=False):
+        """
+        Create many users from ``(email, password)`` pairs with bulk inserts.
+        Returns the users created.
+
+        Password hashing is CPU-bound, so for large imports it is spread over
+        a process pool of ``processes`` workers (one per core by default).
+        Pass ``processes=1`` to hash in the current process.
+
+        With ``ignore_conflicts`` emails that already exist, or repeat an
+        earlier row, are skipped before their passwords are hashed.
+        """
+        users = [(self.normalize_email(email), password) for email, password in users]
+        for email, _password in users:
+            if not email:
+                raise ValueError(_("The Email must be set"))
+
+        if ignore_conflicts:
+            existing = set()
+            emails = [email for email, _password in users]
+            for start in range(0, len(emails), batch_size):
+                existing.update(self.filter_by_emails(emails[start:start + batch_size]).values_list("email", flat=True))
+            first = {}
+            for email, password in users:
+                if email not in existing:
+                    first.setdefault(email, password)
+            users = list(first.items())
+
+        passwords = [password for _email, password in users]
+        workers = processes or os.cpu_count() or 1
+        if workers == 1 or len(passwords) < PARALLEL_HASHING_THRESHOLD:
+            hashes = [make_password(password) for password in passwords]
+        else:
+            # Workers set Django up themselves, so hashing also works when
+            # processes are spawned instead of forked.
+            with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+                chunksize = max(1, len(passwords) // (workers * 4))
+                hashes = list(executor.map(make_password, passwords, chunksize=chunksize))
+
+        objs = [self.model(email=email, password=hashed) for (email, _password), hashed in zip(users, hashes)]
+        return self.bulk_create(objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts)
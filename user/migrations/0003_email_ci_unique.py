@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:24
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.functions.text
+from django.db.models.functions import Lower
+
+
+def report_email_collisions(apps, schema_editor):
+    """
+    Refuse to add the case-insensitive constraint while emails differing only
+    by case exist, listing every colliding account so they can be merged.
+    """
+    CustomUser = apps.get_model("user", "CustomUser")
+    users = CustomUser.objects.using(schema_editor.connection.alias).annotate(email_lower=Lower("email"))
+
+    duplicated = (
+        users.values("email_lower").annotate(total=Count("id")).filter(total__gt=1).values_list("email_lower", flat=True)
+    )
+    collisions = {}
+    for email_lower, pk, email in users.filter(email_lower__in=duplicated).values_list("email_lower", "id", "email"):
+        collisions.setdefault(email_lower, []).append(f"{email} (id={pk})")
+
+    if collisions:
+        report = "\n".join(f"  {key}: {', '.join(accounts)}" for key, accounts in sorted(collisions.items()))
+        raise RuntimeError(
+            f"{len(collisions)} emails collide when compared case-insensitively, "
+            f"merge or rename these accounts before migrating:\n{report}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_apitoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(report_email_collisions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='customuser',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='user_customuser_email_ci_unique'),
+        ),
+    ]
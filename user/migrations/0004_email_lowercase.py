@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:12
+
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+INDEX_NAME = "user_customuser_email_lower_like"
+
+
+def lowercase_emails(apps, schema_editor):
+    """
+    Store the emails of accounts created before normalize_email lowercased
+    them in lowercase too. 0003 guarantees this can't create duplicates.
+    """
+    CustomUser = apps.get_model("user", "CustomUser")
+    users = CustomUser.objects.using(schema_editor.connection.alias)
+    users.exclude(email=Lower("email")).update(email=Lower("email"))
+
+
+def create_email_prefix_index(apps, schema_editor):
+    """
+    The unique index on LOWER(email) only serves equality. A LIKE 'prefix%'
+    search, as done by the admin, needs the text_pattern_ops operator class
+    unless the database uses the C collation. Other databases don't support
+    operator classes, SQLite can't use an index for Django's LIKE ... ESCAPE
+    anyway.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    table = apps.get_model("user", "CustomUser")._meta.db_table
+    schema_editor.execute(f'CREATE INDEX "{INDEX_NAME}" ON "{table}" (LOWER("email") text_pattern_ops)')
+
+
+def drop_email_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS "{INDEX_NAME}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0003_email_ci_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+        migrations.RunPython(create_email_prefix_index, drop_email_prefix_index),
+    ]
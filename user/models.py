@@ -1,5 +1,10 @@
+import hashlib
+import secrets
+
+from django.conf import settings
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
@@ -17,5 +22,48 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
 
     objects = CustomUserManager()
 
+    class Meta:
+        constraints = [
+            # Case-insensitive uniqueness, also the index behind email lookups
+            # in CustomUserManager.
+            models.UniqueConstraint(Lower("email"), name="user_customuser_email_ci_unique"),
+        ]
+
+    def __str__(self):
+        return self.email
+
+
+class APIToken(models.Model):
+    """
+    API key for stateless clients. Only a SHA-256 digest of the key is stored,
+    the raw key is handed out once when the token is created.
+    """
+    key_hash = models.CharField(max_length=64, unique=True, editable=False)
+    prefix = models.CharField(max_length=8, editable=False)
+    name = models.CharField(max_length=100, blank=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="api_tokens")
+    created = models.DateTimeField(default=timezone.now)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self):
-        return self.email
\ No newline at end of file
+        return f"{self.prefix}… ({self.user_id})"
+
+    @staticmethod
+    def hash_key(key):
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @classmethod
+    def generate(cls, user, name=""):
+        """
+        Create a token for the user and return it together with the raw key.
+        """
+        key = secrets.token_urlsafe(32)
+        token = cls.objects.create(user=user, name=name, key_hash=cls.hash_key(key), prefix=key[:8])
+        return token, key
+
+    def revoke(self):
+        from user.authentication import principal_cache
+
+        self.revoked_at = timezone.now()
+        self.save(update_fields=["revoked_at"])
+        principal_cache.invalidate(self.key_hash)
@@ -1,9 +1,37 @@
 from rest_framework import serializers
-from user.models import CustomUser
+from user.models import APIToken, CustomUser
 
 class UserSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CustomUser
         fields = ["id", "email"]
-        
\ No newline at end of file
+
+
+class APITokenSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = APIToken
+        fields = ["id", "name", "prefix", "created", "revoked_at"]
+        read_only_fields = ("id", "prefix", "created", "revoked_at")
+
+    def create(self, validated_data):
+        token, key = APIToken.generate(self.context["request"].user, **validated_data)
+        # The raw key is only ever available on the creation response.
+        token.key = key
+        return token
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if hasattr(instance, "key"):
+            data["key"] = instance.key
+        return data
+
+
+class UserStatsSerializer(serializers.Serializer):
+    shopping_lists = serializers.IntegerField()
+    templates = serializers.IntegerField()
+    items = serializers.IntegerField()
+    open_items = serializers.IntegerField()
+    purchased_this_week = serializers.IntegerField()
+    week_start = serializers.DateTimeField()
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from user.authentication import principal_cache
+from user.models import APIToken, CustomUser
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_principals(sender, instance, **kwargs):
+    principal_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=APIToken)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    principal_cache.invalidate(instance.key_hash)
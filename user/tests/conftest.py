@@ -1,21 +1,49 @@
 import pytest
 
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
 from rest_framework.test import APIClient
 
 from user.models import CustomUser
 
 
+TEST_PASSWORD = "testpass123"
+
+_password_hashes = {}
+
+
+def password_hash():
+    """
+    TEST_PASSWORD hashed once per hasher instead of once per user.
+    """
+    hasher = settings.PASSWORD_HASHERS[0]
+    if hasher not in _password_hashes:
+        _password_hashes[hasher] = make_password(TEST_PASSWORD)
+    return _password_hashes[hasher]
+
+
 @pytest.fixture(scope="session")
 def create_user():
     def _create_user(email: str = "a@a.com"):
-        return CustomUser.objects.create_user(email, password="testpass123")
+        return CustomUser.objects.create(email=CustomUser.objects.normalize_email(email), password=password_hash())
     
     return _create_user
 
+
+@pytest.fixture(scope="session")
+def create_users():
+    def _create_users(count: int, email: str = "user{}@example.com"):
+        return CustomUser.objects.bulk_create(
+            [CustomUser(email=email.format(i), password=password_hash()) for i in range(count)]
+        )
+
+    return _create_users
+
+
 @pytest.fixture(scope="session")
 def create_superuser():
     def _create_user(**kwargs):
-        return CustomUser.objects.create_superuser(email="a@a.com", password="testpass123")
+        return CustomUser.objects.create_superuser(email="a@a.com", password=TEST_PASSWORD)
     
     return _create_user
 
@@ -30,4 +58,3 @@ def create_authenticated_client():
         return client
     
     return _create_authenticated_client
-
@@ -0,0 +1,44 @@
+import pytest
+
+from django.urls import reverse
+
+from shopping_list.tests.conftest import create_shopping_item, create_shopping_list
+from user.tests.conftest import create_user
+
+
+@pytest.mark.django_db
+def test_user_changelist_searches_by_email_prefix(admin_client, create_user):
+    create_user(email="anna@mail.com")
+    create_user(email="bob@mail.com")
+
+    response = admin_client.get(reverse("admin:user_customuser_changelist"), {"q": "ann"})
+
+    emails = [user.email for user in response.context["cl"].result_list]
+    assert emails == ["anna@mail.com"]
+
+
+@pytest.mark.django_db
+def test_user_changelist_has_no_per_email_filter(admin_client, create_user):
+    create_user(email="anna@mail.com")
+
+    response = admin_client.get(reverse("admin:user_customuser_changelist"))
+
+    assert "email__exact" not in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_user_change_view_shows_shopping_list_counts(
+    admin_client, create_user, create_shopping_list, create_shopping_item
+):
+    user = create_user(email="anna@mail.com")
+    shopping_list = create_shopping_list(user, name="Groceries")
+    create_shopping_item(shopping_list=shopping_list, name="Eggs")
+    create_shopping_item(shopping_list=shopping_list, name="Milk", purchased=True)
+
+    response = admin_client.get(reverse("admin:user_customuser_change", args=[user.id]))
+
+    assert response.status_code == 200
+    inline = response.context["inline_admin_formsets"][0]
+    membership = inline.formset.queryset.get()
+    assert (membership.item_count, membership.open_item_count) == (2, 1)
+    assert "Groceries" in response.content.decode()
@@ -0,0 +1,106 @@
+import pytest
+
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from shopping_list.models import ShoppingItem
+from shopping_list.tests.conftest import create_shopping_list
+from user.tests.conftest import create_user, create_authenticated_client
+from user.views import week_start
+
+
+@pytest.mark.django_db
+def test_stats_count_lists_and_items_of_the_user(create_user, create_authenticated_client, create_shopping_list, query_budget):
+    user = create_user()
+    weekly = create_shopping_list(user, "Weekly")
+    party = create_shopping_list(user, "Party")
+    template = create_shopping_list(user, "Template")
+    template.is_template = True
+    template.save()
+    other = create_shopping_list(create_user(email="other@example.com"))
+    ShoppingItem.objects.create(shopping_list=weekly, name="Milk", purchased=False)
+    ShoppingItem.objects.create(shopping_list=weekly, name="Eggs", purchased=True)
+    ShoppingItem.objects.create(shopping_list=party, name="Chips", purchased=False)
+    ShoppingItem.objects.create(
+        shopping_list=party, name="Cake", purchased=True, purchased_at=week_start() - timedelta(days=1)
+    )
+    ShoppingItem.objects.create(shopping_list=template, name="Bread", purchased=False)
+    ShoppingItem.objects.create(shopping_list=other, name="Tea", purchased=True)
+    client = create_authenticated_client(user)
+
+    with query_budget(3):
+        response = client.get(reverse("user-stats"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert {name: value for name, value in response.data.items() if name != "week_start"} == {
+        "shopping_lists": 2,
+        "templates": 1,
+        "items": 4,
+        "open_items": 2,
+        "purchased_this_week": 1,
+    }
+
+
+@pytest.mark.django_db
+def test_stats_of_a_user_without_lists_are_zero(create_user, create_authenticated_client):
+    client = create_authenticated_client(create_user())
+
+    response = client.get(reverse("user-stats"))
+
+    assert response.data["shopping_lists"] == 0
+    assert response.data["purchased_this_week"] == 0
+
+
+@pytest.mark.django_db
+def test_stats_are_cached_when_a_ttl_is_set(settings, create_user, create_authenticated_client, create_shopping_list):
+    settings.USER_STATS_CACHE_TTL = 60
+    user = create_user()
+    client = create_authenticated_client(user)
+    client.get(reverse("user-stats"))
+
+    create_shopping_list(user)
+    response = client.get(reverse("user-stats"))
+
+    assert response.data["shopping_lists"] == 0
+
+
+@pytest.mark.django_db
+def test_purchased_at_follows_purchased(create_shopping_list):
+    item = ShoppingItem.objects.create(shopping_list=create_shopping_list(), name="Milk", purchased=False)
+    assert item.purchased_at is None
+
+    item.purchased = True
+    item.save()
+    purchased_at = item.purchased_at
+    assert timezone.now() - purchased_at < timedelta(minutes=1)
+
+    item.quantity = 2
+    item.save()
+    assert item.purchased_at == purchased_at
+
+    item.purchased = False
+    item.save()
+    assert item.purchased_at is None
+
+
+@pytest.mark.django_db
+def test_replayed_purchase_keeps_its_purchase_time(create_shopping_list):
+    shopping_list = create_shopping_list()
+    last_week = week_start() - timedelta(days=1)
+    item = ShoppingItem.objects.create(shopping_list=shopping_list, name="Milk", purchased=True, purchased_at=last_week)
+    row = {"id": item.id, "name": "Milk", "purchased": True}
+
+    ShoppingItem.upsert(shopping_list.id, [row])
+    item.refresh_from_db()
+    assert item.purchased_at == last_week
+
+    ShoppingItem.upsert(shopping_list.id, [{**row, "purchased": False}])
+    item.refresh_from_db()
+    assert item.purchased_at is None
+
+    ShoppingItem.upsert(shopping_list.id, [row])
+    item.refresh_from_db()
+    assert item.purchased_at >= week_start()
@@ -0,0 +1,83 @@
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user.authentication import principal_cache
+from user.models import APIToken
+from user.tests.conftest import create_user, create_authenticated_client
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+def token_client(key):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {key}")
+    return client
+
+
+@pytest.mark.django_db
+def test_token_is_created_and_key_returned_once(create_user, create_authenticated_client):
+    user = create_user()
+    client = create_authenticated_client(user)
+
+    response = client.post(reverse("api-tokens"), {"name": "phone"}, format="json")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    token = APIToken.objects.get(user=user)
+    assert token.key_hash == APIToken.hash_key(response.data["key"])
+    assert "key" not in client.get(reverse("api-tokens")).data[0]
+
+
+@pytest.mark.django_db
+def test_token_authenticates_requests(create_user):
+    user = create_user()
+    _, key = APIToken.generate(user)
+
+    response = token_client(key).get(reverse("all-shopping-lists"))
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_invalid_token_is_rejected(create_user):
+    create_user()
+
+    response = token_client("not-a-real-key").get(reverse("all-shopping-lists"))
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_cached_principal_authenticates_without_user_query(create_user):
+    user = create_user()
+    _, key = APIToken.generate(user)
+    client = token_client(key)
+    client.get(reverse("api-tokens"))
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("api-tokens"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert not any("user_customuser" in query["sql"] for query in queries.captured_queries)
+
+
+@pytest.mark.django_db
+def test_revoked_token_is_rejected_even_when_cached(create_user, create_authenticated_client):
+    user = create_user()
+    token, key = APIToken.generate(user)
+    client = token_client(key)
+    assert client.get(reverse("all-shopping-lists")).status_code == status.HTTP_200_OK
+
+    response = create_authenticated_client(user).delete(reverse("api-token-detail", args=[token.id]))
+
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert client.get(reverse("all-shopping-lists")).status_code == status.HTTP_403_FORBIDDEN
@@ -1,5 +1,13 @@
-from django.contrib.auth import get_user_model
-from django.test import TestCase
+import io
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, override_settings
 
 
 class UsersManagersTests(TestCase):
@@ -40,3 +48,78 @@ class UsersManagersTests(TestCase):
         with self.assertRaises(ValueError):
             User.objects.create_superuser(
                 email="super@user.com", password="foo", is_superuser=False)
+
+    def test_bulk_create_users(self):
+        User = get_user_model()
+        users = User.objects.bulk_create_users(
+            [("one@user.com", "foo"), ("two@user.com", "bar")], processes=1
+        )
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual([user.email for user in users], ["one@user.com", "two@user.com"])
+        self.assertTrue(User.objects.get(email="two@user.com").check_password("bar"))
+        with self.assertRaises(ValueError):
+            User.objects.bulk_create_users([("", "foo")])
+
+    @mock.patch("user.managers.PARALLEL_HASHING_THRESHOLD", 2)
+    def test_bulk_create_users_hashes_in_process_pool(self):
+        User = get_user_model()
+        User.objects.bulk_create_users(
+            [(f"user{i}@user.com", f"pass{i}") for i in range(4)], processes=2
+        )
+        self.assertTrue(User.objects.get(email="user3@user.com").check_password("pass3"))
+
+    def test_bulk_create_users_skips_existing_emails(self):
+        User = get_user_model()
+        User.objects.create_user(email="one@user.com", password="foo")
+        with mock.patch("user.managers.make_password", wraps=make_password) as hasher:
+            users = User.objects.bulk_create_users(
+                [("ONE@user.com", "bar"), ("two@user.com", "bar"), ("Two@user.com", "baz")],
+                processes=1, ignore_conflicts=True,
+            )
+        self.assertEqual([user.email for user in users], ["two@user.com"])
+        self.assertEqual(hasher.call_count, 1)
+        self.assertTrue(User.objects.get(email="one@user.com").check_password("foo"))
+
+    def test_import_users_reports_the_users_created(self):
+        User = get_user_model()
+        User.objects.create_user(email="one@user.com", password="foo")
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as f:
+            f.write("email,password\none@user.com,bar\ntwo@user.com,bar\n")
+            f.flush()
+            out = io.StringIO()
+            call_command("import_users", f.name, "--processes=1", "--skip-existing", stdout=out)
+        self.assertIn("Imported 1 of 2 users.", out.getvalue())
+
+    @override_settings(PASSWORD_HASHERS=["user.hashers.TunablePBKDF2PasswordHasher"])
+    def test_password_is_rehashed_on_login_when_work_factor_changes(self):
+        User = get_user_model()
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            user = User.objects.create_user(email="normal@user.com", password="foo")
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
+
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertTrue(authenticate(email="normal@user.com", password="foo"))
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$2000$"))
+
+    def test_email_is_normalized_to_lowercase(self):
+        User = get_user_model()
+        user = User.objects.create_user(email="Normal.User@Example.COM", password="foo")
+        self.assertEqual(user.email, "normal.user@example.com")
+
+    def test_login_is_case_insensitive_with_one_indexed_lookup(self):
+        User = get_user_model()
+        user = User.objects.create_user(email="normal@user.com", password="foo")
+        with CaptureQueriesContext(connection) as queries:
+            found = User.objects.get_by_natural_key("NORMAL@User.com")
+        self.assertEqual(found, user)
+        self.assertEqual(len(queries), 1)
+        self.assertIn("LOWER(", queries[0]["sql"].upper())
+        self.assertEqual(authenticate(email="Normal@USER.com", password="foo"), user)
+
+    def test_emails_differing_by_case_are_rejected(self):
+        User = get_user_model()
+        User.objects.create_user(email="normal@user.com", password="foo")
+        with self.assertRaises(IntegrityError):
+            User(email="NORMAL@user.com").save()
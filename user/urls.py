@@ -0,0 +1,10 @@
+from django.urls import path
+
+from user.views import APITokenDetail, ListAddAPIToken, UserStats
+
+
+urlpatterns = [
+    path("api/tokens/", ListAddAPIToken.as_view(), name="api-tokens"),
+    path("api/tokens/<int:pk>/", APITokenDetail.as_view(), name="api-token-detail"),
+    path("api/me/stats/", UserStats.as_view(), name="user-stats"),
+]
@@ -1,3 +1,83 @@
-from django.shortcuts import render
+from datetime import datetime, time, timedelta
 
-# Create your views here.
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Q
+from django.utils import timezone
+from rest_framework import generics
+from rest_framework.response import Response
+
+from core.querybudget import view_query_budgets
+from shopping_list.models import ShoppingList
+from shopping_list.sharding import fan_out_for_member, is_sharded
+
+from user.models import APIToken
+from user.serializers import APITokenSerializer, UserStatsSerializer
+
+
+@view_query_budgets(get=3, post=3)
+class ListAddAPIToken(generics.ListCreateAPIView):
+    serializer_class = APITokenSerializer
+
+    def get_queryset(self):
+        return APIToken.objects.filter(user=self.request.user).order_by("-created")
+
+
+@view_query_budgets(get=3, delete=4)
+class APITokenDetail(generics.RetrieveDestroyAPIView):
+    serializer_class = APITokenSerializer
+
+    def get_queryset(self):
+        return APIToken.objects.filter(user=self.request.user)
+
+    def perform_destroy(self, instance):
+        instance.revoke()
+
+
+def week_start():
+    today = timezone.localdate()
+    return timezone.make_aware(datetime.combine(today - timedelta(days=today.weekday()), time.min))
+
+
+def shopping_stats(user):
+    """
+    Counts over the user's lists and their items, from one aggregate query
+    joining lists, memberships and items (one per shard when sharded).
+    """
+    since = week_start()
+    aggregates = {
+        "shopping_lists": Count("pk", filter=Q(is_template=False), distinct=True),
+        "templates": Count("pk", filter=Q(is_template=True), distinct=True),
+        "items": Count("shopping_items", filter=Q(is_template=False)),
+        "open_items": Count("shopping_items", filter=Q(is_template=False, shopping_items__purchased=False)),
+        "purchased_this_week": Count(
+            "shopping_items", filter=Q(is_template=False, shopping_items__purchased_at__gte=since)
+        ),
+    }
+    if not is_sharded():
+        return {**ShoppingList.objects.filter(members=user).aggregate(**aggregates), "week_start": since}
+
+    results = fan_out_for_member(
+        user, lambda alias, ids: ShoppingList.objects.using(alias).filter(pk__in=ids).aggregate(**aggregates)
+    )
+    return {**{name: sum(result[name] for result in results) for name in aggregates}, "week_start": since}
+
+
+@view_query_budgets(get=(3, 2))
+class UserStats(generics.GenericAPIView):
+    """
+    Figures for the home screen of the authenticated user. Cached per user
+    for USER_STATS_CACHE_TTL seconds when it is set.
+    """
+    serializer_class = UserStatsSerializer
+
+    def get(self, request, *args, **kwargs):
+        ttl = settings.USER_STATS_CACHE_TTL
+        cache = caches[settings.USER_STATS_CACHE]
+        key = f"user-stats:{request.user.pk}"
+        stats = cache.get(key) if ttl else None
+        if stats is None:
+            stats = shopping_stats(request.user)
+            if ttl:
+                cache.set(key, stats, ttl)
+        return Response(self.get_serializer(stats).data)